@@ -0,0 +1,80 @@
+"""Compares the indexed alert engine with scanning and rebuilding the whole alert list every tick.
+
+Usage: python -m benchmarks.bench_alerts [alerts] [coins] [ticks]
+"""
+import random
+import sys
+import time
+from utils.alert_index import AlertIndex
+
+def make_alerts(rng, count, coins):
+    # Every coin starts at 100; like real alerts, targets sit on the far side of the current price
+    alerts = []
+    for alert_id in range(1, count + 1):
+        condition = rng.choice('<>')
+        alerts.append({
+            'id': alert_id,
+            'user_id': rng.randrange(count // 5 or 1),
+            'crypto': f"coin-{rng.randrange(coins)}",
+            'condition': condition,
+            'price': round(rng.uniform(100, 150) if condition == '>' else rng.uniform(50, 100), 2)
+        })
+    return alerts
+
+def make_ticks(rng, coins, ticks):
+    # A random walk, so each tick crosses a handful of thresholds
+    prices = {f"coin-{i}": 100.0 for i in range(coins)}
+    result = []
+    for _ in range(ticks):
+        for coin in prices:
+            prices[coin] *= 1 + rng.uniform(-0.01, 0.01)
+        result.append({coin: {'usd': price} for coin, price in prices.items()})
+    return result
+
+def scan(active_alerts, prices):
+    triggered_alerts = []
+    for alert in active_alerts:
+        crypto = alert['crypto']
+        if crypto not in prices or 'usd' not in prices[crypto]:
+            continue
+        curr_price = prices[crypto]['usd']
+        if (alert['condition'] == '>' and curr_price > alert['price']) or \
+           (alert['condition'] == '<' and curr_price < alert['price']):
+            triggered_alerts.append(alert)
+    if triggered_alerts:
+        active_alerts[:] = [alert for alert in active_alerts if alert not in triggered_alerts]
+    return triggered_alerts
+
+def main(count, coins, tick_count):
+    rng = random.Random(42)
+    alerts = make_alerts(rng, count, coins)
+    ticks = make_ticks(rng, coins, tick_count)
+
+    active_alerts = list(alerts)
+    start = time.perf_counter()
+    old_fired = [sorted(alert['id'] for alert in scan(active_alerts, prices)) for prices in ticks]
+    old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = AlertIndex(alerts)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_fired = []
+    for prices in ticks:
+        fired = []
+        for crypto, data in prices.items():
+            fired += index.pop_triggered(crypto, data['usd'])
+        new_fired.append(sorted(alert['id'] for alert in fired))
+    new = time.perf_counter() - start
+
+    assert old_fired == new_fired
+    total = sum(len(fired) for fired in new_fired)
+    print(f"{count} alerts over {coins} coins, {tick_count} ticks, {total} triggered")
+    print(f"full scan:     {old / tick_count * 1000:9.2f} ms/tick")
+    print(f"indexed:       {new / tick_count * 1000:9.2f} ms/tick  (+{build * 1000:.0f} ms one-off build)")
+    print(f"speedup: {old / new:.0f}x")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*(args + [100000, 200, 20][len(args):]))
@@ -0,0 +1,64 @@
+"""Compares a full poll cycle: feedparser.parse(url) in the executor vs. the pooled aiohttp fetcher.
+
+A second fetcher cycle shows the effect of the ETag / content-hash cache on unchanged feeds.
+
+Usage: python -m benchmarks.bench_fetch [feeds] [latency_seconds]
+"""
+import asyncio
+import sys
+import time
+import feedparser
+from benchmarks.feeds import FeedServer
+from utils.fetcher import FeedFetcher
+
+async def executor_cycle(urls):
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(None, feedparser.parse, url) for url in urls))
+    return sum(1 for feed in results if feed.entries)
+
+async def fetcher_cycle(fetcher, urls):
+    loop = asyncio.get_running_loop()
+
+    async def fetch_and_parse(url):
+        result = await fetcher.fetch(url)
+        if result.status != 'ok':
+            return None
+        return await loop.run_in_executor(None, feedparser.parse, result.body)
+
+    results = await asyncio.gather(*(fetch_and_parse(url) for url in urls))
+    return sum(1 for feed in results if feed and feed.entries)
+
+async def main(count, latency):
+    server = FeedServer(count, latency=latency)
+    await server.start()
+    urls = server.urls()
+    try:
+        start = time.perf_counter()
+        ok = await executor_cycle(urls)
+        old = time.perf_counter() - start
+        print(f"executor feedparser.parse(url): {old:7.2f}s  ({ok}/{count} feeds)")
+
+        # Per-host limit is lifted here since every synthetic feed shares one host
+        fetcher = FeedFetcher(max_concurrency=100, per_host_limit=100)
+        await fetcher.start()
+        try:
+            start = time.perf_counter()
+            ok = await fetcher_cycle(fetcher, urls)
+            new = time.perf_counter() - start
+            print(f"pooled aiohttp fetcher:         {new:7.2f}s  ({ok}/{count} feeds)")
+            print(f"speedup: {old / new:.1f}x")
+
+            start = time.perf_counter()
+            ok = await fetcher_cycle(fetcher, urls)
+            cached = time.perf_counter() - start
+            print(f"conditional GET (unchanged):    {cached:7.2f}s  ({ok}/{count} feeds parsed)")
+            print(f"cache: {fetcher.cache_summary()}")
+        finally:
+            await fetcher.close()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    asyncio.run(main(count, latency))
@@ -0,0 +1,93 @@
+"""Measures the cost of a price tick with window alerts as the number of coins and the window grow.
+
+Each coin has move and moving-average alerts on one window length. The ring buffers answer each
+window with two array reads. The comparison recomputes the window from a list of closes and leaves
+out the alert bookkeeping, so it only wins for short windows.
+
+Usage: python -m benchmarks.bench_history [minutes_per_run] [coins ...]
+"""
+import random
+import sys
+import time
+from collections import deque
+from utils.alert_index import AlertIndex, MOVE, AVERAGE
+from utils.price_history import PriceHistory
+
+WINDOWS = (15, 60, 240, 1440)
+
+def make_alerts(coins, minutes, per_coin=5):
+    alerts = []
+    for coin in range(coins):
+        for i in range(per_coin):
+            # Far-off percentages never fire, so the move side costs the same every tick
+            alerts.append({'id': len(alerts) + 1, 'user_id': i, 'crypto': f"coin-{coin}",
+                           'condition': MOVE, 'price': 50.0 + i, 'minutes': minutes})
+            alerts.append({'id': len(alerts) + 1, 'user_id': i, 'crypto': f"coin-{coin}",
+                           'condition': AVERAGE, 'price': 0.0, 'minutes': minutes})
+    return alerts
+
+def make_ticks(rng, coins, minutes):
+    """Two ticks per coin per minute, as a random walk."""
+    prices = [100.0] * coins
+    ticks = []
+    for minute in range(minutes):
+        for second in (0, 30):
+            for coin in range(coins):
+                prices[coin] *= 1 + rng.uniform(-0.002, 0.002)
+                ticks.append((f"coin-{coin}", prices[coin], minute * 60.0 + second))
+    return ticks
+
+def run_ring(coins, window, warmup, ticks):
+    history = PriceHistory(max(WINDOWS))
+    index = AlertIndex(make_alerts(coins, window))
+    for coin, price, now in warmup:
+        history.record(coin, price, now)
+    elapsed = 0.0
+    for coin, price, now in ticks:
+        start = time.perf_counter()
+        history.record(coin, price, now)
+        fired = index.pop_window_triggered(coin, history)
+        elapsed += time.perf_counter() - start
+        for alert in fired:
+            # Put crossed alerts back so every tick keeps evaluating the same number of them
+            index.add(alert)
+    return elapsed / len(ticks)
+
+def run_rescan(coins, window, warmup, ticks):
+    closes = {f"coin-{coin}": deque(maxlen=max(WINDOWS) + 1) for coin in range(coins)}
+    minutes = {}
+    def record(coin, price, now):
+        minute = int(now // 60)
+        if minutes.get(coin) == minute:
+            closes[coin][-1] = price
+        else:
+            closes[coin].append(price)
+            minutes[coin] = minute
+    for coin, price, now in warmup:
+        record(coin, price, now)
+    elapsed = 0.0
+    for coin, price, now in ticks:
+        start = time.perf_counter()
+        record(coin, price, now)
+        recent = list(closes[coin])[-(window + 1):]
+        change = (recent[-1] - recent[0]) / recent[0] * 100
+        average = sum(recent[1:]) / window
+        above = price > average
+        elapsed += time.perf_counter() - start
+    return elapsed / len(ticks)
+
+def main(minutes, coin_counts):
+    rng = random.Random(7)
+    print(f"{'coins':>6} {'window':>7} {'ring buffer':>12} {'rescan':>10}   per tick, {minutes} min of ticks")
+    for coins in coin_counts:
+        for window in WINDOWS:
+            warmup = make_ticks(rng, coins, window + 1)
+            offset = (window + 1) * 60.0
+            ticks = [(coin, price, now + offset) for coin, price, now in make_ticks(rng, coins, minutes)]
+            ring = run_ring(coins, window, warmup, ticks)
+            rescan = run_rescan(coins, window, warmup, ticks)
+            print(f"{coins:>6} {window:>5} m {ring * 1e6:>9.2f} us {rescan * 1e6:>7.2f} us")
+
+if __name__ == "__main__":
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    main(minutes, [int(arg) for arg in sys.argv[2:]] or [10, 100, 1000])
@@ -0,0 +1,52 @@
+"""Compares the shared multi-pattern keyword matcher with the per-guild `any(k.lower() in text)` loop.
+
+Usage: python -m benchmarks.bench_keywords [guilds] [keywords_per_guild] [entries]
+"""
+import random
+import sys
+import time
+from utils.keywords import FeedMatcher, compile_keywords
+
+WORDS = ("bitcoin ethereum solana market rally crash regulation etf stablecoin defi nft exchange "
+         "hack launch upgrade fork mining wallet custody inflation rates fed earnings ai chip "
+         "election policy trade tariff oil gold bond yield startup funding merger lawsuit").split()
+
+def make_text(rng, words=120):
+    return " ".join(rng.choice(WORDS) + rng.choice(("", "s", "ing", "-based")) for _ in range(words))
+
+def main(guilds, per_guild, entry_count):
+    rng = random.Random(42)
+    vocabulary = WORDS + [f"{a}-{b}" for a in WORDS for b in WORDS][:2000]
+    keyword_lists = [[rng.choice(vocabulary).upper() for _ in range(per_guild)] for _ in range(guilds)]
+    entries = [make_text(rng) for _ in range(entry_count)]
+
+    start = time.perf_counter()
+    old_hits = 0
+    for text in entries:
+        for keywords in keyword_lists:
+            content_to_check = text.lower()
+            if any(k.lower() in content_to_check for k in keywords):
+                old_hits += 1
+    old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    keyword_sets = [compile_keywords(tuple(keywords)) for keywords in keyword_lists]
+    matcher = FeedMatcher(frozenset().union(*(keyword_set.tokens for keyword_set in keyword_sets)))
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_hits = 0
+    for text in entries:
+        matched = matcher.scan(text)
+        new_hits += sum(1 for keyword_set in keyword_sets if keyword_set.accepts(matched))
+    new = time.perf_counter() - start
+
+    assert old_hits == new_hits, (old_hits, new_hits)
+    print(f"{guilds} guilds x {per_guild} keywords, {entry_count} entries, {old_hits} deliveries")
+    print(f"per-keyword loop: {old * 1000:8.1f} ms")
+    print(f"shared matcher:   {new * 1000:8.1f} ms  (+{compile_time * 1000:.1f} ms one-off compile)")
+    print(f"speedup: {old / new:.1f}x")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*(args + [30, 50, 500][len(args):]))
@@ -0,0 +1,67 @@
+"""Compares parsing a multi-megabyte feed with feedparser against the capped, streaming path.
+
+Usage: python -m benchmarks.bench_large [items] [max_kb]
+"""
+import asyncio
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from benchmarks.feeds import make_feed
+from benchmarks.loadtest import serve
+from utils.fetcher import FeedFetcher
+from utils.parsing import parse_any, parse_feed
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+async def fetch_capped(url, max_bytes):
+    fetcher = FeedFetcher(validators={}, max_bytes=max_bytes)
+    await fetcher.start()
+    try:
+        result = await fetcher.fetch(url)
+    finally:
+        await fetcher.close()
+    return result
+
+def main(items, max_kb):
+    document = make_feed(1, items, summary_size=800)
+    print(f"feed with {items} items, {len(document) / 1024 / 1024:.1f} MB")
+
+    feed, elapsed, peak = measure(parse_feed, document)
+    print(f"feedparser, whole document:   {elapsed * 1000:8.1f} ms, peak {peak / 1024 / 1024:7.1f} MB, "
+          f"{len(feed['entries'])} entries")
+
+    feed, elapsed, peak = measure(parse_any, document, 21)
+    print(f"streaming parser, 21 items:   {elapsed * 1000:8.1f} ms, peak {peak / 1024 / 1024:7.1f} MB, "
+          f"{len(feed['entries'])} entries")
+
+    # The server runs in its own process so its send buffers are not counted; the peak still
+    # includes aiohttp's receive buffers next to the capped body
+    parent, child = multiprocessing.get_context('spawn').Pipe()
+    server = multiprocessing.get_context('spawn').Process(target=serve, args=(child, 1, items, 800, 0, 0), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{parent.recv()}/feed/0"
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = asyncio.run(fetch_capped(url, max_kb * 1024))
+        feed = parse_any(result.body, 21, truncated=result.truncated)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        parent.send(('stop', None))
+        server.join(5)
+    print(f"fetch capped at {max_kb} KB + parse: {elapsed * 1000:6.1f} ms, peak {peak / 1024 / 1024:7.1f} MB, "
+          f"{len(result.body) / 1024:,.0f} KB read, truncated={result.truncated}, {len(feed['entries'])} entries")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*(args + [5000, 2048][len(args):]))
@@ -0,0 +1,41 @@
+"""Measures parse throughput and event-loop lag for thread parsing vs. 1, 2 and 4 worker processes.
+
+Usage: python -m benchmarks.bench_parse [feeds] [items_per_feed]
+"""
+import asyncio
+import sys
+import time
+from benchmarks.feeds import make_feed
+from utils.metrics import LoopLagMonitor
+from utils.parsing import FeedParser
+
+async def run(workers, documents):
+    parser = FeedParser(workers=workers)
+    try:
+        # Warm the pool up so process start-up time isn't counted
+        await asyncio.gather(*(parser.parse(documents[0]) for _ in range(max(workers, 1))))
+        lag = LoopLagMonitor(interval=0.005, keep_samples=True)
+        lag.start()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(parser.parse(document) for document in documents))
+        elapsed = time.perf_counter() - start
+        await lag.close()
+        _, worst, average = lag.report()
+    finally:
+        parser.close()
+    entries = sum(len(result['entries']) for result in results)
+    label = "thread" if workers == 0 else f"{workers} proc"
+    print(f"{label:>8}: {len(documents) / elapsed:7.1f} feeds/s  {entries / elapsed:9.0f} entries/s  "
+          f"loop lag max {worst * 1000:6.1f} ms avg {average * 1000:5.1f} ms")
+
+async def main(count, items):
+    documents = [make_feed(i, items) for i in range(count)]
+    size = sum(len(document) for document in documents) / 1024 / 1024
+    print(f"{count} feeds x {items} items ({size:.1f} MB)")
+    for workers in (0, 1, 2, 4):
+        await run(workers, documents)
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(count, items))
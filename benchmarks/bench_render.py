@@ -0,0 +1,57 @@
+"""Compares building an embed per subscriber with rendering each new item once and sharing it.
+
+Items carry HTML summaries of varying length, like real feeds; the per-subscriber path posts the
+raw HTML, so long summaries produce embeds Discord would reject.
+
+Usage: python -m benchmarks.bench_render [items] [subscribers]
+"""
+import random
+import sys
+import time
+import discord
+from utils.render import ArticleRenderer
+
+DESCRIPTION_LIMIT = 4096
+
+def make_entries(rng, count):
+    entries = []
+    for i in range(count):
+        paragraphs = "".join(f"<p>Paragraph {p} with <a href='http://example.com/{i}/{p}'>a link</a> and "
+                             f"<b>some</b> &amp; more text. " + "lorem ipsum dolor sit amet " * 8 + "</p>"
+                             for p in range(rng.choice([1, 3, 10, 25])))
+        entries.append({'id': f"item-{i}", 'title': f"Headline {i} &amp; more", 'link': f"http://example.com/{i}",
+                        'summary': paragraphs + f"<img src='http://example.com/{i}.jpg'>",
+                        'image': None, 'published': 1700000000 + i})
+    return entries
+
+def per_subscriber(entries, subscribers):
+    embeds = []
+    for _ in range(subscribers):
+        for entry in entries:
+            embed = discord.Embed(title=entry['title'], url=entry['link'],
+                                  description=entry['summary'] or "A new article has been posted",
+                                  color=discord.Color.blue())
+            embed.set_footer(text="Feed")
+            if entry['image']:
+                embed.set_image(url=entry['image'])
+            embeds.append(embed)
+    return embeds
+
+def render_once(entries, subscribers):
+    renderer = ArticleRenderer()
+    articles = [renderer.render(entry, "Feed") for entry in entries]
+    return [article.embed for _ in range(subscribers) for article in articles]
+
+def main(items, subscribers):
+    entries = make_entries(random.Random(3), items)
+    for name, build in (("embed per subscriber", per_subscriber), ("render once, shared", render_once)):
+        start = time.perf_counter()
+        embeds = build(entries, subscribers)
+        elapsed = time.perf_counter() - start
+        oversized = sum(1 for embed in embeds if len(embed.description or '') > DESCRIPTION_LIMIT or len(embed) > 6000)
+        print(f"{name:22} {elapsed * 1000:8.1f} ms for {len(embeds)} embeds, "
+              f"{len(set(map(id, embeds)))} distinct objects, {oversized} over Discord's limits")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*(args + [200, 500][len(args):]))
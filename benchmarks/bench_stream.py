@@ -0,0 +1,57 @@
+"""Measures alert trigger latency and evaluation cost per tick for the streaming price source.
+
+A local server replays recorded ticks over a WebSocket (or JSON lines with `stream`); each tick
+re-evaluates only the alerts for its coin. Polling once a minute would add 30 s of latency on
+average before an alert could fire.
+
+Usage: python -m benchmarks.bench_stream [alerts] [coins] [ticks] [ticks_per_second] [ws|stream]
+"""
+import asyncio
+import random
+import sys
+import time
+from utils.alert_index import AlertIndex
+from utils.price_sources import StreamSource
+from benchmarks.bench_alerts import make_alerts
+from benchmarks.prices import TickServer, record_ticks
+
+async def run(count, coins, tick_count, rate, mode):
+    index = AlertIndex(make_alerts(random.Random(42), count, coins))
+    server = TickServer(record_ticks(coins, tick_count), rate=rate)
+    await server.start()
+
+    latencies = []
+    evaluation = 0.0
+    def on_tick(coin, price):
+        nonlocal evaluation
+        start = time.perf_counter()
+        fired = index.pop_triggered(coin, price)
+        now = time.perf_counter()
+        evaluation += now - start
+        if fired:
+            latencies.append(now - server.sent[(coin, price)])
+
+    source = StreamSource(server.url('/ws' if mode == 'ws' else '/stream'))
+    cpu = time.process_time()
+    source.start(on_tick)
+    await server.done.wait()
+    while source.stats['ticks'] < tick_count:
+        await asyncio.sleep(0.01)
+    cpu = time.process_time() - cpu
+    await source.close()
+    await server.stop()
+
+    latencies.sort()
+    print(f"{count} alerts over {coins} coins, {tick_count} ticks at {rate}/s via {mode}, "
+          f"{count - len(index)} alerts triggered on {len(latencies)} ticks")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"trigger latency: p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms (polling every 60 s: ~30 s average)")
+    print(f"evaluation: {evaluation / tick_count * 1e6:.1f} us/tick; "
+          f"process CPU incl. local server: {cpu / tick_count * 1e6:.1f} us/tick")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:5]]
+    mode = sys.argv[5] if len(sys.argv) > 5 else 'ws'
+    asyncio.run(run(*(args + [100000, 200, 20000, 2000][len(args):]), mode))
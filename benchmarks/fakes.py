@@ -0,0 +1,143 @@
+"""A stand-in for the Discord side of the bot: channels and users record what they were sent.
+
+FakeBot carries the same attributes bot.py sets up, so the real cogs and services run against it
+without a token or a gateway connection.
+"""
+import asyncio
+from utils.alert_index import AlertIndex
+from utils.price_history import PriceHistory
+from utils.coins import CoinRegistry
+from utils.dedup import DedupStore
+from utils.delivery import DeliveryQueue
+from utils.prices import PriceService
+from utils.subscriptions import SubscriptionIndex
+
+class FakeChannel:
+    def __init__(self, channel_id, guild, latency=0.0):
+        self.id = channel_id
+        self.guild = guild
+        self.latency = latency
+        self.mention = f"<#{channel_id}>"
+        self.messages = 0
+        self.embeds = 0
+
+    async def send(self, content=None, embed=None, embeds=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+        self.embeds += len(embeds or ([embed] if embed else []))
+
+class FakeUser:
+    def __init__(self, user_id, latency=0.0):
+        self.id = user_id
+        self.latency = latency
+        self.messages = 0
+
+    async def send(self, content=None, embed=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+
+class FakeGuild:
+    def __init__(self, guild_id, name=None):
+        self.id = guild_id
+        self.name = name or f"Guild {guild_id}"
+
+class FakeBot:
+    def __init__(self, bot_config, price_api, send_latency=0.0, discord_limits=False):
+        self.bot_config = bot_config
+        self.send_latency = send_latency
+        self.MIN_RSS_INTERVAL = 5
+        self.DEFAULT_RSS_INTERVAL = 10
+        self.MAX_RSS_INTERVAL = 360
+        self.RSS_MAX_CONCURRENCY = 50
+        self.RSS_PER_HOST_LIMIT = 50     # every synthetic feed lives on the same local host
+        self.RSS_FETCH_TIMEOUT = 20
+        self.RSS_MAX_FEED_KB = 2048
+        self.RSS_PARSE_WORKERS = 0
+        self.ALERT_DM_CONCURRENCY = 10
+        self.PRICE_STREAM_URL = None
+        self.ROLE = 'all'
+        self.post_queue = None
+        self.feed_validators = {}
+        self.feed_cursors = {}
+        self.feed_health = {}
+        self.user = None
+        self.active_alerts = AlertIndex()
+        self.price_history = PriceHistory(1440)
+        self.PRICE_HISTORY_MINUTES = 1440
+        self.dedup = DedupStore(retention_hours=3)
+        self.subscriptions = SubscriptionIndex()
+        self.subscriptions.build(bot_config)
+        if discord_limits:
+            self.delivery = DeliveryQueue(workers=4)
+        else:
+            # Lift Discord's limits to measure how fast the bot itself can produce messages
+            self.delivery = DeliveryQueue(workers=16, channel_rate=(10 ** 6, 1), global_rate=(10 ** 6, 1))
+        self.prices = PriceService(ttl=0, base_url=price_api)
+        self.coins = CoinRegistry('benchmark-coins.json', base_url=price_api)
+        self.saves = dict.fromkeys(['configs', 'alerts', 'history', 'validators', 'cursors', 'health', 'price_history'], 0)
+        self.channels = {}
+        self.users = {}
+        for guild_id, guild_config in bot_config.items():
+            if not isinstance(guild_config, dict):
+                continue
+            guild = FakeGuild(int(guild_id))
+            channel_ids = {guild_config.get('channel_id')}
+            channel_ids.update(feed.get('channel_id') for feed in guild_config.get('rss_feeds', []))
+            for channel_id in channel_ids - {None}:
+                self.channels[channel_id] = FakeChannel(channel_id, guild, send_latency)
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id):
+        await asyncio.sleep(self.send_latency)
+        return self.users.setdefault(user_id, FakeUser(user_id, self.send_latency))
+
+    def save_configs(self, guild_id=None):
+        self.saves['configs'] += 1
+
+    def save_alerts(self, added=(), removed=()):
+        self.saves['alerts'] += 1
+
+    def save_history(self):
+        self.saves['history'] += 1
+
+    def save_validators(self):
+        self.saves['validators'] += 1
+
+    def save_cursors(self):
+        self.saves['cursors'] += 1
+
+    def save_health(self):
+        self.saves['health'] += 1
+
+    def save_price_history(self):
+        self.saves['price_history'] += 1
+
+    def get_guild(self, guild_id):
+        return None
+
+    async def log_action(self, bot, guild, message, author):
+        pass
+
+    async def start(self):
+        self.delivery.start()
+        await self.prices.start()
+
+    async def close(self):
+        await self.delivery.close()
+        await self.prices.close()
+
+    async def drain(self):
+        """Waits until every queued post has been sent (or failed)."""
+        stats = self.delivery.stats
+        while stats['embeds'] + stats['failed'] < stats['enqueued']:
+            await asyncio.sleep(0.005)
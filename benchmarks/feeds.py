@@ -0,0 +1,108 @@
+"""Synthetic RSS feeds and a local stand-in HTTP server for the benchmarks."""
+import asyncio
+import hashlib
+import time
+from aiohttp import web
+
+TOPICS = ("bitcoin", "ethereum", "market", "regulation", "etf", "defi", "exchange", "mining", "wallet", "rates")
+
+def make_feed(feed_id, items=20, summary_size=400, start=None, newest=0, atom=False):
+    """Builds an RSS 2.0 (or Atom) document with `items` entries, newest first.
+
+    `newest` is the number of the most recent article, so bumping it simulates a feed publishing.
+    """
+    start = start or time.time()
+    body = "lorem ipsum dolor sit amet " * (summary_size // 27 + 1)
+    if atom:
+        return _make_atom(feed_id, items, body[:summary_size], start, newest)
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>',
+        f'<title>Synthetic feed {feed_id}</title>',
+        f'<link>http://example.com/{feed_id}</link>',
+        '<description>Benchmark feed</description>'
+    ]
+    for i in range(newest, newest - items, -1):
+        published = time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime(start - (newest - i) * 600))
+        parts.append(
+            f'<item><title>Feed {feed_id} article {i} on {TOPICS[(feed_id + i) % len(TOPICS)]}</title>'
+            f'<link>http://example.com/{feed_id}/{i}</link>'
+            f'<guid>feed-{feed_id}-item-{i}</guid>'
+            f'<pubDate>{published}</pubDate>'
+            f'<description>{body[:summary_size]}</description>'
+            f'<media:content url="http://example.com/{feed_id}/{i}.jpg" medium="image"/></item>'
+        )
+    parts.append('</channel></rss>')
+    return "\n".join(parts).encode()
+
+def _make_atom(feed_id, items, summary, start, newest):
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f'<title>Synthetic feed {feed_id}</title>',
+        f'<id>urn:feed:{feed_id}</id>',
+        f'<updated>{time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start))}</updated>'
+    ]
+    for i in range(newest, newest - items, -1):
+        updated = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start - (newest - i) * 600))
+        parts.append(
+            f'<entry><title>Feed {feed_id} article {i} on {TOPICS[(feed_id + i) % len(TOPICS)]}</title>'
+            f'<link href="http://example.com/{feed_id}/{i}"/>'
+            f'<id>feed-{feed_id}-item-{i}</id>'
+            f'<updated>{updated}</updated>'
+            f'<summary>{summary}</summary></entry>'
+        )
+    parts.append('</feed>')
+    return "\n".join(parts).encode()
+
+class FeedServer:
+    """Serves `count` synthetic feeds at /feed/<n> with an artificial latency.
+
+    Every `atom_every`-th feed is Atom instead of RSS; publish() adds new articles to feeds.
+    """
+    def __init__(self, count, items=20, latency=0.05, port=0, summary_size=400, atom_every=0):
+        self.count = count
+        self.items = items
+        self.latency = latency
+        self.port = port
+        self.summary_size = summary_size
+        self.atom_every = atom_every
+        self.newest = dict.fromkeys(range(count), 0)
+        self.documents = {i: self._build(i) for i in range(count)}
+        self.requests = 0
+        self._runner = None
+
+    def _build(self, feed_id):
+        atom = bool(self.atom_every) and feed_id % self.atom_every == 0
+        return make_feed(feed_id, self.items, self.summary_size, newest=self.newest[feed_id], atom=atom)
+
+    def publish(self, feed_ids, new_items=1):
+        for feed_id in feed_ids:
+            self.newest[feed_id] += new_items
+            self.documents[feed_id] = self._build(feed_id)
+
+    async def handle(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        document = self.documents.get(int(request.match_info['n']))
+        if document is None:
+            raise web.HTTPNotFound()
+        etag = '"' + hashlib.md5(document).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=document, content_type='application/rss+xml', headers={'ETag': etag})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/feed/{n}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    def urls(self):
+        return [f"http://127.0.0.1:{self.port}/feed/{i}" for i in range(self.count)]
@@ -0,0 +1,201 @@
+"""Runs full RSS and alert cycles against simulated guilds, with no Discord token or internet.
+
+The real RSS and Alerts cogs run on a FakeBot whose channels and users only count what they are
+sent. Feeds and a mock CoinGecko are served from a separate process so their work doesn't show
+up in this process's timings. Seeds are fixed, so runs are comparable between commits.
+
+Usage: python -m benchmarks.loadtest [--guilds 10 100 1000] [--feeds 30] [--cycles 5] [--json]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from aiohttp import web
+from benchmarks.fakes import FakeBot
+from benchmarks.feeds import TOPICS, FeedServer
+from benchmarks.prices import MockCoinGecko
+from utils.metrics import LoopLagMonitor
+
+def serve(conn, feed_count, items, summary_size, atom_every, latency):
+    """Child process: serves feeds and the mock price API, and applies commands sent over `conn`."""
+    async def run():
+        feeds = FeedServer(feed_count, items=items, latency=latency, summary_size=summary_size, atom_every=atom_every)
+        coingecko = MockCoinGecko()
+        app = web.Application()
+        app.router.add_get('/feed/{n}', feeds.handle)
+        coingecko.add_routes(app)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        conn.send(site._server.sockets[0].getsockname()[1])
+        loop = asyncio.get_running_loop()
+        while True:
+            command, arg = await loop.run_in_executor(None, conn.recv)
+            if command == 'publish':
+                feeds.publish(*arg)
+            elif command == 'move':
+                coingecko.move(arg)
+            elif command == 'stop':
+                break
+            conn.send('ok')
+        await runner.cleanup()
+    asyncio.run(run())
+
+def make_config(rng, guilds, feeds_per_guild, feed_pool, base_url):
+    """Each guild subscribes to `feeds_per_guild` feeds from a shared pool, over three channels."""
+    bot_config = {}
+    for g in range(guilds):
+        guild_id = 10 ** 6 + g
+        channels = [guild_id * 10 + c for c in range(3)]
+        feeds = []
+        for n in rng.sample(range(feed_pool), min(feeds_per_guild, feed_pool)):
+            feed = {'url': f"{base_url}/feed/{n}", 'channel_id': rng.choice(channels)}
+            if rng.random() < 0.3:
+                feed['keywords'] = rng.sample(TOPICS, 3)
+            feeds.append(feed)
+        bot_config[str(guild_id)] = {'channel_id': channels[0], 'rss_feeds': feeds}
+    return bot_config
+
+def make_alerts(rng, count, coins):
+    alerts = []
+    for alert_id in range(1, count + 1):
+        condition = rng.choice('<>')
+        alerts.append({
+            'id': alert_id,
+            'user_id': rng.randrange(count // 3 or 1),
+            'crypto': f"coin-{rng.randrange(coins)}",
+            'condition': condition,
+            'price': round(rng.uniform(100, 110) if condition == '>' else rng.uniform(90, 100), 2)
+        })
+    return alerts
+
+def command(conn, name, arg=None):
+    conn.send((name, arg))
+    conn.recv()
+
+async def run_scale(args, guilds, conn, base_url):
+    from cogs.alerts import Alerts
+    from cogs.rss import RSS
+
+    rng = random.Random(guilds)
+    feed_pool = min(guilds * args.feeds, args.feed_pool)
+    bot = FakeBot(make_config(rng, guilds, args.feeds, feed_pool, base_url),
+                  price_api=f"{base_url}/api/v3", send_latency=args.send_latency,
+                  discord_limits=args.discord_limits)
+    await bot.start()
+    rss = RSS(bot)
+    rss.fetch_rss.cancel()
+    await rss.cog_load()
+    # Every tracked feed is treated as due, so each cycle polls all of them
+    pop_due = rss.scheduler.pop_due
+    rss.scheduler.pop_due = lambda now=None: pop_due(now=float('inf'))
+
+    lag = LoopLagMonitor(interval=0.01, keep_samples=True)
+    lag.start()
+    cycles = []
+    messages = embeds = 0
+    send_time = 0.0
+    for cycle in range(args.cycles + 1):
+        if cycle:
+            updated = rng.sample(range(feed_pool), int(feed_pool * args.update_fraction))
+            command(conn, 'publish', (updated, args.new_items))
+        before = dict(bot.delivery.stats)
+        start = time.perf_counter()
+        await rss.perform_rss_check()
+        elapsed = time.perf_counter() - start
+        await bot.drain()
+        drained = time.perf_counter() - start
+        if cycle:
+            # Cycle 0 only primes caches and cursors, like the first poll after a restart
+            cycles.append(elapsed)
+            messages += bot.delivery.stats['messages'] - before['messages']
+            embeds += bot.delivery.stats['embeds'] - before['embeds']
+            send_time += drained - elapsed
+
+    # One alert tick over the whole alert set, with a 2% price move that crosses about a tenth of them
+    alerts = Alerts(bot)
+    for alert in make_alerts(rng, args.alerts, args.coins):
+        bot.active_alerts.add(alert)
+    command(conn, 'move', 2)
+    start = time.perf_counter()
+    prices = await bot.prices.get_prices(bot.active_alerts.coins())
+    for coin_id, data in prices.items():
+        alerts.check_price(coin_id, data['usd'])
+    tick = time.perf_counter() - start
+    while alerts.notifier.in_flight:
+        await asyncio.sleep(0.005)
+    notify = time.perf_counter() - start
+
+    await lag.close()
+    await alerts.cog_unload()
+    await rss.cog_unload()
+    await bot.close()
+    lag_p99, lag_max, _ = lag.report()
+    return {
+        'guilds': guilds,
+        'feeds': feed_pool,
+        'subscriptions': sum(len(subs) for subs in bot.subscriptions.by_url.values()),
+        'cycle_median_s': round(statistics.median(cycles), 3),
+        'cycle_max_s': round(max(cycles), 3),
+        'messages': messages,
+        'embeds': embeds,
+        'messages_per_s': round(messages / send_time, 1) if send_time else 0.0,
+        'alerts': args.alerts,
+        'alerts_triggered': alerts.notifier.stats['alerts'],
+        'alert_tick_s': round(tick, 3),
+        'alert_notify_s': round(notify, 3),
+        'loop_lag_p99_ms': round(lag_p99 * 1000, 1),
+        'loop_lag_max_ms': round(lag_max * 1000, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+async def main(args):
+    parent, child = multiprocessing.get_context('spawn').Pipe()
+    server = multiprocessing.get_context('spawn').Process(
+        target=serve, args=(child, args.feed_pool, args.items, args.summary_size, 4, args.latency), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{parent.recv()}"
+    out = sys.stdout
+    try:
+        for guilds in args.guilds:
+            # The cogs print a line per post; keep them out of the report
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                result = await run_scale(args, guilds, parent, base_url)
+            if args.json:
+                print(json.dumps(result), file=out)
+            else:
+                print(f"{result['guilds']:>5} guilds, {result['feeds']} feeds, {result['subscriptions']} subscriptions: "
+                      f"cycle median {result['cycle_median_s']:.3f} s (max {result['cycle_max_s']:.3f} s), "
+                      f"{result['messages']} messages / {result['embeds']} embeds at {result['messages_per_s']:,.0f} msg/s, "
+                      f"alert tick {result['alert_tick_s'] * 1000:.0f} ms ({result['alerts_triggered']} DMs sent in "
+                      f"{result['alert_notify_s']:.2f} s), loop lag p99 {result['loop_lag_p99_ms']} ms "
+                      f"max {result['loop_lag_max_ms']} ms, peak RSS {result['peak_rss_mb']} MB", file=out)
+    finally:
+        parent.send(('stop', None))
+        server.join(5)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--guilds', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--feeds', type=int, default=30, help="feeds per guild")
+    parser.add_argument('--feed-pool', type=int, default=2000, help="distinct feed URLs shared by all guilds")
+    parser.add_argument('--items', type=int, default=20, help="items per feed document")
+    parser.add_argument('--summary-size', type=int, default=400, help="characters per item summary")
+    parser.add_argument('--update-fraction', type=float, default=0.2, help="share of feeds publishing each cycle")
+    parser.add_argument('--new-items', type=int, default=2, help="articles each publishing feed adds")
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.02, help="feed server latency in seconds")
+    parser.add_argument('--send-latency', type=float, default=0.02, help="simulated Discord send latency")
+    parser.add_argument('--discord-limits', action='store_true', help="apply Discord's rate limits to sends")
+    parser.add_argument('--alerts', type=int, default=10000)
+    parser.add_argument('--coins', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help="print one JSON object per scale")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""Local stand-ins for price APIs, used by the alert benchmarks."""
+import asyncio
+import json
+import random
+import time
+from aiohttp import web
+
+def record_ticks(coins, count, seed=42):
+    """Returns a reproducible list of (coin_id, price) ticks: a random walk per coin starting at 100."""
+    rng = random.Random(seed)
+    prices = {f"coin-{i}": 100.0 for i in range(coins)}
+    ticks = []
+    for _ in range(count):
+        coin = f"coin-{rng.randrange(coins)}"
+        prices[coin] = round(prices[coin] * (1 + rng.uniform(-0.005, 0.005)), 6)
+        ticks.append((coin, prices[coin]))
+    return ticks
+
+class TickServer:
+    """Replays recorded ticks to every client of /ws (WebSocket) or /stream (JSON lines)."""
+    def __init__(self, ticks, rate=1000, port=0):
+        self.ticks = ticks
+        self.rate = rate
+        self.port = port
+        self.sent = {}     # (coin_id, price) -> perf_counter() when it was written
+        self.done = asyncio.Event()
+        self._runner = None
+
+    async def replay(self, write):
+        batch = max(1, self.rate // 100)
+        for i in range(0, len(self.ticks), batch):
+            for coin, price in self.ticks[i:i + batch]:
+                self.sent.setdefault((coin, price), time.perf_counter())
+                await write(json.dumps({'id': coin, 'usd': price}))
+            await asyncio.sleep(batch / self.rate)
+        self.done.set()
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await self.replay(ws.send_str)
+        await ws.close()
+        return ws
+
+    async def handle_stream(self, request):
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        await self.replay(lambda line: response.write(line.encode() + b"\n"))
+        await response.write_eof()
+        return response
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/ws', self.handle_ws)
+        app.router.add_get('/stream', self.handle_stream)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    def url(self, path='/ws'):
+        scheme = 'ws' if path == '/ws' else 'http'
+        return f"{scheme}://127.0.0.1:{self.port}{path}"
+
+class MockCoinGecko:
+    """Answers /api/v3/simple/price for any id, every coin at the same price; move() shifts it.
+
+    /coins/list and /coins/markets describe `coins` coins named coin-0, coin-1, ...
+    """
+    def __init__(self, price=100.0, coins=1000):
+        self.price = price
+        self.coins = coins
+        self.requests = 0
+
+    def move(self, percent):
+        self.price *= 1 + percent / 100
+
+    async def handle(self, request):
+        self.requests += 1
+        ids = [coin_id for coin_id in request.query.get('ids', '').split(',') if coin_id]
+        return web.json_response({coin_id: {'usd': self.price} for coin_id in ids})
+
+    async def handle_list(self, request):
+        self.requests += 1
+        return web.json_response([{'id': f"coin-{i}", 'symbol': f"c{i}", 'name': f"Coin {i}"} for i in range(self.coins)])
+
+    async def handle_markets(self, request):
+        self.requests += 1
+        per_page = int(request.query.get('per_page', 100))
+        return web.json_response([{'id': f"coin-{i}", 'current_price': self.price} for i in range(min(per_page, self.coins))])
+
+    def add_routes(self, app):
+        app.router.add_get('/api/v3/simple/price', self.handle)
+        app.router.add_get('/api/v3/coins/list', self.handle_list)
+        app.router.add_get('/api/v3/coins/markets', self.handle_markets)
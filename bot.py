@@ -5,24 +5,83 @@ from dotenv import load_dotenv
 import asyncio
 import json
 import aiohttp
+from utils.dedup import DedupStore, scope_key
+from utils.storage import Storage
+from utils.persistence import WriteBehind, json_snapshot
+from utils.subscriptions import SubscriptionIndex
+from utils.delivery import DeliveryQueue
+from utils.prices import PriceService
+from utils.coins import CoinRegistry
+from utils.alert_index import AlertIndex
+from utils.price_history import PriceHistory
+from utils.metrics import metrics, LoopLagMonitor, MetricsServer
+from utils.sharding import PostQueue, guild_shard
 
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 CID = os.getenv('CHANNEL_ID')
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0))
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS', '').split(',') if shard_id.strip()] or None
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="-", intents=intents, help_command=None) # new bot instance
+if SHARD_COUNT:
+    # shard_ids=None runs every shard in this process; a list runs only those
+    bot = commands.AutoShardedBot(command_prefix="-", intents=intents, help_command=None,
+                                  shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+else:
+    bot = commands.Bot(command_prefix="-", intents=intents, help_command=None) # new bot instance
+bot.SHARD_COUNT = SHARD_COUNT
+bot.SHARD_IDS = SHARD_IDS
 
+bot.DATABASE = "bot.db"
 bot.HISTORY = "history.json"
 bot.ALERTS = "alerts.json"
 bot.CONFIG = "configs.json"
+bot.VALIDATORS = "validators.json"
+bot.CURSORS = "cursors.json"
+bot.HEALTH = "health.json"
+bot.COINS = "coins.json"
+bot.PRICE_HISTORY = "price_history.json"
 
-bot.posted_articles = {}
-bot.active_alerts = []
+bot.active_alerts = AlertIndex()
 bot.bot_config = {}
 bot.MIN_RSS_INTERVAL = 5
 bot.DEFAULT_RSS_INTERVAL = 10
+bot.MAX_RSS_INTERVAL = 360
+bot.HISTORY_RETENTION_HOURS = float(os.getenv('HISTORY_RETENTION_HOURS', 3))
+bot.DEDUP_MAX_ITEMS = int(os.getenv('DEDUP_MAX_ITEMS', 100000))
+# Bits two title fingerprints may differ by and still count as the same story; negative turns it off
+bot.RSS_TITLE_DISTANCE = int(os.getenv('RSS_TITLE_DISTANCE', -1))
+bot.RSS_MAX_CONCURRENCY = int(os.getenv('RSS_MAX_CONCURRENCY', 50))
+bot.RSS_PER_HOST_LIMIT = int(os.getenv('RSS_PER_HOST_LIMIT', 4))
+bot.RSS_FETCH_TIMEOUT = int(os.getenv('RSS_FETCH_TIMEOUT', 20))
+bot.RSS_MAX_FEED_KB = int(os.getenv('RSS_MAX_FEED_KB', 2048))
+bot.RSS_PARSE_WORKERS = int(os.getenv('RSS_PARSE_WORKERS', 0))
+bot.SAVE_WINDOW_SECONDS = float(os.getenv('SAVE_WINDOW_SECONDS', 2))
+bot.DELIVERY_WORKERS = int(os.getenv('DELIVERY_WORKERS', 4))
+bot.PRICE_CACHE_TTL = float(os.getenv('PRICE_CACHE_TTL', 30))
+bot.COIN_LIST_TTL_HOURS = float(os.getenv('COIN_LIST_TTL_HOURS', 24))
+bot.ALERT_DM_CONCURRENCY = int(os.getenv('ALERT_DM_CONCURRENCY', 10))
+bot.PRICE_HISTORY_MINUTES = int(os.getenv('PRICE_HISTORY_MINUTES', 1440))
+bot.PRICE_STREAM_URL = os.getenv('PRICE_STREAM_URL')
+bot.METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+bot.METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+# 'all' does everything in one process; 'poller' and 'gateway' split feed polling from Discord delivery
+bot.ROLE = os.getenv('BOT_ROLE', 'all')
+bot.POLLER_INDEX = int(os.getenv('POLLER_INDEX', 0))
+bot.POLLER_COUNT = int(os.getenv('POLLER_COUNT', 1))
+bot.QUEUE_DATABASE = os.getenv('QUEUE_DATABASE', 'queue.db')
+bot.QUEUE_CONSUMER = "gateway-" + "-".join(map(str, SHARD_IDS)) if SHARD_IDS else "gateway"
+
+def poller_file(name, index):
+    return f"{name}-{index}.json"
+
+if bot.ROLE == 'poller':
+    # Each poller keeps the fetch state of its own slice of feeds
+    bot.VALIDATORS = poller_file('validators', bot.POLLER_INDEX)
+    bot.CURSORS = poller_file('cursors', bot.POLLER_INDEX)
+    bot.HEALTH = poller_file('health', bot.POLLER_INDEX)
 
 bot.CHANNEL_ID = int(CID)
 
@@ -39,13 +98,142 @@ def save_data(file_path, data):
     with open(file_path, 'w') as f:
         json.dump(data, f, indent=4)
 
-bot.posted_articles = load_data(bot.HISTORY)
-bot.active_alerts = load_data(bot.ALERTS)
-bot.bot_config = load_data(bot.CONFIG)
+def poller_health():
+    """Merges the feed health files written by each poller process."""
+    states = {}
+    for index in range(bot.POLLER_COUNT):
+        states.update(load_data(poller_file('health', index)))
+    return states
+
+def poller_validators():
+    """Merges the feed validator files written by each poller process."""
+    validators = {}
+    for index in range(bot.POLLER_COUNT):
+        validators.update(load_data(poller_file('validators', index)))
+    return validators
+
+def owns_guild(guild_id):
+    """Whether a guild is served by one of this process's shards (always true when not sharded)."""
+    if not bot.SHARD_COUNT or not bot.SHARD_IDS:
+        return True
+    return guild_shard(guild_id, bot.SHARD_COUNT) in bot.SHARD_IDS
+
+bot.poller_health = poller_health
+bot.poller_validators = poller_validators
+bot.owns_guild = owns_guild
+
+def storage_job(statements):
+    return lambda: bot.storage.execute(statements)
+
+def snapshot_guilds(guild_ids):
+    statements = []
+    for guild_id in guild_ids:
+        statements += bot.storage.guild_statements(guild_id, bot.bot_config.get(guild_id))
+    return storage_job(statements + bot.storage.version_statements())
+
+def snapshot_alerts(alert_ids):
+    upserted = [bot.active_alerts.get(alert_id) for alert_id in alert_ids if alert_id in bot.active_alerts.by_id]
+    deleted = [alert_id for alert_id in alert_ids if alert_id not in bot.active_alerts.by_id]
+    return storage_job(bot.storage.alert_statements(upserted, deleted))
+
+def snapshot_history(keys):
+    records, titles = bot.dedup.take_pending(), bot.dedup.take_pending_titles()
+    job = storage_job(bot.storage.history_statements(records, bot.dedup.oldest_bucket(), titles))
+    # The records have left the dedup store; hand them back if the write fails so the retry has them
+    job.restore = lambda: bot.dedup.restore_pending(records, titles)
+    return job
+
+def save_configs(guild_id=None):
+    """Marks one guild's config, or the global settings when no guild is given, for saving."""
+    if guild_id is None:
+        bot.persistence.mark('settings')
+    else:
+        bot.persistence.mark('guilds', str(guild_id))
+
+def save_alerts(added=(), removed=()):
+    for alert in [*added, *removed]:
+        bot.persistence.mark('alerts', alert['id'])
+
+bot.save_configs = save_configs
+bot.save_alerts = save_alerts
+bot.save_history = lambda: bot.persistence.mark('history')
+bot.save_validators = lambda: bot.persistence.mark('validators')
+bot.save_cursors = lambda: bot.persistence.mark('cursors')
+bot.save_health = lambda: bot.persistence.mark('health')
+bot.save_price_history = lambda: bot.persistence.mark('price_history')
+
+def collect_service_metrics(metrics):
+    delivery = bot.delivery.stats
+    metrics.set('delivery_queue_depth', bot.delivery.depth())
+    metrics.set_total('discord_messages_total', delivery['messages'])
+    metrics.set_total('discord_embeds_total', delivery['embeds'])
+    metrics.set_total('discord_rate_limited_total', delivery['rate_limited'])
+    metrics.set_total('discord_send_failures_total', delivery['failed'])
+    for key in ('hits', 'misses', 'coalesced', 'requests', 'errors'):
+        metrics.set_total(f'price_lookups_{key}_total', bot.prices.stats[key])
+    metrics.set('coin_registry_coins', len(bot.coins))
+    metrics.set_total('coin_registry_refreshes_total', bot.coins.stats['refreshes'])
+    metrics.set_total('coin_registry_errors_total', bot.coins.stats['errors'])
+    for name, stats in bot.persistence.stats.items():
+        metrics.set_total('persistence_saves_total', stats['marks'], store=name)
+        metrics.set_total('persistence_writes_total', stats['writes'], store=name)
+        metrics.set_total('persistence_bytes_total', stats['bytes'], store=name)
+    metrics.set('guilds', len(bot.guilds))
+
+def setup():
+    """Opens the database, loads every store and creates the shared services.
 
-bot.save_configs = lambda: save_data(bot.CONFIG, bot.bot_config)
-bot.save_alerts = lambda: save_data(bot.ALERTS, bot.active_alerts)
-bot.save_history = lambda: save_data(bot.HISTORY, bot.posted_articles)
+    Kept out of module level because parser worker processes re-import this file (as
+    __mp_main__) and must not open the database or start any of this again.
+    """
+    bot.storage = Storage(bot.DATABASE)
+    bot.dedup = DedupStore(retention_hours=bot.HISTORY_RETENTION_HOURS, max_items=bot.DEDUP_MAX_ITEMS,
+                           title_distance=bot.RSS_TITLE_DISTANCE)
+    if not bot.storage.is_migrated():
+        # One-shot import of the JSON files used before the SQLite store
+        legacy_config = load_data(bot.CONFIG)
+        legacy_subscriptions = SubscriptionIndex()
+        legacy_subscriptions.build(legacy_config)
+        # The old history was global, so its links are remembered for every subscribed channel
+        scopes = {scope_key(sub.guild_id, sub.channel_id)
+                  for subs in legacy_subscriptions.by_url.values() for sub in subs}
+        bot.dedup.migrate(load_data(bot.HISTORY), scopes)
+        bot.storage.migrate(legacy_config, load_data(bot.ALERTS) or [], bot.dedup.take_pending())
+
+    bot.bot_config = bot.storage.load_config()
+    bot.subscriptions = SubscriptionIndex()
+    bot.subscriptions.build(bot.bot_config)
+    bot.active_alerts = AlertIndex(bot.storage.load_alerts())
+    bot.price_history = PriceHistory(bot.PRICE_HISTORY_MINUTES)
+    bot.price_history.restore(load_data(bot.PRICE_HISTORY))
+    bot.dedup.load(bot.storage.load_history(), bot.storage.load_title_fingerprints())
+    bot.feed_validators = load_data(bot.VALIDATORS)
+    bot.feed_cursors = load_data(bot.CURSORS)
+    bot.feed_health = load_data(bot.HEALTH)
+    bot.post_queue = PostQueue(bot.QUEUE_DATABASE, bot.HISTORY_RETENTION_HOURS) if bot.ROLE != 'all' else None
+
+    # Saves only mark what changed; the write-behind task coalesces them and writes off the event loop
+    bot.persistence = WriteBehind(window=bot.SAVE_WINDOW_SECONDS)
+    bot.persistence.register('settings', lambda keys: storage_job(
+        bot.storage.settings_statements(bot.bot_config) + bot.storage.version_statements()))
+    bot.persistence.register('guilds', snapshot_guilds)
+    bot.persistence.register('alerts', snapshot_alerts)
+    bot.persistence.register('history', snapshot_history)
+    bot.persistence.register('validators', lambda keys: json_snapshot(bot.VALIDATORS, bot.feed_validators))
+    bot.persistence.register('cursors', lambda keys: json_snapshot(bot.CURSORS, bot.feed_cursors))
+    bot.persistence.register('health', lambda keys: json_snapshot(bot.HEALTH, bot.feed_health))
+    bot.persistence.register('price_history', lambda keys: json_snapshot(bot.PRICE_HISTORY, bot.price_history.snapshot()))
+
+    # Outbound RSS posts are queued per channel and sent by a small worker pool
+    bot.delivery = DeliveryQueue(workers=bot.DELIVERY_WORKERS)
+    # One CoinGecko client shared by the price and alert commands
+    bot.prices = PriceService(ttl=bot.PRICE_CACHE_TTL)
+    # Coin ids, symbols and names, so commands can check a coin without asking CoinGecko
+    bot.coins = CoinRegistry(bot.COINS, ttl_hours=bot.COIN_LIST_TTL_HOURS)
+
+    bot.metrics = metrics
+    bot.metrics.add_collector('services', collect_service_metrics)
+    bot.lag_monitor = LoopLagMonitor(bot.metrics)
 
 async def log_action(bot, guild, message, author):
     """Sends a log message to the configured audit channel."""
@@ -75,6 +263,9 @@ async def on_ready():
 async def load_cogs():
     for filename in os.listdir('./cogs'):
         if filename.endswith('.py'):
+            # Alerts are DMs rather than guild messages, so only the process running shard 0 sends them
+            if filename == 'alerts.py' and bot.SHARD_IDS and 0 not in bot.SHARD_IDS:
+                continue
             await bot.load_extension(f'cogs.{filename[:-3]}')
 
 @bot.event
@@ -97,7 +288,8 @@ async def guild_join(guild):
             if str(guild.id) not in bot.bot_config:
                 bot.bot_config[str(guild.id)] = {}
             bot.bot_config[str(guild.id)]["channel_id"] = channel.id
-            bot.save_configs()
+            bot.subscriptions.update_guild(guild.id, bot.bot_config[str(guild.id)])
+            bot.save_configs(guild.id)
 
             await inviter.send(f"Great! I will now post RSS updates in {channel.mention}.")
         except asyncio.TimeoutError:
@@ -110,12 +302,44 @@ async def prefix_ping(prefix):
     await prefix.send("Pong!")
 
 async def main():
+    setup()
     async with bot:
-        await load_cogs()
-        await bot.start(TOKEN)
+        bot.persistence.start()
+        bot.delivery.start()
+        await bot.prices.start()
+        bot.lag_monitor.start()
+        # The metrics endpoint is opt-in: set METRICS_PORT to expose it
+        metrics_server = MetricsServer(bot.metrics, bot.METRICS_HOST, bot.METRICS_PORT) if bot.METRICS_PORT else None
+        if metrics_server:
+            await metrics_server.start()
+        try:
+            if bot.ROLE == 'poller':
+                # Pollers never connect to Discord: they poll their slice of feeds and queue the posts
+                await bot.load_extension('cogs.rss')
+                # Polling is all a poller does: if the loop ever ends, exit so the supervisor restarts it
+                await bot.get_cog('RSS').fetch_rss.get_task()
+                raise SystemExit("RSS poll loop stopped")
+            else:
+                bot.coins.start()
+                await load_cogs()
+                await bot.start(TOKEN)
+        finally:
+            # Unload the cogs first, so the saves they make on the way out are part of the final flush
+            await bot.close()
+            if metrics_server:
+                await metrics_server.close()
+            await bot.lag_monitor.close()
+            await bot.delivery.close()
+            await bot.prices.close()
+            await bot.coins.close()
+            # Write anything still pending before exiting
+            await bot.persistence.close()
+            bot.storage.close()
+            if bot.post_queue:
+                bot.post_queue.close()
 
 if __name__ == "__main__":
-    if TOKEN == None:
+    if TOKEN == None and bot.ROLE != 'poller':
         print("Token ERROR")
     elif bot.CHANNEL_ID == None:
          print("Channel id error")
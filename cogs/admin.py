@@ -22,7 +22,7 @@ class Admin(commands.Cog):
             return
 
         admin_roles.append(role.id)
-        self.bot.save_configs()
+        self.bot.save_configs(prefix.guild.id)
         await prefix.send(f"✅ The role {role.mention} can now manage RSS feeds.")
         await self.bot.log_action(self.bot, prefix.guild, f"Role {role.mention} was given RSS admin permissions.", prefix.author)
 
@@ -41,7 +41,7 @@ class Admin(commands.Cog):
             return
 
         admin_roles.remove(role.id)
-        self.bot.save_configs()
+        self.bot.save_configs(prefix.guild.id)
         await prefix.send(f"✅ The role {role.mention} can no longer manage RSS feeds.")
         await self.bot.log_action(self.bot, prefix.guild, f"Role {role.mention} was removed from RSS admin permissions.", prefix.author)
 
@@ -79,7 +79,7 @@ class Admin(commands.Cog):
         channel_configs = guild_config.setdefault('channel_configs', {})
         channel_settings = channel_configs.setdefault(str(channel.id), {})
         channel_settings['limit'] = limit
-        self.bot.save_configs()
+        self.bot.save_configs(prefix.guild.id)
         await prefix.send(f"✅ The RSS feed limit for {channel.mention} is now **{limit}**.")
         await self.bot.log_action(self.bot, prefix.guild, f"RSS feed limit for {channel.mention} was set to **{limit}**.", prefix.author)
 
@@ -90,7 +90,7 @@ class Admin(commands.Cog):
         channel_configs = guild_config.setdefault('channel_configs', {})
         channel_settings = channel_configs.setdefault(str(channel.id), {})
         channel_settings['allow_multiple'] = value
-        self.bot.save_configs()
+        self.bot.save_configs(prefix.guild.id)
         status = "now allows" if value else "no longer allows"
         await prefix.send(f"✅ {channel.mention} {status} multiple RSS feeds.")
         await self.bot.log_action(self.bot, prefix.guild, f"Channel {channel.mention} {status} multiple RSS feeds.", prefix.author)
@@ -105,7 +105,7 @@ class Admin(commands.Cog):
     async def set_log_channel(self, prefix, channel: discord.TextChannel):
         guild_config = self.bot.bot_config.setdefault(str(prefix.guild.id), {})
         guild_config['log_channel'] = channel.id
-        self.bot.save_configs()
+        self.bot.save_configs(prefix.guild.id)
         await prefix.send(f"✅ Bot actions will now be logged in {channel.mention}.")
         await self.bot.log_action(self.bot, prefix.guild, f"Audit log channel was set to {channel.mention}.", prefix.author)
 
@@ -115,11 +115,51 @@ class Admin(commands.Cog):
         guild_config = self.bot.bot_config.setdefault(str(prefix.guild.id), {})
         if 'log_channel' in guild_config:
             del guild_config['log_channel']
-            self.bot.save_configs()
+            self.bot.save_configs(prefix.guild.id)
             await prefix.send("✅ Audit log disabled.")
             await self.bot.log_action(self.bot, prefix.guild, "Audit log was disabled.", prefix.author)
         else:
             await prefix.send("⚠️ Audit log is not currently enabled.")
 
+    @commands.command(name="stats", help="Shows the bot's performance counters (bot owner only).", hidden=True)
+    @commands.is_owner()
+    async def stats(self, prefix):
+        metrics = self.bot.metrics
+        metrics.collect()
+
+        def timing(name):
+            count, average, p95 = metrics.histogram_summary(name)
+            if not count:
+                return "no data"
+            return f"{count:,} × avg {average * 1000:,.1f} ms, p95 ≤ {p95 * 1000:,.0f} ms"
+
+        embed = discord.Embed(title="Bot Stats", color=discord.Color.blue())
+        embed.add_field(name="RSS", inline=False, value=(
+            f"Cycles: {timing('rss_cycle_seconds')}\n"
+            f"Fetches: {timing('rss_fetch_seconds')}, {metrics.total('rss_fetch_responses_total', code=0):,} network errors\n"
+            f"Downloaded: {metrics.total('rss_fetch_bytes_total') / 1024 / 1024:,.1f} MB, "
+            f"skipped {metrics.total('rss_fetcher_not_modified_total') + metrics.total('rss_fetcher_unchanged_total'):,} unchanged feeds\n"
+            f"Parsing: {timing('rss_parse_seconds')}\n"
+            f"Entries: {metrics.total('rss_entries_new_total'):,} new, "
+            f"{metrics.total('rss_entries_total', outcome='posted'):,} posted, "
+            f"{metrics.total('rss_entries_total', outcome='filtered'):,} filtered, "
+            f"{metrics.total('rss_entries_total', outcome='duplicate'):,} duplicates"
+        ))
+        embed.add_field(name="Discord", inline=False, value=(
+            f"Sends: {timing('discord_send_seconds')}\n"
+            f"{metrics.total('discord_messages_total'):,} messages, {metrics.total('discord_embeds_total'):,} embeds, "
+            f"{metrics.total('discord_rate_limited_total'):,} rate limited (429), "
+            f"{metrics.total('discord_send_failures_total'):,} failed, queue depth {metrics.total('delivery_queue_depth'):,}"
+        ))
+        embed.add_field(name="Alerts", inline=False, value=(
+            f"Ticks: {timing('alert_tick_seconds')}\n"
+            f"{metrics.total('alerts_active'):,} active, {metrics.total('alerts_triggered_total'):,} triggered, "
+            f"{metrics.total('alert_dms_total'):,} DMs sent, {metrics.total('alert_dm_failures_total'):,} failed\n"
+            f"Prices: {self.bot.prices.summary()}"
+        ))
+        embed.add_field(name="Saves", inline=False, value=f"Writes: {timing('persistence_write_seconds')}")
+        embed.add_field(name="Event loop lag", inline=False, value=timing('event_loop_lag_seconds'))
+        await prefix.send(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(Admin(bot))
@@ -1,142 +1,190 @@
-import discord 
-from discord.ext import tasks, commands
+import asyncio
+import time
+from discord.ext import commands
 import aiohttp
+from utils.notifier import AlertNotifier
+from utils.price_sources import PollingSource, StreamSource
+from utils.metrics import metrics
+from utils.alert_index import MOVE, AVERAGE, describe_condition
+
+# How often the price history is written to disk for a warm restart
+HISTORY_SNAPSHOT_SECONDS = 10 * 60
 
 class Alerts(commands.Cog):
     def __init__(self,bot):
         self.bot = bot
-        self.check_prices.start()
-
-    def cog_unload(self):
-        self.check_prices.cancel()
-
-    @tasks.loop(seconds=60)
-    async def check_prices(self):
+        self.notifier = AlertNotifier(bot, concurrency=bot.ALERT_DM_CONCURRENCY)
+        if bot.PRICE_STREAM_URL:
+            self.source = StreamSource(bot.PRICE_STREAM_URL)
+        else:
+            self.source = PollingSource(bot.prices, bot.active_alerts.coins, interval=60)
+        self.starter = None
+        self.history_saved = time.monotonic()
+        metrics.add_collector('alerts', self.collect_metrics)
+
+    async def cog_load(self):
+        self.starter = asyncio.create_task(self.start_source())
+
+    async def cog_unload(self):
+        if self.starter:
+            self.starter.cancel()
+        await self.source.close()
+        await self.notifier.close()
+        # Snapshots are otherwise only taken every HISTORY_SNAPSHOT_SECONDS
+        self.bot.price_history.retain(self.bot.active_alerts.coins())
+        self.bot.save_price_history()
+
+    def collect_metrics(self, metrics):
+        metrics.set('alerts_active', len(self.bot.active_alerts))
+        metrics.set('alerts_in_flight', len(self.notifier.in_flight))
+        metrics.set_total('alert_dms_total', self.notifier.stats['messages'])
+        metrics.set_total('alert_dm_failures_total', self.notifier.stats['failed'])
+        metrics.set_total('alert_dms_skipped_total', self.notifier.stats['skipped'])
+        metrics.set_total('price_ticks_total', self.source.stats['ticks'])
+        metrics.set_total('price_source_errors_total', self.source.stats['errors'])
+
+    async def start_source(self):
         await self.bot.wait_until_ready()
-        if not self.bot.active_alerts:
-            return
-
-        crypto_ids = {alert['crypto'] for alert in self.bot.active_alerts}
-        if not crypto_ids:
-            return
-
-        id_str = ",".join(crypto_ids)
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={id_str}&vs_currencies=usd"
-
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    response.raise_for_status()  # Raise an exception for bad status codes
-                    prices = await response.json()
-                    print(f"Fetched prices: {prices}")
-
-        except aiohttp.ClientError as e:
-            print(f"Error fetching prices: {e}")
-            return
-
-        triggered_alerts = []
-        for alert in self.bot.active_alerts:
-            crypto = alert['crypto']
-            if crypto not in prices or 'usd' not in prices[crypto]:
-                continue
-
-            curr_price = prices[crypto]['usd']
-            condition = alert['condition']
-            target_price = alert['price']
-
-            if (condition == '>' and curr_price > target_price) or \
-               (condition == '<' and curr_price < target_price):
-                
-                print(f"ALERT TRIGGERED: User {alert['user_id']} for {crypto} {condition} {target_price}")
-                try:
-                    user = await self.bot.fetch_user(alert['user_id'])
-                    message = (
-                        f"🔔 **Price Alert!** 🔔\n\n"
-                        f"Your alert for **{crypto.capitalize()}** was triggered.\n"
-                        f"Target: {condition} ${target_price:,.2f}\n"
-                        f"Current Price: ${curr_price:,.2f}"
-                    )
-                    await user.send(message)
-                    triggered_alerts.append(alert)
-                except discord.NotFound:
-                    print(f"User {alert['user_id']} not found.")
-                except discord.Forbidden:
-                    print(f"Cannot send DM to user {alert['user_id']}.")
-
-        if triggered_alerts:
-            self.bot.active_alerts[:] = [alert for alert in self.bot.active_alerts if alert not in triggered_alerts]
-            self.bot.save_alerts()
+        print(f"Price alerts: {self.source.describe()}")
+        self.source.start(self.check_price)
+
+    def check_price(self, crypto, curr_price):
+        """Called for every price tick; only the alerts for that coin are looked at."""
+        start = time.perf_counter()
+        alerts = self.bot.active_alerts
+        if alerts.watches(crypto):
+            # Kept only for coins with alerts, so its memory stays bounded on a busy stream
+            self.bot.price_history.record(crypto, curr_price)
+        triggered = []
+        # Only the alerts this price crosses are touched; they come out of the index together
+        fired = alerts.pop_triggered(crypto, curr_price) + alerts.pop_window_triggered(crypto, self.bot.price_history)
+        for alert in fired:
+            print(f"ALERT TRIGGERED: User {alert['user_id']} for {crypto} {describe_condition(alert)}")
+            triggered.append((alert, curr_price))
+
+        if time.monotonic() - self.history_saved > HISTORY_SNAPSHOT_SECONDS:
+            self.bot.price_history.retain(alerts.coins())
+            self.bot.save_price_history()
+            self.history_saved = time.monotonic()
+
+        if triggered:
+            # DMs go out in the background so a big move doesn't hold up the next tick
+            self.notifier.submit(triggered)
+            print(f"Alert notifications: {self.notifier.summary()}")
+            metrics.inc('alerts_triggered_total', len(triggered))
+        metrics.observe('alert_tick_seconds', time.perf_counter() - start,
+                        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1))
 
     @commands.group(invoke_without_command=True, help="Manages price alerts for cryptocurrencies.")
     async def alert(self,prefix):
         await prefix.send("Alert command. Use `-alert add <crypto> <condition> <price>`")
 
+    async def resolve_coin(self, prefix, crypto):
+        """Returns the coin id for what the user typed, or None after telling them it wasn't found."""
+        crypto_id = self.bot.coins.resolve(crypto)
+        if crypto_id is None and self.bot.coins:
+            # Fuzzy matching scans every listed coin, so it stays off the event loop
+            hint = await asyncio.to_thread(self.bot.coins.did_you_mean, crypto)
+            await prefix.send(f"❌ **Error:** Could not find a cryptocurrency named `{crypto}`.{hint}")
+            return None
+        if crypto_id is None:
+            # The coin list hasn't been downloaded yet, so ask CoinGecko directly
+            crypto_id = crypto.lower()
+            try:
+                if await self.bot.prices.get_price(crypto_id) is None:
+                    await prefix.send(f"❌ **Error:** Could not find a cryptocurrency named `{crypto}`.")
+                    return None
+            except aiohttp.ClientError as e:
+                print(f"Crypto Validation Error: {e}")
+                await prefix.send("⚠️ Could not fetch cryptocurrency data. Please try again later.")
+                return None
+        return crypto_id
+
+    async def create_alert(self, prefix, crypto_id, condition, price, minutes=None):
+        new_alert={
+            'id' : self.bot.storage.new_alert_id(),
+            'user_id' : prefix.author.id,
+            'crypto' : crypto_id,
+            'condition' : condition,
+            'price' : price,
+            'minutes' : minutes
+        }
+        self.bot.active_alerts.add(new_alert)
+        self.bot.save_alerts(added=[new_alert])
+        await prefix.send(f"✅ Alert set: I will notify you when **{self.bot.coins.name(crypto_id)}** "
+                          f"{'is ' if condition in ('<', '>') else ''}**{describe_condition(new_alert)}**.")
+
+    async def check_window(self, prefix, minutes):
+        if not 1 <= minutes <= self.bot.PRICE_HISTORY_MINUTES:
+            await prefix.send(f"Invalid window. Please use between 1 and {self.bot.PRICE_HISTORY_MINUTES} minutes.")
+            return False
+        return True
+
     @alert.command (name="add", help="Adds a new price alert. Usage: `-alert add <crypto> <condition> <price>`")
     async def add_alert(self,prefix, crypto: str, condition: str, price: float):
-        crypto_id = crypto.lower()
-        valid_url = f"https://api.coingecko.com/api/v3/coins/{crypto_id}"
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(valid_url) as response:
-                    if response.status == 404:
-                        await prefix.send(f"❌ **Error:** Could not find a cryptocurrency named `{crypto}`.")
-                        return
-                    response.raise_for_status()
-        except aiohttp.ClientError as e:
-            print(f"Crypto Validation Error: {e}")
-            await prefix.send("⚠️ Could not fetch cryptocurrency data. Please try again later.")
+        crypto_id = await self.resolve_coin(prefix, crypto)
+        if crypto_id is None:
             return
 
         if condition not in ['>', '<']:
             await prefix.send("Invalid condition. Please use `<` or `>`.")
             return
-        
-        new_alert={
-            'user_id' : prefix.author.id,
-            'crypto' : crypto.lower(),
-            'condition' : condition,
-            'price' : price
-        }
-        self.bot.active_alerts.append(new_alert)
-        self.bot.save_alerts()
-        await prefix.send(f"✅ Alert set: I will notify you when **{crypto}** is **{condition} ${price:,.2f}**.")
-    
+        await self.create_alert(prefix, crypto_id, condition, price)
+
+    @alert.command(name="move", help="Alerts you when a coin rises or falls by a percentage within a time window. Usage: `-alert move <crypto> <percent> <minutes>`")
+    async def add_move_alert(self, prefix, crypto: str, percent: float, minutes: int):
+        if percent <= 0:
+            await prefix.send("Invalid percentage. Please use a number above 0.")
+            return
+        if not await self.check_window(prefix, minutes):
+            return
+        crypto_id = await self.resolve_coin(prefix, crypto)
+        if crypto_id is None:
+            return
+        await self.create_alert(prefix, crypto_id, MOVE, percent, minutes)
+
+    @alert.command(name="average", aliases=["ma"], help="Alerts you when a coin's price crosses its moving average. Usage: `-alert average <crypto> <minutes>`")
+    async def add_average_alert(self, prefix, crypto: str, minutes: int):
+        if not await self.check_window(prefix, minutes):
+            return
+        crypto_id = await self.resolve_coin(prefix, crypto)
+        if crypto_id is None:
+            return
+        await self.create_alert(prefix, crypto_id, AVERAGE, 0.0, minutes)
+
     @alert.command(name="list", help="Lists your active price alerts.")
     async def list_alerts(self,prefix):
-        user_alerts = []
-        for i, alert in enumerate(self.bot.active_alerts):
-            if alert['user_id'] == prefix.author.id:
-                user_alerts.append((i,alert))
+        user_alerts = self.bot.active_alerts.for_user(prefix.author.id)
 
         if not user_alerts:
             await prefix.send("You have no active alerts. Set one with `-alert add <crypto> <condition> <price>`.")
             return
 
         message = "Your active alerts:\n```\n"
-        for alert_id, alert in user_alerts:
-            crypto = alert['crypto'].capitalize()
-            condition = alert['condition']
-            price = f"${alert['price']:,.2f}"
-            message += f"ID: {alert_id} | {crypto} {condition} {price}\n"
+        for alert in user_alerts:
+            crypto = self.bot.coins.name(alert['crypto'])
+            message += f"ID: {alert['id']} | {crypto} {describe_condition(alert)}\n"
         message += "```\nUse the ID to remove an alert."
         await prefix.send(message)
 
     @alert.command(name="remove", help="Removes a price alert by its ID. Usage: `-alert remove <ID>`")
     async def remove_alert(self,prefix, alert_id: int):
-        if not(0 <= alert_id < len(self.bot.active_alerts)):
+        alert = self.bot.active_alerts.get(alert_id)
+        if alert is None and alert_id in self.notifier.in_flight:
+            await prefix.send(f"Alert {alert_id} has just triggered and is being sent to its owner.")
+            return
+        if alert is None:
             await prefix.send(f"Error: Invalid ID. There is no alert with ID {alert_id}. Use `-alert list` to see valid IDs")
             return 
         
-        if self.bot.active_alerts[alert_id]['user_id'] != prefix.author.id:
+        if alert['user_id'] != prefix.author.id:
             await prefix.send("Error: You can only remove your own alerts.")
             return
             
-        removed = self.bot.active_alerts.pop(alert_id)
-        self.bot.save_alerts()
-        crypto = removed['crypto'].capitalize()
-        condition = removed['condition']
-        price = f"${removed['price']:,.2f}"
-        await prefix.send(f"✅ Alert removed: Your alert for **{crypto} {condition} {price}** has been deleted")
+        removed = self.bot.active_alerts.remove(alert_id)
+        self.bot.save_alerts(removed=[removed])
+        crypto = self.bot.coins.name(removed['crypto'])
+        await prefix.send(f"✅ Alert removed: Your alert for **{crypto} {describe_condition(removed)}** has been deleted")
 
 async def setup(bot):
     await bot.add_cog(Alerts(bot))
\ No newline at end of file
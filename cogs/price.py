@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord.ext import commands
 import aiohttp
@@ -9,30 +10,29 @@ class Price(commands.Cog):
 
     @commands.command(name="price", help="Get the current price of a cryptocurrency. Usage: `-price <crypto>`")
     async def price(self, prefix, crypto: str):
-        crypto_id = crypto.lower()
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={crypto_id}&vs_currencies=usd&include_market_cap=true&include_24hr_vol=true&include_24hr_change=true"
-        
+        crypto_id = self.bot.coins.resolve(crypto)
+        # Unknown to the coin list, so there's no point asking CoinGecko
+        if crypto_id is None and self.bot.coins:
+            # Fuzzy matching scans every listed coin, so it stays off the event loop
+            hint = await asyncio.to_thread(self.bot.coins.did_you_mean, crypto)
+            await prefix.send(f"❌ **Error:** Could not find price data for `{crypto}`.{hint}")
+            return
+        crypto_id = crypto_id or crypto.lower()
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 404:
-                        await prefix.send(f"❌ **Error:** Could not find a cryptocurrency named `{crypto}`.")
-                        return
-                    response.raise_for_status()
-                    data = await response.json()
-
-            if crypto_id not in data:
+            price_data = await self.bot.prices.get_price(crypto_id, detailed=True)
+
+            if price_data is None:
                 await prefix.send(f"❌ **Error:** Could not find price data for `{crypto}`.")
                 return
 
-            price_data = data[crypto_id]
             current_price = price_data.get('usd', 0)
             market_cap = price_data.get('usd_market_cap', 0)
             volume = price_data.get('usd_24h_vol', 0)
             change = price_data.get('usd_24h_change', 0)
 
             embed = discord.Embed(
-                title=f"Price Information for {crypto.capitalize()}",
+                title=f"Price Information for {self.bot.coins.name(crypto_id)}",
                 color=discord.Color.blue()
             )
             embed.add_field(name="Current Price", value=f"${current_price:,.2f}", inline=True)
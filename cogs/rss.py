@@ -1,7 +1,15 @@
 import discord
 from discord.ext import tasks, commands
-import feedparser
-import time
+from utils.fetcher import FeedFetcher
+from utils.parsing import FeedParser
+from utils.cursors import FeedCursors, MAX_NEW_ENTRIES
+from utils.scheduler import FeedScheduler, hinted_interval
+from utils.metrics import metrics
+from utils.health import FeedHealth, OK, SUSPENDED, PROBE_INTERVAL
+from utils.sharding import feed_partition
+from utils.render import ArticleRenderer
+from utils.dedup import scope_key, canonical_url
+from utils.opml import parse_opml, build_opml, MAX_OPML_BYTES
 
 # Custom check for RSS admin permissions
 def is_rss_admin():
@@ -14,98 +22,341 @@ def is_rss_admin():
     return commands.check(predicate)
 
 import asyncio
+import io
+import time
+
+PROGRAM_MAX_FEEDS = 30
+# Feeds checked at once when adding or importing, and how long each check may take
+VALIDATION_CONCURRENCY = 8
+VALIDATION_TIMEOUT = 15
+# Most outlines of one OPML file that are checked; more than a server can hold anyway
+IMPORT_MAX_FEEDS = 100
 
 class RSS(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         saved_interval = self.bot.bot_config.get('rss_interval_minutes', self.bot.DEFAULT_RSS_INTERVAL)
-        self.fetch_rss.change_interval(minutes=saved_interval)
-        self.fetch_rss.start()
+        self.scheduler = FeedScheduler(
+            default_interval=saved_interval,
+            min_interval=self.bot.MIN_RSS_INTERVAL,
+            max_interval=self.bot.MAX_RSS_INTERVAL
+        )
+        self.fetcher = FeedFetcher(
+            max_concurrency=self.bot.RSS_MAX_CONCURRENCY,
+            per_host_limit=self.bot.RSS_PER_HOST_LIMIT,
+            timeout=self.bot.RSS_FETCH_TIMEOUT,
+            validators=self.bot.feed_validators,
+            max_bytes=self.bot.RSS_MAX_FEED_KB * 1024
+        )
+        self.parser = FeedParser(workers=self.bot.RSS_PARSE_WORKERS)
+        self.cursors = FeedCursors(self.bot.feed_cursors)
+        self.health = FeedHealth(self.bot.feed_health)
+        self.renderer = ArticleRenderer()
+        self.validations = asyncio.Semaphore(VALIDATION_CONCURRENCY)
+        self._tasks = set()   # status notices still being posted
+        self.synced_version = None
+        self.config_version = None
+        # Only set when polling and delivery run in separate processes
+        self.queue = self.bot.post_queue
+        metrics.add_collector('rss', self.collect_metrics)
+        if self.bot.ROLE == 'gateway':
+            self.consume_queue.start()
+        else:
+            self.fetch_rss.start()
+
+    async def cog_load(self):
+        await self.fetcher.start()
 
-    def cog_unload(self):
+    async def cog_unload(self):
         self.fetch_rss.cancel()
+        self.consume_queue.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.fetcher.close()
+        self.parser.close()
 
     async def fetch_feed(self, url):
-        """Fetches and parses a single RSS feed."""
+        """Fetches and parses a single RSS feed. Returns None if it failed or has not changed."""
+        result = await self.fetcher.fetch(url)
+        if result.status == 'error':
+            self.feed_failed(url, result.error, result.seconds)
+            return None
+        if result.status != 'ok':
+            self.feed_succeeded(url, result.seconds)
+            return None
         try:
-            return await self.bot.loop.run_in_executor(None, lambda: feedparser.parse(url))
+            # Only the downloaded bytes go to the parser; the network wait stays on the event loop
+            cursor = self.cursors.cursors.get(url)
+            feed = await self.parser.parse(result.body, max_items=MAX_NEW_ENTRIES + 1,
+                                           stop_key=cursor['id'] if cursor else None, truncated=result.truncated)
         except Exception as e:
-            print(f"Error fetching feed {url}: {e}")
+            print(f"Error parsing feed {url}: {e}")
+            self.feed_failed(url, f"could not be parsed: {e}", result.seconds)
             return None
+        self.feed_succeeded(url, result.seconds)
+        return feed
+
+    async def check_feed(self, url):
+        """Downloads and parses a feed once. Returns (error or None, item count)."""
+        result = await self.fetcher.probe(url)
+        if result.status == 'error':
+            return result.error, 0
+        try:
+            feed = await self.parser.parse(result.body, truncated=result.truncated)
+        except Exception as e:
+            return f"could not be parsed: {e}", 0
+        if not feed['entries'] and not feed['title']:
+            return "not an RSS or Atom feed", 0
+        return None, len(feed['entries'])
+
+    async def validate_feed(self, url):
+        """check_feed() with bounded parallelism and a time limit. Returns (error or None, item count, seconds)."""
+        async with self.validations:
+            start = time.perf_counter()
+            try:
+                error, items = await asyncio.wait_for(self.check_feed(url), VALIDATION_TIMEOUT)
+            except asyncio.TimeoutError:
+                error, items = f"timed out after {VALIDATION_TIMEOUT} s", 0
+            return error, items, time.perf_counter() - start
+
+    def limit_error(self, guild_config, feeds, channel):
+        """Why one more feed for `channel` would break the server or channel limits, or None if it fits."""
+        guild_limit = guild_config.get('rss_feed_limit', PROGRAM_MAX_FEEDS)
+        if len(feeds) >= guild_limit:
+            return f"This server has reached its limit of {guild_limit} RSS feeds."
 
-    async def perform_rss_check(self):
-        await self.bot.wait_until_ready()
-
-        # 1. Gather all unique feed URLs
-        unique_urls = set()
-        for guild_id, guild_config in self.bot.bot_config.items():
-            for feed_obj in guild_config.get('rss_feeds', []):
-                unique_urls.add(feed_obj['url'])
+        channel_settings = guild_config.get('channel_configs', {}).get(str(channel.id), {})
+        channel_feed_count = sum(1 for feed in feeds if feed.get('channel_id') == channel.id)
+        if not channel_settings.get('allow_multiple', True) and channel_feed_count > 0:
+            return f"{channel.mention} is configured to not allow more than one RSS feed."
+        channel_limit = channel_settings.get('limit')
+        if channel_limit is not None and channel_feed_count >= channel_limit:
+            return f"{channel.mention} has reached its limit of {channel_limit} RSS feeds."
+        return None
+
+    async def send_lines(self, ctx, lines):
+        """Sends lines in as few messages as fit Discord's 2000-character limit."""
+        message = ""
+        for line in lines:
+            if len(message) + len(line) + 1 > 2000:
+                await ctx.send(message)
+                message = ""
+            message += line + "\n"
+        if message:
+            await ctx.send(message)
+
+    def feed_succeeded(self, url, seconds):
+        if self.health.record_success(url, seconds):
+            self.notify_later(url, f"✅ RSS feed {url} is reachable again and has been resumed.")
+
+    def feed_failed(self, url, error, seconds):
+        if self.health.record_failure(url, error, seconds):
+            print(f"Suspending feed {url} after repeated failures: {error}")
+            self.notify_later(url, (
+                f"⛔ RSS feed {url} has been suspended after failing {self.health.states[url]['failures']} times in a row "
+                f"(last error: {error}). It will be checked every {PROBE_INTERVAL // 60} hours and resumed once it works."
+            ))
+
+    def notify_later(self, url, message):
+        """Posts a status notice without holding up the poll, keeping the task until it is done."""
+        task = asyncio.create_task(self.notify_subscribers(url, message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def notify_subscribers(self, url, message):
+        """Posts a feed status change to the audit log of every guild subscribed to it."""
+        guild_ids = {sub.guild_id for sub in self.bot.subscriptions.subscribers(url)}
+        if self.bot.ROLE == 'poller':
+            # No Discord connection here; the gateways post it to the audit logs
+            await asyncio.to_thread(self.queue.publish, [(None, guild_id, None, {'log': message}) for guild_id in guild_ids])
+            return
+        for guild_id in guild_ids:
+            guild = self.bot.get_guild(int(guild_id))
+            if guild:
+                await self.bot.log_action(self.bot, guild, message, self.bot.user)
+
+    def owned_urls(self):
+        """Every subscribed feed URL, or only this poller's hash partition of them."""
+        urls = self.bot.subscriptions.urls()
+        if self.bot.ROLE != 'poller':
+            return set(urls)
+        return {url for url in urls if feed_partition(url, self.bot.POLLER_COUNT) == self.bot.POLLER_INDEX}
+
+    async def refresh_config(self):
+        """Pollers take no commands, so they reload the config whenever a gateway has saved a change."""
+        version, config = await asyncio.to_thread(self.bot.storage.changed_config, self.config_version)
+        if config is None:
+            return
+        for guild_id in self.bot.bot_config.keys() | config.keys():
+            old, new = self.bot.bot_config.get(guild_id), config.get(guild_id)
+            if old != new and (isinstance(old, dict) or isinstance(new, dict)):
+                self.bot.subscriptions.update_guild(guild_id, new)
+        self.bot.bot_config = config
+        self.scheduler.set_default_interval(config.get('rss_interval_minutes', self.bot.DEFAULT_RSS_INTERVAL))
+        self.config_version = version
+
+    def subscriptions_changed(self, guild_id):
+        """Refreshes the subscription index after a guild's feeds, keywords or channels changed."""
+        self.bot.subscriptions.update_guild(guild_id, self.bot.bot_config.get(str(guild_id)))
+
+    def schedule_hints(self, feed):
+        """Extracts entry publish times and the publisher's update hint from a parsed feed."""
+        publish_times = [entry['published'] for entry in feed['entries'] if entry['published']]
+        hint = hinted_interval(feed['ttl'], feed['update_period'], feed['update_frequency'])
+        return publish_times, hint
+
+    def collect_metrics(self, metrics):
+        for key in ('not_modified', 'unchanged', 'changed', 'errors', 'bytes_saved'):
+            metrics.set_total(f'rss_fetcher_{key}_total', self.fetcher.stats[key])
+        metrics.set_total('rss_articles_rendered_total', self.renderer.stats['rendered'])
+        metrics.set_total('rss_articles_reused_total', self.renderer.stats['reused'])
+        metrics.set('rss_dedup_items', len(self.bot.dedup))
+        metrics.set_total('rss_dedup_evicted_total', self.bot.dedup.stats['evicted'])
+        metrics.set('rss_feeds_tracked', len(self.scheduler.feeds))
+        metrics.set('rss_feeds_suspended', sum(1 for url in self.health.states if self.health.status(url) == SUSPENDED))
 
-        if not unique_urls:
+    async def perform_rss_check(self):
+        if self.bot.ROLE == 'poller':
+            await self.refresh_config()
+        else:
+            await self.bot.wait_until_ready()
+        start = time.perf_counter()
+
+        # 1. Pick up subscription changes and find the feeds that are due
+        subscriptions = self.bot.subscriptions
+        if subscriptions.version != self.synced_version:
+            unique_urls = self.owned_urls()
+            self.scheduler.sync(unique_urls)
+            self.fetcher.forget(unique_urls)
+            self.cursors.forget(unique_urls)
+            self.health.forget(unique_urls)
+            self.synced_version = subscriptions.version
+        due_urls = self.scheduler.pop_due()
+        if not due_urls:
             return
+        metrics.inc('rss_feeds_polled_total', len(due_urls))
 
-        # 2. Fetch all unique feeds concurrently
-        fetch_tasks = [self.fetch_feed(url) for url in unique_urls]
+        # 2. Fetch due feeds concurrently
+        fetch_tasks = [self.fetch_feed(url) for url in due_urls]
         feed_results = await asyncio.gather(*fetch_tasks)
 
-        # 3. Create a cache of the fetched data
-        feed_cache = {url: feed for url, feed in zip(unique_urls, feed_results) if feed}
-
-        # 4. Distribute updates to guilds
-        for guild in self.bot.guilds:
-            guild_config = self.bot.bot_config.get(str(guild.id), {})
-            feeds = guild_config.get('rss_feeds', [])
-            default_channel_id = guild_config.get('channel_id')
-
-            for feed_obj in feeds:
-                url = feed_obj['url']
-                cached_feed = feed_cache.get(url)
+        # 3. Collect entries newer than each feed's cursor and schedule its next poll
+        feed_cache = {}
+        new_entries = {}
+        for url, feed in zip(due_urls, feed_results):
+            if feed:
+                feed_cache[url] = feed
+                new_entries[url] = self.cursors.new_entries(url, feed['entries'])
+                publish_times, hint = self.schedule_hints(feed)
+                self.scheduler.reschedule(url, changed=True, publish_times=publish_times, hint=hint)
+            elif self.health.status(url) != OK:
+                # Back off from failing feeds instead of retrying them at full rate
+                self.scheduler.defer(url, self.health.retry_minutes(url))
+            else:
+                self.scheduler.reschedule(url, changed=False)
+
+        if self.fetcher.validators_dirty:
+            self.bot.save_validators()
+            self.fetcher.validators_dirty = False
+        if self.cursors.dirty:
+            self.bot.save_cursors()
+            self.cursors.dirty = False
+        if self.health.dirty:
+            self.bot.save_health()
+            self.health.dirty = False
+        new_count = sum(len(entries) for entries in new_entries.values())
+        metrics.inc('rss_entries_new_total', new_count)
+        print(f"RSS cycle: {len(feed_cache)}/{len(due_urls)} due feeds changed, {new_count} new entries. "
+              f"Cache: {self.fetcher.cache_summary()}. Delivery: {self.bot.delivery.summary()}")
+
+        # 4. Distribute updates to the subscribers of feeds that have new entries
+        considered = duplicates = filtered = 0
+        outgoing = []   # (claim key, guild_id, channel_id, embed) for the gateways, when running as a poller
+        for url, entries in new_entries.items():
+            if not entries:
+                continue
+            subscribers = tuple(subscriptions.subscribers(url))
+            matcher = subscriptions.matcher(url)
+            # Each entry is cleaned up and turned into an embed once, however many guilds receive it
+            articles = [self.renderer.render(entry, feed_cache[url]['title']) for entry in entries]
+            # Scan each entry once for every keyword any subscriber of this feed watches
+            keyword_hits = None
+            if matcher.tokens:
+                keyword_hits = [matcher.scan(article.title + ' ' + article.text) for article in articles]
+
+            for sub in subscribers:
+                channel = None
+                if self.bot.ROLE != 'poller':
+                    channel = self.bot.get_channel(sub.channel_id)
+                    if not channel:
+                        continue
+
+                # Items are remembered per channel, so a story posted in one guild still reaches the others
+                scope = scope_key(sub.guild_id, sub.channel_id)
+                for i, article in enumerate(articles):
+                    considered += 1
+                    if self.bot.dedup.seen(scope, article.key, article.fingerprint):
+                        duplicates += 1
+                        continue
+                    if keyword_hits is not None and not sub.keywords.accepts(keyword_hits[i]):
+                        filtered += 1
+                        continue
+
+                    print(f"New article found for guild {sub.guild_id}: {article.title}")
+                    claim = self.bot.dedup.add(scope, article.key, article.fingerprint)
+                    if channel is None:
+                        outgoing.append((claim, sub.guild_id, sub.channel_id, article.data))
+                    else:
+                        # Sending happens on the delivery workers so one slow channel can't stall the cycle
+                        self.bot.delivery.enqueue(channel, article.embed)
+
+        if self.bot.ROLE == 'poller':
+            queued = await asyncio.to_thread(self.queue.publish, outgoing) if outgoing else 0
+            # Items another poller claimed first for the same channel were duplicates after all
+            duplicates += len(outgoing) - queued
+            metrics.inc('rss_queue_published_total', queued)
+            await asyncio.to_thread(self.queue.prune)
+
+        metrics.inc('rss_entries_total', considered - duplicates - filtered, outcome='posted')
+        metrics.inc('rss_entries_total', duplicates, outcome='duplicate')
+        metrics.inc('rss_entries_total', filtered, outcome='filtered')
+
+        # Expire old history and append what was posted this cycle
+        self.bot.dedup.prune()
+        self.bot.save_history()
+        metrics.observe('rss_cycle_seconds', time.perf_counter() - start)
+
+    @tasks.loop(seconds=30)
+    async def fetch_rss(self):
+        try:
+            await self.perform_rss_check()
+        except Exception as e:
+            # A failed cycle (say, "database is locked") must not stop polling for good
+            print(f"RSS cycle failed: {e!r}")
+            metrics.inc('rss_cycle_errors_total')
 
-                if not cached_feed or not cached_feed.entries:
+    @tasks.loop(seconds=2)
+    async def consume_queue(self):
+        """Delivers the posts queued by the poller processes to the guilds on this process's shards."""
+        await self.bot.wait_until_ready()
+        while True:
+            posts = await asyncio.to_thread(self.queue.read, self.bot.QUEUE_CONSUMER)
+            for post_id, guild_id, channel_id, payload in posts:
+                if not self.bot.owns_guild(guild_id):
                     continue
-
-                latest = cached_feed.entries[0]
-                if latest.link not in self.bot.posted_articles:
-                    keywords = feed_obj.get('keywords', [])
-                    content_to_check = (latest.title + ' ' + getattr(latest, 'summary', '')).lower()
-                    
-                    if not keywords or any(k.lower() in content_to_check for k in keywords):
-                        target_channel_id = feed_obj.get('channel_id') or default_channel_id
-                        if not target_channel_id:
-                            continue
-
-                        channel = self.bot.get_channel(target_channel_id)
-                        if channel:
-                            print(f"New article found for guild {guild.id}: {latest.title}")
-                            self.bot.posted_articles[latest.link] = time.time()
-                            embed = discord.Embed(
-                                title=latest.title,
-                                url=latest.link,
-                                description=getattr(latest, 'summary', "A new article has been posted"),
-                                color=discord.Color.blue()
-                            )
-                            embed.set_footer(text=cached_feed.feed.title)
-                            if hasattr(latest, 'media_content') and latest.media_content:
-                                image_url = latest.media_content[0]['url']
-                                embed.set_image(url=image_url)
-                            await channel.send(embed=embed)
-        
-        # Prune history
-        curr_time = time.time()
-        three_hours = 3 * 60 * 60
-        prune = {
-            link: timestamp
-            for link, timestamp in self.bot.posted_articles.items()
-            if (curr_time - timestamp) < three_hours
-        }
-        if len(prune) < len(self.bot.posted_articles):
-            self.bot.posted_articles = prune
-            self.bot.save_history()
-
-    @tasks.loop(minutes=10)
-    async def fetch_rss(self):
-        await self.perform_rss_check()
+                if 'log' in payload:
+                    guild = self.bot.get_guild(int(guild_id))
+                    if guild:
+                        await self.bot.log_action(self.bot, guild, payload['log'], self.bot.user)
+                    continue
+                channel = self.bot.get_channel(channel_id)
+                if channel:
+                    self.bot.delivery.enqueue(channel, discord.Embed.from_dict(payload))
+                    metrics.inc('rss_queue_consumed_total')
+            if not posts:
+                break
+            await asyncio.to_thread(self.queue.ack, self.bot.QUEUE_CONSUMER, posts[-1][0])
 
     @commands.group(invoke_without_command=True, help="Manages RSS feeds for this server.")
     async def rss(self, ctx):
@@ -114,8 +365,17 @@ class RSS(commands.Cog):
         default_channel = self.bot.get_channel(guild_config.get('channel_id'))
 
         message = f"**RSS Settings for {ctx.guild.name}**\n"
-        message += f"Interval: **{self.fetch_rss.minutes}** minutes.\n"
-        message += f"Default Channel: {default_channel.mention if default_channel else 'Not Set'}\n\n**Feeds:**\n"
+        message += (f"Interval: **{self.scheduler.default_interval}** minutes "
+                    f"(adapts per feed between {self.bot.MIN_RSS_INTERVAL} and {self.bot.MAX_RSS_INTERVAL}).\n")
+        message += f"Default Channel: {default_channel.mention if default_channel else 'Not Set'}\n"
+        if self.bot.ROLE == 'gateway':
+            # The pollers do the fetching; their validator files record which feeds get cut off
+            validators = self.bot.poller_validators()
+            is_oversized = lambda url: validators.get(url, {}).get('truncated', False)
+        else:
+            message += f"Feed cache: {self.fetcher.cache_summary()}\n"
+            is_oversized = self.fetcher.is_oversized
+        message += "\n**Feeds:**\n"
 
         if not feeds:
             message += "No RSS feeds configured. Use `-rss add <url> [#channel]` to add one."
@@ -125,8 +385,11 @@ class RSS(commands.Cog):
                 keywords_str = ", ".join(feed_obj.get('keywords', []))
                 message += f"**{i+1}.** {feed_obj['url']}\n"
                 message += f"   *Channel:* {channel.mention if channel else 'Default'}\n"
+                if is_oversized(feed_obj['url']):
+                    message += f"   ⚠️ *Larger than {self.bot.RSS_MAX_FEED_KB:,} KB, only the newest items are read*\n"
                 if keywords_str:
-                    message += f"   *Keywords:* `{keywords_str}`\n"
+                    mode = " (whole words)" if feed_obj.get('whole_word') else ""
+                    message += f"   *Keywords{mode}:* `{keywords_str}`\n"
         await ctx.send(message)
 
     @commands.command(name="setchannel", help="Sets the default channel for RSS updates.")
@@ -134,16 +397,54 @@ class RSS(commands.Cog):
     async def set_default_channel(self, ctx, channel: discord.TextChannel):
         guild_config = self.bot.bot_config.setdefault(str(ctx.guild.id), {})
         guild_config["channel_id"] = channel.id
-        self.bot.save_configs()
+        self.subscriptions_changed(ctx.guild.id)
+        self.bot.save_configs(ctx.guild.id)
         await ctx.send(f"✅ Default RSS channel set to {channel.mention}.")
         await self.bot.log_action(self.bot, ctx.guild, f"Default RSS channel set to {channel.mention}.", ctx.author)
 
+    @rss.command(name="health", help="Shows whether this server's feeds are being fetched successfully.")
+    async def feed_health(self, ctx):
+        guild_config = self.bot.bot_config.get(str(ctx.guild.id), {})
+        feeds = guild_config.get('rss_feeds', [])
+        if not feeds:
+            await ctx.send("No RSS feeds configured. Use `-rss add <url> [#channel]` to add one.")
+            return
+
+        gateway = self.bot.ROLE == 'gateway'
+        if gateway:
+            # The pollers track feed health, each in its own file
+            self.health.states = self.bot.poller_health()
+
+        def when(url, label):
+            # A gateway has no schedule of its own and the pollers keep theirs in memory
+            if gateway:
+                return ""
+            due = self.scheduler.feeds.get(url, {}).get('due')
+            return f", {label} <t:{int(due)}:R>" if due else f", {label} soon"
+
+        lines = [f"**Feed health for {ctx.guild.name}**"]
+        for i, feed_obj in enumerate(feeds):
+            url = feed_obj['url']
+            state = self.health.states.get(url)
+            status = self.health.status(url)
+            if state is None:
+                lines.append(f"⏳ **{i+1}.** {url} — not fetched yet")
+            elif status == OK:
+                lines.append(f"✅ **{i+1}.** {url} — OK, avg {state['latency']:.1f} s{when(url, 'next check')}")
+            elif status == SUSPENDED:
+                lines.append(f"⛔ **{i+1}.** {url} — suspended after {state['failures']} failures "
+                             f"(`{state['last_error']}`){when(url, 'next probe')}")
+            else:
+                lines.append(f"⚠️ **{i+1}.** {url} — {state['failures']} failure(s) in a row "
+                             f"(`{state['last_error']}`){when(url, 'retrying')}")
+
+        await self.send_lines(ctx, lines)
+
     @rss.command(name="add", help="Adds a new RSS feed. Usage: `-rss add <url> [channel]`")
     @is_rss_admin()
     async def add_rss_feed(self, ctx, url: str, channel: discord.TextChannel = None):
         guild_config = self.bot.bot_config.setdefault(str(ctx.guild.id), {})
         feeds = guild_config.setdefault('rss_feeds', [])
-        channel_configs = guild_config.get('channel_configs', {})
 
         # Determine target channel
         target_channel = channel or self.bot.get_channel(guild_config.get('channel_id'))
@@ -151,48 +452,135 @@ class RSS(commands.Cog):
             await ctx.send("❌ No channel specified and no default channel is set for this server. Use `-setchannel` first.")
             return
 
-        # --- Enforce All Limits ---
-        # 1. Global server limit
-        PROGRAM_MAX_FEEDS = 30
-        guild_limit = guild_config.get('rss_feed_limit', PROGRAM_MAX_FEEDS)
-        if len(feeds) >= guild_limit:
-            await ctx.send(f"❌ This server has reached its limit of {guild_limit} RSS feeds.")
+        limit_error = self.limit_error(guild_config, feeds, target_channel)
+        if limit_error:
+            await ctx.send(f"❌ {limit_error}")
             return
 
-        # 2. Channel-specific limits
-        channel_settings = channel_configs.get(str(target_channel.id), {})
-        channel_feed_count = sum(1 for feed in feeds if feed.get('channel_id') == target_channel.id)
-
-        # 2a. Multiple feeds allowed?
-        allow_multiple = channel_settings.get('allow_multiple', True) # Default to true
-        if not allow_multiple and channel_feed_count > 0:
-            await ctx.send(f"❌ {target_channel.mention} is configured to not allow more than one RSS feed.")
+        # Check the feed now rather than letting the next poll fail on it quietly
+        async with ctx.typing():
+            error, items, seconds = await self.validate_feed(url)
+        if error:
+            await ctx.send(f"❌ Could not add {url}: {error}.")
             return
-
-        # 2b. Channel feed count limit
-        channel_limit = channel_settings.get('limit')
-        if channel_limit is not None and channel_feed_count >= channel_limit:
-            await ctx.send(f"❌ {target_channel.mention} has reached its limit of {channel_limit} RSS feeds.")
+        # Another feed may have been added while this one was being checked
+        limit_error = self.limit_error(guild_config, feeds, target_channel)
+        if limit_error:
+            await ctx.send(f"❌ {limit_error}")
             return
 
         new_feed = {'url': url, 'keywords': [], 'channel_id': target_channel.id}
-        
         feeds.append(new_feed)
-        self.bot.save_configs()
-        await ctx.send(f"✅ RSS feed added for {target_channel.mention}.")
+        self.subscriptions_changed(ctx.guild.id)
+        self.bot.save_configs(ctx.guild.id)
+        await ctx.send(f"✅ RSS feed added for {target_channel.mention} ({items} items, fetched in {seconds:.1f} s).")
         await self.bot.log_action(self.bot, ctx.guild, f"Added RSS feed {url} to {target_channel.mention}.", ctx.author)
 
+    @rss.command(name="import", help="Adds the feeds of an attached OPML file. Usage: `-rss import [channel]` with the file attached")
+    @is_rss_admin()
+    async def import_feeds(self, ctx, channel: discord.TextChannel = None):
+        if not ctx.message.attachments:
+            await ctx.send("❌ Attach an OPML file (exported from a feed reader or with `-rss export`) to the command.")
+            return
+        attachment = ctx.message.attachments[0]
+        if attachment.size > MAX_OPML_BYTES:
+            await ctx.send(f"❌ {attachment.filename} is larger than {MAX_OPML_BYTES // 1024} KB.")
+            return
+
+        guild_config = self.bot.bot_config.setdefault(str(ctx.guild.id), {})
+        feeds = guild_config.setdefault('rss_feeds', [])
+        target_channel = channel or self.bot.get_channel(guild_config.get('channel_id'))
+        if not target_channel:
+            await ctx.send("❌ No channel specified and no default channel is set for this server. Use `-setchannel` first.")
+            return
+
+        try:
+            urls = parse_opml(await attachment.read())
+        except ValueError as e:
+            await ctx.send(f"❌ Could not read {attachment.filename}: {e}.")
+            return
+        if not urls:
+            await ctx.send(f"❌ {attachment.filename} doesn't list any feeds.")
+            return
+
+        lines = []
+        subscribed = {canonical_url(feed['url']) for feed in feeds if feed.get('channel_id') == target_channel.id}
+        candidates = []
+        for url in urls:
+            if canonical_url(url) in subscribed:
+                lines.append(f"⏭️ {url} — already in {target_channel.mention}")
+            elif len(candidates) < IMPORT_MAX_FEEDS:
+                subscribed.add(canonical_url(url))
+                candidates.append(url)
+        if len(urls) - len(lines) > len(candidates):
+            lines.append(f"⏭️ {len(urls) - len(lines) - len(candidates)} more feeds not checked; "
+                         f"only the first {IMPORT_MAX_FEEDS} are")
+
+        if not candidates:
+            await ctx.send(f"✅ Every feed in {attachment.filename} is already in {target_channel.mention}.")
+            return
+
+        limit_error = self.limit_error(guild_config, feeds, target_channel)
+        if limit_error:
+            # Still report the feeds that were skipped above, not just the limit
+            await self.send_lines(ctx, [f"❌ {limit_error}"] + lines)
+            return
+
+        # Every feed is checked up front, a few at a time, so one slow host can't hold up the rest
+        await ctx.send(f"⏳ Checking {len(candidates)} feeds from {attachment.filename}...")
+        async with ctx.typing():
+            results = await asyncio.gather(*(self.validate_feed(url) for url in candidates))
+
+        added = []
+        for url, (error, items, seconds) in zip(candidates, results):
+            if error:
+                lines.append(f"❌ {url} — {error} ({seconds:.1f} s)")
+                continue
+            limit_error = self.limit_error(guild_config, feeds + added, target_channel)
+            if limit_error:
+                lines.append(f"⏭️ {url} — OK but not added: {limit_error}")
+                continue
+            added.append({'url': url, 'keywords': [], 'channel_id': target_channel.id})
+            lines.append(f"✅ {url} — {items} items ({seconds:.1f} s)")
+
+        if added:
+            # One config change and one save for the whole file
+            feeds.extend(added)
+            self.subscriptions_changed(ctx.guild.id)
+            self.bot.save_configs(ctx.guild.id)
+            await self.bot.log_action(self.bot, ctx.guild,
+                                      f"Imported {len(added)} RSS feeds from {attachment.filename} to {target_channel.mention}.",
+                                      ctx.author)
+        lines.insert(0, f"**Imported {len(added)} of {len(urls)} feeds into {target_channel.mention}**")
+        await self.send_lines(ctx, lines)
+
+    @rss.command(name="export", help="Sends this server's feeds as an OPML file for feed readers or `-rss import`.")
+    @is_rss_admin()
+    async def export_feeds(self, ctx):
+        guild_config = self.bot.bot_config.get(str(ctx.guild.id), {})
+        feeds = guild_config.get('rss_feeds', [])
+        if not feeds:
+            await ctx.send("No RSS feeds configured. Use `-rss add <url> [#channel]` to add one.")
+            return
+
+        groups = {}
+        for feed_obj in feeds:
+            channel = self.bot.get_channel(feed_obj.get('channel_id'))
+            groups.setdefault(f"#{channel.name}" if channel else "Default channel", []).append(feed_obj['url'])
+        data = build_opml(f"{ctx.guild.name} RSS feeds", list(groups.items()))
+        await ctx.send(f"📄 {len(feeds)} RSS feeds, grouped by channel.",
+                       file=discord.File(io.BytesIO(data), filename="feeds.opml"))
+
     @rss.command(name="limit", help="Sets the maximum number of RSS feeds for this server.")
     @commands.has_permissions(administrator=True) # Only full admins can set the limit
     async def set_rss_limit(self, ctx, limit: int):
-        PROGRAM_MAX_FEEDS = 30
         if not (1 <= limit <= PROGRAM_MAX_FEEDS):
             await ctx.send(f"❌ Invalid limit. Please choose a number between 1 and {PROGRAM_MAX_FEEDS}.")
             return
         
         guild_config = self.bot.bot_config.setdefault(str(ctx.guild.id), {})
         guild_config['rss_feed_limit'] = limit
-        self.bot.save_configs()
+        self.bot.save_configs(ctx.guild.id)
         await ctx.send(f"✅ The maximum number of RSS feeds for this server is now set to **{limit}**.")
         await self.bot.log_action(self.bot, ctx.guild, f"Server RSS feed limit set to **{limit}**.", ctx.author)
 
@@ -203,30 +591,31 @@ class RSS(commands.Cog):
         feeds = guild_config.get('rss_feeds', [])
         if 1 <= index <= len(feeds):
             removed_feed = feeds.pop(index - 1)
-            self.bot.save_configs()
+            self.subscriptions_changed(ctx.guild.id)
+            self.bot.save_configs(ctx.guild.id)
             await ctx.send(f"✅ RSS feed removed: {removed_feed['url']}")
             await self.bot.log_action(self.bot, ctx.guild, f"Removed RSS feed {removed_feed['url']}.", ctx.author)
         else:
             await ctx.send(f"❌ Invalid index. Use `-rss` to see the list of feeds for this server.")
 
-    @rss.command(name="interval", help="Sets the global interval for checking RSS articles.")
+    @rss.command(name="interval", help="Sets the starting interval for checking RSS feeds. Each feed then adapts to how often it updates.")
     @is_rss_admin()
     async def set_rss_interval(self, ctx, new_interval: int):
         if new_interval < self.bot.MIN_RSS_INTERVAL:
             await ctx.send(f"❌ Minimum RSS poll interval rate is **5 Minutes**.")
             return
-        self.fetch_rss.change_interval(minutes=new_interval)
+        self.scheduler.set_default_interval(new_interval)
         self.bot.bot_config['rss_interval_minutes'] = new_interval
         self.bot.save_configs()
-        await ctx.send(f"✅ Global RSS poll interval is now **{new_interval} minutes**.")
-        await self.bot.log_action(self.bot, ctx.guild, f"Global RSS poll interval set to **{new_interval} minutes**.", ctx.author)
+        await ctx.send(f"✅ Default RSS poll interval is now **{new_interval} minutes**.")
+        await self.bot.log_action(self.bot, ctx.guild, f"Default RSS poll interval set to **{new_interval} minutes**.", ctx.author)
 
     @rss.group(name="keywords", help="Manage keywords for a specific RSS feed.", invoke_without_command=True)
     @is_rss_admin()
     async def keywords(self, ctx):
-        await ctx.send("Use `-rss keywords <add|remove|list> <feed_index> [keyword]`")
+        await ctx.send("Use `-rss keywords <add|remove|list|mode> <feed_index> [keyword]`")
 
-    @keywords.command(name="add", help="Add a keyword to a feed. Usage: `-rss keywords add <index> <keyword>`")
+    @keywords.command(name="add", help="Add a keyword to a feed. Prefix it with `-` to skip articles containing it. Usage: `-rss keywords add <index> <keyword>`")
     @is_rss_admin()
     async def add_keyword(self, ctx, index: int, keyword: str):
         guild_config = self.bot.bot_config.get(str(ctx.guild.id), {})
@@ -235,7 +624,8 @@ class RSS(commands.Cog):
             feed_obj = feeds[index - 1]
             if keyword.lower() not in [k.lower() for k in feed_obj['keywords']]:
                 feed_obj.setdefault('keywords', []).append(keyword)
-                self.bot.save_configs()
+                self.subscriptions_changed(ctx.guild.id)
+                self.bot.save_configs(ctx.guild.id)
                 await ctx.send(f"✅ Keyword `{keyword}` added to feed #{index}.")
                 await self.bot.log_action(self.bot, ctx.guild, f"Added keyword `{keyword}` to feed #{index}.", ctx.author)
             else:
@@ -253,7 +643,8 @@ class RSS(commands.Cog):
             keyword_to_remove = next((k for k in feed_obj.get('keywords', []) if k.lower() == keyword.lower()), None)
             if keyword_to_remove:
                 feed_obj['keywords'].remove(keyword_to_remove)
-                self.bot.save_configs()
+                self.subscriptions_changed(ctx.guild.id)
+                self.bot.save_configs(ctx.guild.id)
                 await ctx.send(f"✅ Keyword `{keyword}` removed from feed #{index}.")
                 await self.bot.log_action(self.bot, ctx.guild, f"Removed keyword `{keyword}` from feed #{index}.", ctx.author)
             else:
@@ -270,11 +661,30 @@ class RSS(commands.Cog):
             feed_obj = feeds[index - 1]
             keywords = feed_obj.get('keywords', [])
             if keywords:
-                await ctx.send(f"Keywords for feed #{index}: `{"`, `".join(keywords)}`")
+                await ctx.send(f"Keywords for feed #{index}: `{'`, `'.join(keywords)}`")
             else:
                 await ctx.send(f"Feed #{index} has no keywords.")
         else:
             await ctx.send(f"❌ Invalid feed index.")
 
+    @keywords.command(name="mode", help="Match keywords anywhere in the text or as whole words only. Usage: `-rss keywords mode <index> <substring|word>`")
+    @is_rss_admin()
+    async def keyword_mode(self, ctx, index: int, mode: str):
+        if mode not in ('substring', 'word'):
+            await ctx.send("❌ Invalid mode. Please use `substring` or `word`.")
+            return
+        guild_config = self.bot.bot_config.get(str(ctx.guild.id), {})
+        feeds = guild_config.get('rss_feeds', [])
+        if 1 <= index <= len(feeds):
+            feed_obj = feeds[index - 1]
+            feed_obj['whole_word'] = mode == 'word'
+            self.subscriptions_changed(ctx.guild.id)
+            self.bot.save_configs(ctx.guild.id)
+            description = "whole words only" if mode == 'word' else "anywhere in the text"
+            await ctx.send(f"✅ Keywords for feed #{index} now match {description}.")
+            await self.bot.log_action(self.bot, ctx.guild, f"Keyword mode for feed #{index} set to `{mode}`.", ctx.author)
+        else:
+            await ctx.send(f"❌ Invalid feed index.")
+
 async def setup(bot):
     await bot.add_cog(RSS(bot))
\ No newline at end of file
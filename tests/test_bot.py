@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_worker_import_of_bot_module_loads_no_state(tmp_path):
+    # A spawned parser worker runs bot.py again under the name __mp_main__
+    script = ("import runpy, sys\n"
+              "namespace = runpy.run_path(sys.argv[1], run_name='__mp_main__')\n"
+              "print(hasattr(namespace['bot'], 'storage'), hasattr(namespace['bot'], 'persistence'))\n")
+    env = dict(os.environ, PYTHONPATH=ROOT, DISCORD_TOKEN='token', CHANNEL_ID='1')
+    result = subprocess.run([sys.executable, '-c', script, os.path.join(ROOT, 'bot.py')],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['False', 'False']
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,53 @@
+import asyncio
+import aiohttp
+import discord
+from utils.delivery import DeliveryQueue
+
+class Channel:
+    def __init__(self, channel_id, error=None):
+        self.id = channel_id
+        self.error = error
+        self.sent = []
+
+    async def send(self, embeds):
+        if self.error:
+            raise self.error
+        self.sent.append(embeds)
+
+def deliver(channels, workers=2):
+    async def run():
+        delivery = DeliveryQueue(workers=workers, channel_rate=(100, 1), global_rate=(100, 1))
+        delivery.start()
+        for channel in channels:
+            delivery.enqueue(channel, discord.Embed(title=f"post for {channel.id}"))
+        await asyncio.sleep(0.2)
+        alive = sum(not task.done() for task in delivery._tasks)
+        await delivery.close()
+        return delivery, alive
+
+    return asyncio.run(run())
+
+def test_connection_errors_do_not_kill_workers():
+    broken = [Channel(1, OSError("connection reset")), Channel(2, aiohttp.ClientOSError())]
+    healthy = Channel(3)
+    delivery, alive = deliver(broken + [healthy])
+    assert alive == 2
+    assert len(healthy.sent) == 1
+    assert delivery.stats['failed'] == 2
+    assert not delivery._scheduled
+
+def test_failed_channel_can_be_delivered_to_again():
+    channel = Channel(1, OSError("connection reset"))
+
+    async def run():
+        delivery = DeliveryQueue(workers=1, channel_rate=(100, 1), global_rate=(100, 1))
+        delivery.start()
+        delivery.enqueue(channel, discord.Embed(title="first"))
+        await asyncio.sleep(0.05)
+        channel.error = None
+        delivery.enqueue(channel, discord.Embed(title="second"))
+        await asyncio.sleep(0.05)
+        await delivery.close()
+
+    asyncio.run(run())
+    assert [embeds[0].title for embeds in channel.sent] == ["second"]
@@ -0,0 +1,27 @@
+from utils.health import FeedHealth, REFRESH_SECONDS, SUSPEND_AFTER
+
+URL = 'https://example.com/feed.xml'
+
+def test_first_success_marks_state_dirty():
+    health = FeedHealth()
+    health.record_success(URL, 0.5, now=100)
+    assert health.dirty
+    assert health.states[URL]['last_ok'] == 100
+
+def test_routine_successes_are_saved_only_every_refresh_interval():
+    health = FeedHealth({URL: {'failures': 0, 'last_error': None, 'latency': 0.5, 'last_ok': 100}})
+    start = health._refreshed
+    health.record_success(URL, 2.0, now=start + 60)
+    assert not health.dirty
+    assert health.states[URL]['last_ok'] == start + 60
+    health.record_success(URL, 2.0, now=start + REFRESH_SECONDS)
+    assert health.dirty
+
+def test_success_after_suspension_reports_recovery():
+    health = FeedHealth()
+    for _ in range(SUSPEND_AFTER):
+        health.record_failure(URL, 'timed out', 1.0)
+    health.dirty = False
+    assert health.record_success(URL, 0.5)
+    assert health.dirty
+    assert health.status(URL) == 'ok'
@@ -0,0 +1,108 @@
+import asyncio
+import discord
+from utils.alert_index import AlertIndex
+from utils.notifier import AlertNotifier, build_messages
+
+class User:
+    def __init__(self, fail_on=None, error=None):
+        self.fail_on = fail_on
+        self.error = error
+        self.messages = []
+
+    async def send(self, message):
+        if self.fail_on is not None and len(self.messages) == self.fail_on:
+            raise self.error
+        self.messages.append(message)
+
+class Coins:
+    def __init__(self, error=None):
+        self.error = error
+
+    def name(self, coin_id):
+        if self.error:
+            raise self.error
+        return coin_id.capitalize()
+
+class Bot:
+    def __init__(self, user=None, user_error=None, coins=None):
+        self.user = user
+        self.user_error = user_error
+        self.coins = coins or Coins()
+        self.active_alerts = AlertIndex()
+        self.removed = []
+
+    def get_user(self, user_id):
+        return None
+
+    async def fetch_user(self, user_id):
+        if self.user_error:
+            raise self.user_error
+        return self.user
+
+    def save_alerts(self, added=(), removed=()):
+        self.removed.extend(alert['id'] for alert in removed)
+
+def make_alerts(count):
+    # Long names make each alert ~1 KB, so two alerts fill a 2000-character message
+    return [({'id': i, 'user_id': 7, 'crypto': 'x' * 900 + str(i), 'condition': '>', 'price': 1.0}, 2.0)
+            for i in range(1, count + 1)]
+
+def notify(bot, triggered):
+    async def run():
+        notifier = AlertNotifier(bot)
+        notifier.submit(triggered)
+        await asyncio.gather(*notifier._tasks)
+        return notifier
+    return asyncio.run(run())
+
+def test_build_messages_reports_the_alerts_each_message_covers():
+    triggered = make_alerts(5)
+    messages = build_messages(triggered)
+    assert len(messages) > 1
+    assert [alert for _, covered in messages for alert in covered] == triggered
+    assert all(len(message) <= 2000 for message, _ in messages)
+
+def test_only_undelivered_alerts_are_requeued():
+    triggered = make_alerts(5)
+    user = User(fail_on=1, error=discord.HTTPException(type('Response', (), {'status': 500, 'reason': 'x'})(), 'boom'))
+    bot = Bot(user)
+    notifier = notify(bot, triggered)
+    first_message = build_messages(triggered)[0][1]
+    sent_ids = [alert['id'] for alert, _ in first_message]
+    assert len(user.messages) == 1
+    assert bot.removed == sent_ids
+    assert sorted(bot.active_alerts.by_id) == [i for i in range(1, 6) if i not in sent_ids]
+    assert notifier.in_flight == {}
+
+def test_unexpected_errors_requeue_instead_of_leaking_in_flight():
+    for bot in (Bot(user_error=OSError("connection reset")), Bot(User(), coins=Coins(KeyError('bitcoin'))),
+                Bot(User(fail_on=0, error=OSError("connection reset")))):
+        notifier = notify(bot, make_alerts(2))
+        assert notifier.in_flight == {}
+        assert sorted(bot.active_alerts.by_id) == [1, 2]
+        assert bot.removed == []
+
+def test_unreachable_users_are_backed_off_and_keep_their_alerts():
+    response = type('Response', (), {'status': 403, 'reason': 'Forbidden'})()
+    user = User(fail_on=0, error=discord.Forbidden(response, 'Cannot send messages to this user'))
+    bot = Bot(user)
+    async def run():
+        notifier = AlertNotifier(bot)
+        notifier.submit(make_alerts(1))
+        await asyncio.gather(*notifier._tasks)
+        # The next tick triggers the same alert again; it must not cost another DM attempt
+        fetches = []
+        async def fetch_user(user_id):
+            fetches.append(user_id)
+            return user
+        bot.fetch_user = fetch_user
+        notifier._users.clear()
+        bot.active_alerts.remove(1)
+        notifier.submit(make_alerts(1))
+        await asyncio.gather(*notifier._tasks)
+        return notifier, fetches
+    notifier, fetches = asyncio.run(run())
+    assert fetches == []
+    assert notifier.stats['skipped'] == 1
+    assert sorted(bot.active_alerts.by_id) == [1]
+    assert notifier.in_flight == {}
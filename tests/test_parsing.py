@@ -0,0 +1,16 @@
+from utils.parsing import parse_any, _timestamp
+
+def rss(pub_dates):
+    items = "".join(f"<item><title>Item {i}</title><link>https://example.com/{i}</link>"
+                    f"<guid>item-{i}</guid><pubDate>{date}</pubDate></item>" for i, date in enumerate(pub_dates))
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>{items}</channel></rss>'.encode()
+
+def test_out_of_range_dates_are_ignored():
+    assert _timestamp("Mon, 01 Jan 30000 00:00:00 GMT") is None
+    assert _timestamp("30000-01-01T00:00:00") is None
+    assert _timestamp("Mon, 01 Jan 2024 00:00:00 GMT") == 1704067200
+
+def test_one_bad_date_does_not_fail_a_streamed_feed():
+    body = rss(["Mon, 01 Jan 2024 00:00:00 GMT", "Mon, 01 Jan 30000 00:00:00 GMT"])
+    feed = parse_any(body, max_items=10, truncated=True)
+    assert [entry['published'] for entry in feed['entries']] == [1704067200, None]
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from utils.dedup import DedupStore, scope_key
+from utils.persistence import WriteBehind
+
+def test_close_writes_stores_a_running_flush_had_not_reached():
+    written = []
+    first_write_started = threading.Event()
+    release = threading.Event()
+
+    def slow_job():
+        first_write_started.set()
+        release.wait(5)
+        written.append('a')
+
+    async def run():
+        persistence = WriteBehind(window=0)
+        persistence.register('a', lambda keys: slow_job)
+        persistence.register('b', lambda keys: lambda: written.append('b'))
+        persistence.start()
+        persistence.mark('a')
+        persistence.mark('b')
+        while not first_write_started.is_set():
+            await asyncio.sleep(0.01)
+        closing = asyncio.create_task(persistence.close())
+        await asyncio.sleep(0.05)
+        release.set()
+        await closing
+
+    asyncio.run(run())
+    assert sorted(written) == ['a', 'b']
+
+def test_failed_write_is_retried_and_other_stores_still_written():
+    attempts = []
+
+    def failing_job():
+        attempts.append('a')
+        if len(attempts) == 1:
+            raise OSError("disk full")
+
+    async def run():
+        persistence = WriteBehind(window=0)
+        persistence.register('a', lambda keys: failing_job)
+        persistence.register('b', lambda keys: lambda: attempts.append('b'))
+        persistence.mark('a')
+        persistence.mark('b')
+        await persistence.flush()
+        assert attempts == ['a', 'b']
+        await persistence.close()
+
+    asyncio.run(run())
+    assert attempts == ['a', 'b', 'a']
+
+def test_history_records_survive_a_failed_write():
+    dedup = DedupStore(title_distance=4)
+    scope = scope_key(1, 10)
+    dedup.add(scope, "https://example.com/story", 0b1011 << 40)
+    batches = []
+
+    def snapshot(keys):
+        records, titles = dedup.take_pending(), dedup.take_pending_titles()
+        def job():
+            batches.append((records, titles))
+            if len(batches) == 1:
+                raise OSError("database is locked")
+        job.restore = lambda: dedup.restore_pending(records, titles)
+        return job
+
+    async def run():
+        persistence = WriteBehind(window=0)
+        persistence.register('history', snapshot)
+        persistence.mark('history')
+        await persistence.flush()
+        await persistence.flush()
+        await persistence.close()
+
+    asyncio.run(run())
+    assert len(batches) == 2
+    assert batches[1] == batches[0]
+    assert len(batches[1][0]) == 1 and len(batches[1][1]) == 1
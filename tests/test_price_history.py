@@ -0,0 +1,21 @@
+from utils.price_history import MAX_GAP_MINUTES, PriceHistory
+
+def test_short_gaps_repeat_the_last_close():
+    history = PriceHistory(60)
+    history.record('bitcoin', 100.0, now=0)
+    history.record('bitcoin', 110.0, now=3 * 60)
+    assert history.change('bitcoin', 2) == 10.0
+    assert history.average('bitcoin', 2) == 105.0
+
+def test_restored_history_is_not_stretched_across_downtime():
+    history = PriceHistory(60)
+    for minute in range(30):
+        history.record('bitcoin', 100.0, now=minute * 60)
+    restored = PriceHistory(60)
+    restored.restore(history.snapshot())
+    assert restored.change('bitcoin', 10) == 0.0
+    # Back up after an hour: the old closes say nothing about the price while the bot was down
+    restored.record('bitcoin', 150.0, now=(29 + MAX_GAP_MINUTES + 50) * 60)
+    assert restored.change('bitcoin', 10) is None
+    assert restored.average('bitcoin', 10) is None
+    assert restored.last('bitcoin') == 150.0
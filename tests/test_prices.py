@@ -0,0 +1,64 @@
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from utils.prices import PriceService
+
+def with_server(handler, scenario):
+    async def run():
+        app = web.Application()
+        app.router.add_get('/simple/price', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        prices = PriceService(ttl=0, batch_delay=0.01, base_url=f"http://127.0.0.1:{port}")
+        await prices.start()
+        try:
+            return await scenario(prices)
+        finally:
+            await prices.close()
+            await runner.cleanup()
+    return asyncio.run(run())
+
+def test_malformed_body_fails_the_lookup_instead_of_hanging():
+    async def truncated(request):
+        return web.Response(body=b'{"bitcoin": {"usd": 6', content_type='application/json')
+
+    async def scenario(prices):
+        for _ in range(2):
+            with pytest.raises(aiohttp.ClientError):
+                await asyncio.wait_for(prices.get_prices(['bitcoin']), 2)
+        return prices
+
+    prices = with_server(truncated, scenario)
+    assert prices._inflight == {}
+    assert prices.stats['errors'] == 2
+
+def test_non_object_body_fails_the_lookup():
+    async def listing(request):
+        return web.json_response([1, 2, 3])
+
+    async def scenario(prices):
+        with pytest.raises(aiohttp.ClientError):
+            await asyncio.wait_for(prices.get_price('bitcoin'), 2)
+        return prices
+
+    assert with_server(listing, scenario)._inflight == {}
+
+def test_lookup_recovers_after_a_bad_response():
+    calls = []
+
+    async def flaky(request):
+        calls.append(1)
+        if len(calls) == 1:
+            return web.Response(body=b'{', content_type='application/json')
+        return web.json_response({'bitcoin': {'usd': 64000.0}})
+
+    async def scenario(prices):
+        with pytest.raises(aiohttp.ClientError):
+            await asyncio.wait_for(prices.get_price('bitcoin'), 2)
+        return await asyncio.wait_for(prices.get_price('bitcoin'), 2)
+
+    assert with_server(flaky, scenario) == {'usd': 64000.0}
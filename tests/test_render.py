@@ -0,0 +1,17 @@
+from utils.render import ArticleRenderer
+
+def make_entry(title, id='', link=''):
+    return {'id': id, 'link': link, 'title': title, 'summary': f"About {title}", 'image': '', 'published': None}
+
+def test_entries_without_id_or_link_are_not_mixed_up():
+    renderer = ArticleRenderer()
+    first = renderer.render(make_entry("First story"), "Feed")
+    second = renderer.render(make_entry("Second story"), "Feed")
+    assert first.title == "First story"
+    assert second.title == "Second story"
+
+def test_entries_with_an_id_are_rendered_once():
+    renderer = ArticleRenderer()
+    first = renderer.render(make_entry("Story", id="tag:example.com,2024:1"), "Feed")
+    assert renderer.render(make_entry("Story", id="tag:example.com,2024:1"), "Feed") is first
+    assert renderer.stats == {'rendered': 1, 'reused': 1}
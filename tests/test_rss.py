@@ -0,0 +1,142 @@
+import asyncio
+import sqlite3
+from benchmarks.fakes import FakeBot, FakeGuild
+from cogs.rss import RSS
+from utils.health import SUSPEND_AFTER
+from utils.opml import build_opml, parse_opml
+
+URL = 'https://example.com/feed.xml'
+
+class Context:
+    def __init__(self, guild):
+        self.guild = guild
+        self.messages = []
+
+    async def send(self, message):
+        self.messages.append(message)
+
+def gateway_bot():
+    bot = FakeBot({'1': {'channel_id': 10, 'rss_feeds': [{'url': URL}]}}, price_api=None)
+    bot.ROLE = 'gateway'
+    bot.poller_validators = lambda: {URL: {'hash': 'abc', 'truncated': True}}
+    bot.poller_health = lambda: {URL: {'failures': 1, 'latency': 0.5, 'last_error': 'timed out'}}
+    return bot
+
+def run_command(bot, name):
+    async def run():
+        cog = RSS(bot)
+        cog.consume_queue.cancel()
+        ctx = Context(FakeGuild(1))
+        command = cog.rss if name == 'rss' else cog.feed_health
+        await command.callback(cog, ctx)
+        cog.parser.close()
+        return ctx.messages
+    return asyncio.run(run())
+
+def test_gateway_settings_use_poller_validators_and_skip_local_cache():
+    message, = run_command(gateway_bot(), 'rss')
+    assert 'Larger than' in message
+    assert 'Feed cache' not in message
+
+def test_gateway_health_leaves_out_poll_times():
+    message, = run_command(gateway_bot(), 'health')
+    assert 'timed out' in message
+    assert 'retrying' not in message
+
+def test_suspension_notice_task_is_kept_until_done():
+    async def run():
+        bot = FakeBot({}, price_api=None)
+        cog = RSS(bot)
+        cog.fetch_rss.cancel()
+        sent = asyncio.Event()
+        async def notify_subscribers(url, message):
+            await sent.wait()
+        cog.notify_subscribers = notify_subscribers
+        for _ in range(SUSPEND_AFTER):
+            cog.feed_failed(URL, 'timed out', 1.0)
+        assert len(cog._tasks) == 1
+        sent.set()
+        await asyncio.gather(*cog._tasks)
+        await asyncio.sleep(0)
+        cog.parser.close()
+        return cog._tasks
+    assert asyncio.run(run()) == set()
+
+class Message:
+    def __init__(self, *attachments):
+        self.attachments = list(attachments)
+
+class Attachment:
+    filename = 'feeds.opml'
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+
+    async def read(self):
+        return self.data
+
+def test_import_over_limit_still_reports_skipped_feeds():
+    async def run():
+        other = 'https://example.org/other.xml'
+        bot = FakeBot({'1': {'channel_id': 10, 'rss_feed_limit': 1,
+                             'rss_feeds': [{'url': URL, 'keywords': [], 'channel_id': 10}]}}, price_api=None)
+        cog = RSS(bot)
+        cog.fetch_rss.cancel()
+        ctx = Context(FakeGuild(1))
+        ctx.message = Message(Attachment(build_opml('Feeds', [('News', [URL, other])])))
+        await cog.import_feeds.callback(cog, ctx)
+        cog.parser.close()
+        return ctx.messages
+    message, = asyncio.run(run())
+    assert 'limit of 1 RSS feeds' in message
+    assert f"{URL} — already in" in message
+
+class LockedStorage:
+    """Fails the first config check the way SQLite does when another process holds the write lock."""
+    def __init__(self):
+        self.calls = 0
+
+    def changed_config(self, known_version):
+        self.calls += 1
+        if self.calls == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return known_version, None
+
+def test_poller_keeps_polling_after_a_failed_cycle():
+    async def run():
+        bot = FakeBot({}, price_api=None)
+        bot.ROLE = 'poller'
+        bot.POLLER_INDEX, bot.POLLER_COUNT = 0, 1
+        bot.storage = LockedStorage()
+        cog = RSS(bot)
+        cog.fetch_rss.change_interval(seconds=0.01)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if bot.storage.calls >= 3:
+                break
+        running = cog.fetch_rss.is_running()
+        cog.fetch_rss.cancel()
+        cog.parser.close()
+        return running, bot.storage.calls
+    running, calls = asyncio.run(run())
+    assert running and calls >= 3
+
+def test_import_of_only_subscribed_feeds_checks_nothing():
+    async def run():
+        bot = FakeBot({'1': {'channel_id': 10, 'rss_feeds': [{'url': URL, 'keywords': [], 'channel_id': 10}]}},
+                      price_api=None)
+        cog = RSS(bot)
+        cog.fetch_rss.cancel()
+        ctx = Context(FakeGuild(1))
+        ctx.message = Message(Attachment(build_opml('Feeds', [('News', [URL])])))
+        await cog.import_feeds.callback(cog, ctx)
+        cog.parser.close()
+        return ctx.messages
+    message, = asyncio.run(run())
+    assert 'already in' in message
+    assert 'Checking' not in message
+
+def test_parse_opml_returns_each_feed_url_once():
+    other = 'https://example.org/other.xml'
+    assert parse_opml(build_opml('Feeds', [('News', [URL, other]), ('More', [URL])])) == [URL, other]
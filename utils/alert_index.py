@@ -0,0 +1,175 @@
+from bisect import bisect_left, bisect_right, insort
+
+# Window alert conditions; for 'move' alerts `price` holds the percentage
+MOVE = 'move'
+AVERAGE = 'average'
+
+def describe_condition(alert):
+    """Human-readable form of an alert's condition, e.g. "> $4,000.00"."""
+    if alert['condition'] == MOVE:
+        return f"moves ±{alert['price']:g}% within {alert['minutes']} min"
+    if alert['condition'] == AVERAGE:
+        return f"crosses its {alert['minutes']}-min average"
+    return f"{alert['condition']} ${alert['price']:,.2f}"
+
+class AlertIndex:
+    """Active price alerts, addressed by stable id and indexed per coin by threshold.
+
+    Each coin keeps two lists of (price, id) sorted by price: one for '>' alerts and one for
+    '<' alerts. A price update finds every triggered alert with one bisect, and they sit in a
+    contiguous slice that is removed in one go. Window alerts are grouped per coin by window
+    length: 'move' alerts sorted by percentage, 'average' alerts with the side of the average the
+    price was on at the last tick.
+    """
+    def __init__(self, alerts=()):
+        self.by_id = {}
+        self._by_user = {}   # user_id -> {alert_id, ...}
+        self._above = {}     # crypto -> [(price, id), ...] for '>' alerts
+        self._below = {}     # crypto -> [(price, id), ...] for '<' alerts
+        self._moves = {}     # crypto -> {minutes: [(percent, id), ...]}
+        self._averages = {}  # crypto -> {minutes: {'ids': {id, ...}, 'above': None or bool}}
+        for alert in alerts:
+            self.add(alert)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(list(self.by_id.values()))
+
+    def __bool__(self):
+        return bool(self.by_id)
+
+    def get(self, alert_id):
+        return self.by_id.get(alert_id)
+
+    def _side(self, alert):
+        return self._above if alert['condition'] == '>' else self._below
+
+    def add(self, alert):
+        self.by_id[alert['id']] = alert
+        self._by_user.setdefault(alert['user_id'], set()).add(alert['id'])
+        if alert['condition'] == MOVE:
+            insort(self._moves.setdefault(alert['crypto'], {}).setdefault(alert['minutes'], []),
+                   (alert['price'], alert['id']))
+        elif alert['condition'] == AVERAGE:
+            group = self._averages.setdefault(alert['crypto'], {}).setdefault(alert['minutes'], {'ids': set(), 'above': None})
+            group['ids'].add(alert['id'])
+        else:
+            insort(self._side(alert).setdefault(alert['crypto'], []), (alert['price'], alert['id']))
+
+    def remove(self, alert_id):
+        alert = self.by_id.pop(alert_id, None)
+        if alert is None:
+            return None
+        self._forget_user(alert)
+        if alert['condition'] == MOVE:
+            windows = self._moves[alert['crypto']]
+            thresholds = windows[alert['minutes']]
+            del thresholds[bisect_left(thresholds, (alert['price'], alert_id))]
+            if not thresholds:
+                del windows[alert['minutes']]
+            if not windows:
+                del self._moves[alert['crypto']]
+        elif alert['condition'] == AVERAGE:
+            windows = self._averages[alert['crypto']]
+            windows[alert['minutes']]['ids'].discard(alert_id)
+            if not windows[alert['minutes']]['ids']:
+                del windows[alert['minutes']]
+            if not windows:
+                del self._averages[alert['crypto']]
+        else:
+            side = self._side(alert)
+            thresholds = side[alert['crypto']]
+            i = bisect_left(thresholds, (alert['price'], alert_id))
+            del thresholds[i]
+            if not thresholds:
+                del side[alert['crypto']]
+        return alert
+
+    def _forget_user(self, alert):
+        user_alerts = self._by_user[alert['user_id']]
+        user_alerts.discard(alert['id'])
+        if not user_alerts:
+            del self._by_user[alert['user_id']]
+
+    def coins(self):
+        return self._above.keys() | self._below.keys() | self._moves.keys() | self._averages.keys()
+
+    def watches(self, crypto):
+        return crypto in self._above or crypto in self._below or crypto in self._moves or crypto in self._averages
+
+    def for_user(self, user_id):
+        return sorted((self.by_id[alert_id] for alert_id in self._by_user.get(user_id, ())), key=lambda a: a['id'])
+
+    def triggered(self, crypto, price):
+        """Alerts whose condition is met at `price`, without removing them."""
+        above = self._above.get(crypto, [])
+        below = self._below.get(crypto, [])
+        hit = above[:bisect_left(above, (price,))] + below[bisect_right(below, (price, float('inf'))):]
+        return [self.by_id[alert_id] for _, alert_id in hit]
+
+    def pop_triggered(self, crypto, price):
+        """Removes and returns every alert whose condition is met at `price`."""
+        popped = []
+        above = self._above.get(crypto)
+        if above:
+            cut = bisect_left(above, (price,))
+            popped += above[:cut]
+            del above[:cut]
+            if not above:
+                del self._above[crypto]
+        below = self._below.get(crypto)
+        if below:
+            cut = bisect_right(below, (price, float('inf')))
+            popped += below[cut:]
+            del below[cut:]
+            if not below:
+                del self._below[crypto]
+
+        return self._pop_ids(alert_id for _, alert_id in popped)
+
+    def pop_window_triggered(self, crypto, history):
+        """Removes and returns the window alerts met by the latest price in `history` (a PriceHistory).
+
+        Each window length costs one lookup in the history, however many alerts share it.
+        """
+        popped = []
+        moves = self._moves.get(crypto)
+        if moves:
+            for minutes, thresholds in list(moves.items()):
+                change = history.change(crypto, minutes)
+                if change is None:
+                    continue
+                cut = bisect_right(thresholds, (abs(change), float('inf')))
+                popped += [alert_id for _, alert_id in thresholds[:cut]]
+                del thresholds[:cut]
+                if not thresholds:
+                    del moves[minutes]
+            if not moves:
+                del self._moves[crypto]
+
+        averages = self._averages.get(crypto)
+        if averages:
+            price = history.last(crypto)
+            for minutes, group in list(averages.items()):
+                average = history.average(crypto, minutes)
+                if average is None:
+                    continue
+                above = price > average
+                if group['above'] is not None and above != group['above']:
+                    popped += group['ids']
+                    del averages[minutes]
+                else:
+                    group['above'] = above
+            if not averages:
+                del self._averages[crypto]
+        return self._pop_ids(popped)
+
+    def _pop_ids(self, alert_ids):
+        alerts = []
+        for alert_id in alert_ids:
+            alert = self.by_id.pop(alert_id)
+            self._forget_user(alert)
+            alerts.append(alert)
+        return alerts
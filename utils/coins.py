@@ -0,0 +1,140 @@
+import asyncio
+import difflib
+import json
+import time
+import aiohttp
+from utils.persistence import atomic_write
+from utils.prices import COINGECKO_API
+
+# Minutes before a failed refresh is tried again
+RETRY_MINUTES = 15
+
+class CoinRegistry:
+    """Every coin CoinGecko lists, kept on disk and refreshed in the background.
+
+    Ids, symbols and names are indexed in dicts, so checking or resolving a coin (`btc` ->
+    `bitcoin`) costs no request. When several coins share a symbol or name, the one with the
+    highest market cap wins.
+    """
+    def __init__(self, path, ttl_hours=24, base_url=COINGECKO_API):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.base_url = base_url
+        self.by_id = {}         # id -> name
+        self._by_symbol = {}    # lowercase symbol -> id
+        self._by_name = {}      # lowercase name -> id
+        self._ranked = set()    # ids of the top coins by market cap
+        self._choices = None    # every id, symbol and name, built on the first suggestion
+        self.fetched_at = 0
+        self._task = None
+        self.stats = {'refreshes': 0, 'errors': 0}
+        self._load()
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __bool__(self):
+        return bool(self.by_id)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self._index(data.get('coins', []), data.get('ranked', []), data.get('fetched_at', 0))
+
+    def _index(self, coins, ranked, fetched_at):
+        rank = {coin_id: i for i, coin_id in enumerate(ranked)}
+        def best(coin_ids):
+            return min(coin_ids, key=lambda coin_id: (rank.get(coin_id, len(rank)), len(coin_id), coin_id))
+
+        by_id = {}
+        by_symbol = {}
+        by_name = {}
+        for coin in coins:
+            by_id[coin['id']] = coin['name']
+            by_symbol.setdefault(coin['symbol'].lower(), []).append(coin['id'])
+            by_name.setdefault(coin['name'].lower(), []).append(coin['id'])
+        self.by_id = by_id
+        self._by_symbol = {symbol: best(coin_ids) for symbol, coin_ids in by_symbol.items()}
+        self._by_name = {name: best(coin_ids) for name, coin_ids in by_name.items()}
+        self._ranked = set(ranked)
+        self._choices = None
+        self.fetched_at = fetched_at
+
+    def resolve(self, query):
+        """Returns the coin id for an id, symbol or name, or None if no listed coin matches."""
+        key = query.strip().lower()
+        by_symbol = self._by_symbol.get(key)
+        # A top coin's ticker beats an obscure coin whose id happens to be the same word
+        if by_symbol in self._ranked:
+            return by_symbol
+        if key in self.by_id:
+            return key
+        return self._by_name.get(key) or by_symbol
+
+    def name(self, coin_id):
+        return self.by_id.get(coin_id) or coin_id.capitalize()
+
+    def suggest(self, query, limit=3):
+        """Ids of the coins whose id, symbol or name is closest to `query`, best first."""
+        if self._choices is None:
+            self._choices = list(self.by_id.keys() | self._by_symbol.keys() | self._by_name.keys())
+        suggestions = []
+        for match in difflib.get_close_matches(query.strip().lower(), self._choices, n=limit * 2, cutoff=0.75):
+            coin_id = self.resolve(match)
+            if coin_id not in suggestions:
+                suggestions.append(coin_id)
+        return suggestions[:limit]
+
+    def did_you_mean(self, query):
+        """A " Did you mean ...?" hint for a not-found message, or "" when nothing is close."""
+        suggestions = self.suggest(query)
+        if not suggestions:
+            return ""
+        return " Did you mean " + " or ".join(f"`{coin_id}` ({self.name(coin_id)})" for coin_id in suggestions) + "?"
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            if time.time() - self.fetched_at >= self.ttl:
+                try:
+                    await self.refresh()
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    self.stats['errors'] += 1
+                    print(f"Could not refresh the coin list: {e!r}")
+                    await asyncio.sleep(RETRY_MINUTES * 60)
+                    continue
+            await asyncio.sleep(max(60, self.ttl - (time.time() - self.fetched_at)))
+
+    async def refresh(self):
+        """Downloads /coins/list and the top coins by market cap, then re-indexes and saves them."""
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+            async with session.get(f"{self.base_url}/coins/list") as response:
+                response.raise_for_status()
+                coins = await response.json()
+            ranked = []
+            params = {'vs_currency': 'usd', 'order': 'market_cap_desc', 'per_page': 250, 'page': 1}
+            try:
+                async with session.get(f"{self.base_url}/coins/markets", params=params) as response:
+                    response.raise_for_status()
+                    ranked = [coin['id'] for coin in await response.json()]
+            except aiohttp.ClientError as e:
+                # Only used to break ties between shared symbols, so the list is still usable without it
+                print(f"Could not rank coins by market cap: {e}")
+
+        fetched_at = time.time()
+        self._index(coins, ranked, fetched_at)
+        payload = json.dumps({'fetched_at': fetched_at, 'ranked': ranked, 'coins': coins},
+                             separators=(',', ':')).encode()
+        await asyncio.to_thread(atomic_write, self.path, payload)
+        self.stats['refreshes'] += 1
+        print(f"Coin list refreshed: {len(self.by_id)} coins")
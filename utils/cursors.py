@@ -0,0 +1,50 @@
+# Upper bound on entries emitted in one poll when the cursor entry has dropped out of the feed
+MAX_NEW_ENTRIES = 20
+
+def entry_key(entry):
+    return entry['id'] or entry['link']
+
+class FeedCursors:
+    """Remembers the newest entry seen for each feed URL.
+
+    `cursors` maps a URL to {'id': ..., 'published': ...} and is persisted by the bot.
+    """
+    def __init__(self, cursors=None):
+        self.cursors = cursors if cursors is not None else {}
+        self.dirty = False
+
+    def new_entries(self, url, entries):
+        """Returns the entries published since the last poll, oldest first, and advances the cursor."""
+        if not entries:
+            return []
+        cursor = self.cursors.get(url)
+        if cursor is None:
+            # First time we see this feed: only announce the latest entry, like a fresh subscription
+            fresh = entries[:1]
+        else:
+            fresh = []
+            for entry in entries:
+                if entry_key(entry) == cursor['id']:
+                    break
+                if cursor['published'] and entry['published'] and entry['published'] <= cursor['published']:
+                    break
+                fresh.append(entry)
+                if len(fresh) >= MAX_NEW_ENTRIES:
+                    break
+            fresh.reverse()
+            if all(entry['published'] for entry in fresh):
+                fresh.sort(key=lambda entry: entry['published'])
+
+        if fresh:
+            newest = fresh[-1]
+            self.cursors[url] = {'id': entry_key(newest), 'published': newest['published']}
+            self.dirty = True
+        return fresh
+
+    def forget(self, active_urls):
+        """Drops cursors for URLs that no guild is subscribed to anymore."""
+        stale = [url for url in self.cursors if url not in active_urls]
+        for url in stale:
+            del self.cursors[url]
+        if stale:
+            self.dirty = True
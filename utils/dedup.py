@@ -0,0 +1,324 @@
+import hashlib
+import re
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+BUCKET_SECONDS = 10 * 60
+
+# Query parameters that only track where a click came from; they never change the page
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+                   'ref', 'ref_src', 'cmpid', 'ito', '_ga', '_hsenc', '_hsmi', 'mkt_tok', 'spm'}
+TRACKING_PREFIXES = ('utm_',)
+
+# Words too common to tell two titles apart
+STOP_WORDS = {'a', 'an', 'the', 'of', 'to', 'in', 'on', 'for', 'and', 'or', 'with', 'at', 'by', 'from',
+              'as', 'is', 'are', 'was', 'be', 'it', 'its', 'this', 'that', 'new'}
+SIMHASH_BITS = 64
+MIN_TITLE_WORDS = 3
+# The last " - ..." / " | ..." part of a title, which is a source name only if it's a known one
+TITLE_TAIL = re.compile(r'\s+[-|–—·]\s+([^-|–—·]+?)\s*$')
+# Publishers that feeds and aggregators commonly append to their headlines
+KNOWN_SOURCES = {'reuters', 'ap', 'ap news', 'associated press', 'afp', 'bloomberg', 'cnbc', 'cnn', 'bbc',
+                 'bbc news', 'the guardian', 'the new york times', 'the washington post', 'the wall street journal',
+                 'wsj', 'financial times', 'ft', 'forbes', 'axios', 'politico', 'npr', 'fox news', 'nbc news',
+                 'abc news', 'cbs news', 'al jazeera', 'the verge', 'techcrunch', 'wired', 'ars technica',
+                 'engadget', 'coindesk', 'cointelegraph', 'decrypt', 'the block', 'yahoo finance', 'marketwatch'}
+
+def digest(value):
+    """Signed 64-bit key for a GUID or link, so it fits an SQLite INTEGER."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little', signed=True)
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def canonical_url(url):
+    """Normalises a web URL so the same page always gives the same string.
+
+    http and https are treated alike, the host is lowercased without `www.` or a default port,
+    tracking parameters and the fragment are dropped, the remaining query is sorted and a
+    trailing slash is removed. Anything that isn't an http(s) URL is returned stripped.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        return url
+    host = parts.hostname
+    if host.startswith('www.'):
+        host = host[4:]
+    if ':' in host:
+        host = f"[{host}]"
+    if port and port not in (80, 443):
+        host += f":{port}"
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _is_tracking(name))
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+def item_key(guid, link):
+    """The string an item is remembered by: its GUID when it has one, else its link.
+
+    GUIDs that are permalinks are canonicalised like links, so the same story carried by two
+    feeds, or linked with different tracking parameters, gets the same key.
+    """
+    if guid:
+        return canonical_url(guid) if guid.startswith(('http://', 'https://')) else guid
+    return canonical_url(link or '')
+
+def scope_key(guild_id, channel_id):
+    """Digest of the (guild, channel) pair that posted items are remembered for."""
+    return digest(f"{guild_id}/{channel_id}")
+
+def _source_name(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+def strip_source(title, feed_title=None):
+    """Removes a trailing " - Reuters" style source name: one in KNOWN_SOURCES or the feed's own title.
+
+    Any other tail is kept, since it is often what tells two stories apart ("... - Dow falls").
+    """
+    match = TITLE_TAIL.search(title)
+    if match:
+        source = _source_name(match.group(1))
+        if source in KNOWN_SOURCES or (feed_title and source == _source_name(feed_title)):
+            return title[:match.start()]
+    return title
+
+def title_fingerprint(title, feed_title=None):
+    """64-bit SimHash of a title's words and word pairs, or None for titles too short to compare.
+
+    Case, punctuation, stop words and a trailing source name (see strip_source) are ignored, so
+    such variants get the same fingerprint. Titles that differ by a word end up a few bits apart
+    and unrelated ones about half of them.
+    """
+    def words_of(text):
+        return [word for word in re.findall(r'\w+', text.lower()) if word not in STOP_WORDS]
+    words = words_of(strip_source(title, feed_title))
+    if len(words) < MIN_TITLE_WORDS:
+        # Too little left without the suffix; it was probably part of the title
+        words = words_of(title)
+    if len(words) < MIN_TITLE_WORDS:
+        return None
+    features = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    bits = [format(int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little'), '064b')
+            for feature in features]
+    # A bit is set when most features' hashes have it set; counting '1's per column runs in C
+    half = len(bits) / 2
+    return int(''.join('1' if column.count('1') > half else '0' for column in zip(*bits)), 2)
+
+def _signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+class _TitleIndex:
+    """Title fingerprints per scope, split into `distance + 1` bands and indexed by each band.
+
+    Two fingerprints at most `distance` bits apart agree on at least one whole band, so finding a
+    near-duplicate takes one dict lookup per band plus a bit count for the few titles found there.
+    """
+    def __init__(self, distance):
+        self.distance = min(distance, SIMHASH_BITS - 1)
+        bands = self.distance + 1
+        width = SIMHASH_BITS // bands
+        # (shift, mask) per band; the last band takes the leftover bits
+        self._bands_layout = [(band * width, (1 << (width if band < bands - 1 else SIMHASH_BITS - band * width)) - 1)
+                              for band in range(bands)]
+        self._bands = {}     # scope ^ (band value, band number) -> fingerprint or tuple of fingerprints
+        self._buckets = {}   # bucket -> [(scope, fingerprint), ...]
+        self.count = 0
+        self.pending = []
+
+    def _band_keys(self, scope, fingerprint):
+        for band, (shift, mask) in enumerate(self._bands_layout):
+            yield scope ^ ((fingerprint >> shift & mask) << 6 | band)
+
+    def matches(self, scope, fingerprint):
+        for band_key in self._band_keys(scope, fingerprint):
+            stored = self._bands.get(band_key)
+            if stored is None:
+                continue
+            for other in (stored,) if isinstance(stored, int) else stored:
+                if bin(fingerprint ^ other).count('1') <= self.distance:
+                    return True
+        return False
+
+    def insert(self, scope, fingerprint, bucket):
+        for band_key in self._band_keys(scope, fingerprint):
+            stored = self._bands.get(band_key)
+            if stored is None:
+                self._bands[band_key] = fingerprint
+            else:
+                self._bands[band_key] = ((stored,) if isinstance(stored, int) else stored) + (fingerprint,)
+        self._buckets.setdefault(bucket, []).append((scope, fingerprint))
+        self.count += 1
+
+    def _remove(self, scope, fingerprint):
+        for band_key in self._band_keys(scope, fingerprint):
+            stored = self._bands.get(band_key)
+            if stored == fingerprint:
+                del self._bands[band_key]
+            elif isinstance(stored, tuple):
+                rest = list(stored)
+                rest.remove(fingerprint)
+                self._bands[band_key] = rest[0] if len(rest) == 1 else tuple(rest)
+        self.count -= 1
+
+    def drop_before(self, oldest):
+        expired = 0
+        for bucket in [b for b in self._buckets if b < oldest]:
+            for scope, fingerprint in self._buckets.pop(bucket):
+                self._remove(scope, fingerprint)
+                expired += 1
+        return expired
+
+    def evict(self, count):
+        while count > 0 and self._buckets:
+            bucket = min(self._buckets)
+            entries = self._buckets[bucket]
+            batch = entries[:count]
+            del entries[:count]
+            if not entries:
+                del self._buckets[bucket]
+            for scope, fingerprint in batch:
+                self._remove(scope, fingerprint)
+            count -= len(batch)
+
+class DedupStore:
+    """Remembers which items were posted to which (guild, channel), by a fixed-size digest.
+
+    Items are keyed by item_key() combined with the scope, so every channel gets each story once,
+    whichever feed carries it. With a title distance of 0 or more, items whose title SimHash is
+    within that many bits of one already posted to the channel count as duplicates too.
+
+    Records are grouped into 10-minute buckets: expiry drops whole buckets instead of scanning
+    every item, and past `max_items` the oldest records are forgotten early, so memory stays
+    bounded. New records are queued until the bot persists them with take_pending().
+    """
+    def __init__(self, retention_hours=3, max_items=100000, title_distance=-1):
+        self.retention = retention_hours * 3600
+        self.max_items = max_items
+        self._keys = {}      # digest -> bucket
+        self._buckets = {}   # bucket -> [digest, ...]
+        self._pending = []
+        self._titles = _TitleIndex(title_distance) if title_distance is not None and title_distance >= 0 else None
+        self.stats = {'evicted': 0}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def oldest_bucket(self, now=None):
+        now = time.time() if now is None else now
+        return int((now - self.retention) // BUCKET_SECONDS)
+
+    def _insert(self, key, bucket):
+        self._keys[key] = bucket
+        self._buckets.setdefault(bucket, []).append(key)
+
+    def seen(self, scope, key, fingerprint=None):
+        """Whether the item, or one with a near-identical title, was already posted to the scope."""
+        if digest(f"{scope}/{key}") in self._keys:
+            return True
+        return fingerprint is not None and self._titles is not None and self._titles.matches(scope, fingerprint)
+
+    def add(self, scope, key, fingerprint=None, now=None):
+        """Records an item as posted to the scope. Returns its digest, which also keys post queue claims."""
+        now = time.time() if now is None else now
+        bucket = int(now // BUCKET_SECONDS)
+        scoped = digest(f"{scope}/{key}")
+        if scoped not in self._keys:
+            self._insert(scoped, bucket)
+            self._pending.append((bucket, scoped))
+        if fingerprint is not None and self._titles is not None:
+            self._titles.insert(scope, fingerprint, bucket)
+            self._titles.pending.append((bucket, scope, _signed(fingerprint)))
+        self._evict()
+        return scoped
+
+    def _evict(self):
+        """Forgets the oldest records once over `max_items`, a twentieth of the cap at a time."""
+        batch = self.max_items // 20
+        excess = len(self._keys) - self.max_items
+        if excess > 0:
+            excess += batch
+            self.stats['evicted'] += excess
+            while excess > 0 and self._buckets:
+                bucket = min(self._buckets)
+                keys = self._buckets[bucket]
+                dropped = keys[:excess]
+                del keys[:excess]
+                if not keys:
+                    del self._buckets[bucket]
+                for key in dropped:
+                    if self._keys.get(key) == bucket:
+                        del self._keys[key]
+                excess -= len(dropped)
+        if self._titles is not None and self._titles.count > self.max_items:
+            self._titles.evict(self._titles.count - self.max_items + batch)
+
+    def prune(self, now=None):
+        """Drops every bucket older than the retention window. Returns the number of items expired."""
+        oldest = self.oldest_bucket(now)
+        expired = 0
+        for bucket in [b for b in self._buckets if b < oldest]:
+            for key in self._buckets.pop(bucket):
+                if self._keys.get(key) == bucket:
+                    del self._keys[key]
+                    expired += 1
+        if self._titles is not None:
+            self._titles.drop_before(oldest)
+        return expired
+
+    def set_retention(self, hours):
+        self.retention = hours * 3600
+
+    def load(self, records, fingerprints=()):
+        """Loads persisted (bucket, key) and (bucket, scope, fingerprint) records, skipping expired ones."""
+        oldest = self.oldest_bucket()
+        for bucket, key in sorted(records):
+            if bucket >= oldest and key not in self._keys:
+                self._insert(key, bucket)
+        if self._titles is not None:
+            for bucket, scope, fingerprint in sorted(fingerprints):
+                if bucket >= oldest:
+                    self._titles.insert(scope, fingerprint & (1 << 64) - 1, bucket)
+        self._evict()
+
+    def migrate(self, posted_articles, scopes):
+        """Imports the old {link: timestamp} history.json contents into every given scope.
+
+        history.json didn't record which channel a link went to, so each link is remembered for
+        every channel subscribed at the time, the same way the old global history blocked it.
+        """
+        oldest = self.oldest_bucket()
+        for link, timestamp in posted_articles.items():
+            bucket = int(timestamp // BUCKET_SECONDS)
+            if bucket < oldest:
+                continue
+            key = item_key('', link)
+            for scope in scopes:
+                scoped = digest(f"{scope}/{key}")
+                if scoped not in self._keys:
+                    self._insert(scoped, bucket)
+                    self._pending.append((bucket, scoped))
+        self._evict()
+
+    def take_pending(self):
+        """Returns and clears the records added since the last call."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def take_pending_titles(self):
+        """Returns and clears the (bucket, scope, fingerprint) records added since the last call."""
+        if self._titles is None:
+            return []
+        pending, self._titles.pending = self._titles.pending, []
+        return pending
+
+    def restore_pending(self, records, titles=()):
+        """Puts back records taken for a write that failed, ahead of any added since."""
+        self._pending[:0] = records
+        if self._titles is not None:
+            self._titles.pending[:0] = titles
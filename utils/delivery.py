@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import deque
+import discord
+from utils.metrics import metrics
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+class RouteBucket:
+    """Token bucket approximating one Discord rate-limit route."""
+    def __init__(self, capacity, per_seconds):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self):
+        """Seconds to wait before the next request on this route is allowed."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, seconds):
+        """Called after a 429: nothing goes out on this route until Discord's retry_after has passed."""
+        self.blocked_until = time.monotonic() + seconds
+        self.tokens = 0
+
+class DeliveryQueue:
+    """Per-channel outbound queues drained by a bounded pool of workers.
+
+    Each channel is handled by at most one worker at a time, so posts stay in order, and several
+    queued embeds for the same channel go out as one message. A slow or rate-limited channel is
+    parked until its bucket allows another send instead of holding up everyone else.
+    """
+    def __init__(self, workers=4, channel_rate=(5, 5), global_rate=(45, 1)):
+        self.workers = workers
+        self.channel_rate = channel_rate
+        self._global = RouteBucket(*global_rate)
+        self._buckets = {}     # channel_id -> RouteBucket
+        self._queues = {}      # channel_id -> deque of (embed, enqueued_at)
+        self._channels = {}    # channel_id -> channel
+        self._scheduled = set()
+        self._ready = asyncio.Queue()
+        self._tasks = []
+        self.stats = {
+            'enqueued': 0,
+            'messages': 0,
+            'embeds': 0,
+            'rate_limited': 0,
+            'failed': 0,
+            'send_seconds': 0.0,
+            'send_seconds_max': 0.0,
+            'wait_seconds': 0.0
+        }
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def depth(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def enqueue(self, channel, embed):
+        self._channels[channel.id] = channel
+        self._queues.setdefault(channel.id, deque()).append((embed, time.monotonic()))
+        self.stats['enqueued'] += 1
+        self._schedule(channel.id)
+
+    def _schedule(self, channel_id):
+        if channel_id not in self._scheduled:
+            self._scheduled.add(channel_id)
+            self._ready.put_nowait(channel_id)
+
+    def _take_batch(self, queue):
+        batch = []
+        chars = 0
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            size = len(queue[0][0])
+            if batch and chars + size > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(queue.popleft())
+            chars += size
+        return batch
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            channel_id = await self._ready.get()
+            bucket = self._buckets.setdefault(channel_id, RouteBucket(*self.channel_rate))
+            delay = bucket.delay()
+            if delay > 0:
+                # Park the channel and serve someone else in the meantime
+                loop.call_later(delay, self._ready.put_nowait, channel_id)
+                continue
+            while (delay := self._global.delay()) > 0:
+                await asyncio.sleep(delay)
+            bucket.take()
+            self._global.take()
+            try:
+                await self._send(channel_id, bucket)
+            finally:
+                # Whatever happened to the send, the channel must not stay marked as scheduled
+                self._finish(channel_id)
+
+    def _finish(self, channel_id):
+        if self._queues.get(channel_id):
+            self._ready.put_nowait(channel_id)
+        else:
+            self._queues.pop(channel_id, None)
+            self._channels.pop(channel_id, None)
+            self._scheduled.discard(channel_id)
+
+    async def _send(self, channel_id, bucket):
+        queue = self._queues[channel_id]
+        batch = self._take_batch(queue)
+        if not batch:
+            return
+        channel = self._channels[channel_id]
+        start = time.monotonic()
+        try:
+            await channel.send(embeds=[embed for embed, _ in batch])
+        except discord.HTTPException as e:
+            metrics.observe('discord_send_seconds', time.monotonic() - start, status=e.status)
+            if e.status == 429:
+                self.stats['rate_limited'] += 1
+                retry_after = float(e.response.headers.get('Retry-After', 1)) if e.response else 1.0
+                bucket.block(retry_after)
+                queue.extendleft(reversed(batch))
+                return
+            self.stats['failed'] += len(batch)
+            print(f"Failed to deliver {len(batch)} embed(s) to channel {channel_id}: {e}")
+            return
+        except Exception as e:
+            # discord.py re-raises connection errors once its own retries are used up
+            metrics.observe('discord_send_seconds', time.monotonic() - start, status=0)
+            self.stats['failed'] += len(batch)
+            print(f"Failed to deliver {len(batch)} embed(s) to channel {channel_id}: {e!r}")
+            return
+        elapsed = time.monotonic() - start
+        metrics.observe('discord_send_seconds', elapsed, status=200)
+        self.stats['messages'] += 1
+        self.stats['embeds'] += len(batch)
+        self.stats['send_seconds'] += elapsed
+        self.stats['send_seconds_max'] = max(self.stats['send_seconds_max'], elapsed)
+        self.stats['wait_seconds'] += sum(start - enqueued_at for _, enqueued_at in batch)
+
+    def summary(self):
+        messages = self.stats['messages'] or 1
+        embeds = self.stats['embeds'] or 1
+        return (f"depth {self.depth()}, {self.stats['embeds']} embeds in {self.stats['messages']} messages, "
+                f"send avg {self.stats['send_seconds'] / messages * 1000:,.0f} ms "
+                f"max {self.stats['send_seconds_max'] * 1000:,.0f} ms, "
+                f"queued avg {self.stats['wait_seconds'] / embeds:,.1f} s, "
+                f"{self.stats['rate_limited']} rate limited, {self.stats['failed']} failed")
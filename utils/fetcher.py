@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import time
+from collections import namedtuple
+import aiohttp
+from utils.metrics import metrics
+
+USER_AGENT = "RSS_DC_BOT/1.0 (+https://github.com/DevCh3ng/RSS_DC_BOT)"
+
+# status is one of 'ok', 'not_modified', 'unchanged' or 'error'; body is only set for 'ok'
+# and error only for 'error'; seconds is how long the request took; truncated means the body
+# was cut off at max_bytes
+FetchResult = namedtuple('FetchResult', ['url', 'status', 'body', 'error', 'seconds', 'truncated'],
+                         defaults=(None, 0.0, False))
+READ_CHUNK = 64 * 1024
+
+def describe_error(error):
+    """Short, user-facing description of a failed download."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f"HTTP {error.status} {error.message}".strip()
+    if isinstance(error, aiohttp.InvalidURL):
+        return "not a valid http(s) URL"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timed out"
+    return str(error) or type(error).__name__
+
+class FeedFetcher:
+    """Downloads feeds over a single pooled aiohttp session.
+
+    `validators` maps each URL to the ETag, Last-Modified and content hash seen on the
+    previous download so unchanged feeds can be skipped before they are parsed.
+    """
+    def __init__(self, max_concurrency=50, per_host_limit=4, timeout=20, validators=None, max_bytes=2 * 1024 * 1024):
+        self.max_concurrency = max_concurrency
+        self.max_bytes = max_bytes
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.validators = validators if validators is not None else {}
+        self.validators_dirty = False
+        self.stats = {
+            'not_modified': 0,
+            'unchanged': 0,
+            'changed': 0,
+            'errors': 0,
+            'bytes_downloaded': 0,
+            'bytes_saved': 0
+        }
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+        self._reported = set()   # URLs with per-feed metrics
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host_limit,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=min(10, self.timeout)),
+            headers={'User-Agent': USER_AGENT}
+        )
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def _conditional_headers(self, url):
+        cached = self.validators.get(url, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    async def fetch(self, url):
+        """Downloads a feed, skipping it when the server or the content hash says nothing changed."""
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                async with self._session.get(url, headers=self._conditional_headers(url)) as response:
+                    if response.status == 304:
+                        self.stats['not_modified'] += 1
+                        self.stats['bytes_saved'] += self.validators.get(url, {}).get('size', 0)
+                        elapsed = self._record(url, start, 304, 0, 'not_modified')
+                        return FetchResult(url, 'not_modified', None, seconds=elapsed)
+                    response.raise_for_status()
+                    body, truncated = await self._read_limited(response)
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error fetching feed {url}: {e!r}")
+                self.stats['errors'] += 1
+                elapsed = self._record(url, start, getattr(e, 'status', 0), 0, 'error')
+                return FetchResult(url, 'error', None, describe_error(e), elapsed)
+
+        self.stats['bytes_downloaded'] += len(body)
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        previous = self.validators.get(url, {})
+        new_validators = {'etag': etag, 'last_modified': last_modified, 'hash': digest, 'size': len(body)}
+        if truncated:
+            new_validators['truncated'] = True
+        if new_validators != previous:
+            self.validators[url] = new_validators
+            self.validators_dirty = True
+
+        if previous.get('hash') == digest:
+            self.stats['unchanged'] += 1
+            elapsed = self._record(url, start, response.status, len(body), 'unchanged')
+            return FetchResult(url, 'unchanged', None, seconds=elapsed)
+
+        self.stats['changed'] += 1
+        elapsed = self._record(url, start, response.status, len(body), 'ok')
+        return FetchResult(url, 'ok', body, seconds=elapsed, truncated=truncated)
+
+    async def probe(self, url):
+        """Downloads a feed once to check it, without touching its validators, stats or metrics."""
+        start = time.perf_counter()
+        try:
+            async with self._session.get(url) as response:
+                response.raise_for_status()
+                body, truncated = await self._read_limited(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return FetchResult(url, 'error', None, describe_error(e), time.perf_counter() - start)
+        return FetchResult(url, 'ok', body, seconds=time.perf_counter() - start, truncated=truncated)
+
+    async def _read_limited(self, response):
+        """Reads at most max_bytes of the body. Returns (body, truncated).
+
+        aiohttp decompresses gzip/deflate chunk by chunk as it is read, so stopping here also
+        stops decompression: an oversized or compressed-bomb feed never costs more than
+        max_bytes of memory.
+        """
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(READ_CHUNK):
+            body += chunk
+            if len(body) > self.max_bytes:
+                del body[self.max_bytes:]
+                # Drop the connection rather than downloading the rest just to reuse it
+                response.close()
+                return bytes(body), True
+        return bytes(body), False
+
+    def is_oversized(self, url):
+        return self.validators.get(url, {}).get('truncated', False)
+
+    def _record(self, url, start, status_code, size, result):
+        elapsed = time.perf_counter() - start
+        metrics.observe('rss_fetch_seconds', elapsed, result=result)
+        metrics.inc('rss_fetch_responses_total', code=status_code)
+        metrics.inc('rss_fetch_bytes_total', size)
+        # Last poll of each feed; status 0 means the request never got an HTTP response
+        self._reported.add(url)
+        metrics.set('rss_feed_fetch_seconds', elapsed, url=url)
+        metrics.set('rss_feed_status', status_code, url=url)
+        metrics.set('rss_feed_bytes', size, url=url)
+        return elapsed
+
+    def forget(self, active_urls):
+        """Drops validators for URLs that no guild is subscribed to anymore."""
+        stale = [url for url in self.validators if url not in active_urls]
+        for url in stale:
+            del self.validators[url]
+        for url in self._reported - set(active_urls):
+            self._reported.discard(url)
+            for name in ('rss_feed_fetch_seconds', 'rss_feed_status', 'rss_feed_bytes'):
+                metrics.remove(name, url=url)
+        if stale:
+            self.validators_dirty = True
+
+    def cache_summary(self):
+        hits = self.stats['not_modified'] + self.stats['unchanged']
+        total = hits + self.stats['changed']
+        rate = (hits / total * 100) if total else 0
+        return (f"{hits}/{total} polls skipped ({rate:.0f}%), "
+                f"{self.stats['bytes_saved'] / 1024:,.0f} KB not downloaded")
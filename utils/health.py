@@ -0,0 +1,79 @@
+import time
+
+# Consecutive failures before a feed is suspended (circuit open)
+SUSPEND_AFTER = 8
+# First retry delay after a failure, doubled on each further failure up to MAX_BACKOFF (minutes)
+BASE_BACKOFF = 5
+MAX_BACKOFF = 120
+# How often a suspended feed is probed to see whether it has come back (minutes)
+PROBE_INTERVAL = 12 * 60
+# Latency and last-success times change on every poll, so on their own they're saved at most this often (seconds)
+REFRESH_SECONDS = 60 * 60
+
+OK = 'ok'
+FAILING = 'failing'
+SUSPENDED = 'suspended'
+
+class FeedHealth:
+    """Tracks consecutive failures, the last error and average latency for each feed URL.
+
+    `states` maps a URL to its health record and is persisted by the bot. A failing feed is
+    retried with exponential backoff; after SUSPEND_AFTER failures in a row it is suspended and
+    only probed every PROBE_INTERVAL minutes until a poll succeeds again. New feeds and failure
+    count changes mark the states dirty straight away; latency updates only every REFRESH_SECONDS.
+    """
+    def __init__(self, states=None):
+        self.states = states if states is not None else {}
+        self.dirty = False
+        self._refreshed = time.time()
+
+    def status(self, url):
+        state = self.states.get(url)
+        if not state or not state.get('failures'):
+            return OK
+        return SUSPENDED if state['failures'] >= SUSPEND_AFTER else FAILING
+
+    def record_success(self, url, seconds, now=None):
+        """Returns True if the feed was suspended and has now recovered."""
+        now = time.time() if now is None else now
+        if url not in self.states:
+            self.states[url] = {'failures': 0, 'last_error': None, 'latency': seconds}
+            self.dirty = True
+        state = self.states[url]
+        recovered = state['failures'] >= SUSPEND_AFTER
+        if state['failures']:
+            state['failures'] = 0
+            self.dirty = True
+        # Exponential moving average, so one slow poll doesn't define the feed
+        state['latency'] = round(state['latency'] * 0.8 + seconds * 0.2, 3)
+        state['last_ok'] = now
+        if now - self._refreshed >= REFRESH_SECONDS:
+            self.dirty = True
+        if self.dirty:
+            self._refreshed = now
+        return recovered
+
+    def record_failure(self, url, error, seconds, now=None):
+        """Returns True if this failure is the one that suspends the feed."""
+        now = time.time() if now is None else now
+        state = self.states.setdefault(url, {'failures': 0, 'last_error': None, 'latency': seconds})
+        state['failures'] += 1
+        state['last_error'] = str(error)[:200]
+        state['last_error_at'] = now
+        self.dirty = True
+        return state['failures'] == SUSPEND_AFTER
+
+    def retry_minutes(self, url):
+        """Minutes until a failing or suspended feed should be tried again."""
+        failures = self.states.get(url, {}).get('failures', 0)
+        if failures >= SUSPEND_AFTER:
+            return PROBE_INTERVAL
+        return min(MAX_BACKOFF, BASE_BACKOFF * 2 ** max(0, failures - 1))
+
+    def forget(self, active_urls):
+        """Drops health records for URLs that no guild is subscribed to anymore."""
+        stale = [url for url in self.states if url not in active_urls]
+        for url in stale:
+            del self.states[url]
+        if stale:
+            self.dirty = True
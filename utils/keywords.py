@@ -0,0 +1,110 @@
+import re
+from functools import lru_cache
+
+SUBSTRING = 'sub'
+WHOLE_WORD = 'word'
+# Below this many substring keywords, plain `in` checks beat a regex scan
+SMALL_SET = 64
+
+class KeywordSet:
+    """One subscriber's compiled filter: positive and negative (`-keyword`) tokens.
+
+    A token is a (mode, lowercased keyword) pair, the same form FeedMatcher.scan() returns.
+    """
+    __slots__ = ('positives', 'negatives')
+
+    def __init__(self, positives, negatives):
+        self.positives = positives
+        self.negatives = negatives
+
+    @property
+    def tokens(self):
+        return self.positives | self.negatives
+
+    def accepts(self, matched):
+        if self.negatives and not self.negatives.isdisjoint(matched):
+            return False
+        return not self.positives or not self.positives.isdisjoint(matched)
+
+@lru_cache(maxsize=4096)
+def compile_keywords(keywords, whole_word=False):
+    """Builds a KeywordSet from a feed's keyword tuple. Cached, so identical lists share one object."""
+    mode = WHOLE_WORD if whole_word else SUBSTRING
+    positives = set()
+    negatives = set()
+    for keyword in keywords:
+        keyword = keyword.lower().strip()
+        if keyword.startswith('-') and len(keyword) > 1:
+            negatives.add((mode, keyword[1:]))
+        elif keyword:
+            positives.add((mode, keyword))
+    return KeywordSet(frozenset(positives), frozenset(negatives))
+
+def _trie_pattern(words):
+    """Builds a regex with shared prefixes factored out (`bit(?:coin)?` rather than `bitcoin|bit`).
+
+    Python's re tries alternatives one by one, so a flat alternation of hundreds of keywords is
+    slow; the factored form only follows branches that still match. Longer continuations are
+    tried first, so the match at each position is the longest keyword starting there.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        ends_here = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if ends_here:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+class FeedMatcher:
+    """Finds every keyword from a group of subscribers in a single regex pass over the text.
+
+    The regex reports one (the longest) keyword per start position, so shorter keywords that are
+    prefixes of a reported one are added back from a table computed at compile time.
+    """
+    def __init__(self, tokens):
+        self.tokens = frozenset(tokens)
+        self._small = frozenset()
+        self._patterns = []
+        for mode in (SUBSTRING, WHOLE_WORD):
+            words = {word for token_mode, word in self.tokens if token_mode == mode}
+            if not words:
+                continue
+            if mode == SUBSTRING and len(words) <= SMALL_SET:
+                self._small = frozenset(words)
+                continue
+            if mode == WHOLE_WORD:
+                pattern = re.compile(r"(?=\b(" + _trie_pattern(words) + r")\b)")
+            else:
+                pattern = re.compile(r"(?=(" + _trie_pattern(words) + r"))")
+            implied = {}
+            for word in words:
+                implied[word] = frozenset(
+                    (mode, word[:end]) for end in range(1, len(word) + 1)
+                    if word[:end] in words and (mode == SUBSTRING or re.match(re.escape(word[:end]) + r"\b", word))
+                )
+            self._patterns.append((pattern, implied))
+
+    def scan(self, text):
+        """Returns the set of tokens found in `text`."""
+        text = text.lower()
+        matched = {(SUBSTRING, word) for word in self._small if word in text}
+        for pattern, implied in self._patterns:
+            for word in {m.group(1) for m in pattern.finditer(text)}:
+                matched |= implied[word]
+        return matched
+
+@lru_cache(maxsize=1024)
+def shared_matcher(tokens):
+    """Returns the FeedMatcher for a frozenset of tokens, shared by every feed with that set."""
+    return FeedMatcher(tokens)
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from bisect import bisect_left
+from aiohttp import web
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    """In-process counters, gauges and histograms, rendered in the Prometheus text format.
+
+    Recording is a dict update, so it is cheap enough for the hot paths. Services that already keep
+    a `stats` dict are exported through collectors, which copy their values in at render time.
+    """
+    def __init__(self):
+        self._values = {}       # name -> {labels: value}
+        self._types = {}        # name -> 'counter' | 'gauge' | 'histogram'
+        self._help = {}
+        self._collectors = {}   # name -> callable(metrics)
+
+    def describe(self, name, kind, text):
+        self._types[name] = kind
+        self._help[name] = text
+
+    def _series(self, name, kind):
+        self._types.setdefault(name, kind)
+        return self._values.setdefault(name, {})
+
+    def inc(self, name, value=1, **labels):
+        series = self._series(name, 'counter')
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        self._series(name, 'gauge')[tuple(sorted(labels.items()))] = value
+
+    def set_total(self, name, value, **labels):
+        """Sets a counter to an absolute value, for totals another component already keeps."""
+        self._series(name, 'counter')[tuple(sorted(labels.items()))] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        series = self._series(name, 'histogram')
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def remove(self, name, **labels):
+        self._values.get(name, {}).pop(tuple(sorted(labels.items())), None)
+
+    def add_collector(self, name, collect):
+        self._collectors[name] = collect
+
+    def collect(self):
+        for collect in list(self._collectors.values()):
+            collect(self)
+
+    def total(self, name, **labels):
+        """Sums a counter or gauge over every series matching `labels`."""
+        wanted = set(labels.items())
+        return sum(value for key, value in self._values.get(name, {}).items() if wanted <= set(key))
+
+    def histogram_summary(self, name, quantile=0.95):
+        """Returns (count, average, approximate quantile) over every series of a histogram."""
+        count = 0
+        total = 0.0
+        counts = None
+        buckets = ()
+        for histogram in self._values.get(name, {}).values():
+            buckets = histogram.buckets
+            counts = [a + b for a, b in zip(counts, histogram.counts)] if counts else list(histogram.counts)
+            count += histogram.count
+            total += histogram.sum
+        if not count:
+            return 0, 0.0, 0.0
+        rank = quantile * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return count, total / count, buckets[i] if i < len(buckets) else float('inf')
+        return count, total / count, float('inf')
+
+    def render(self):
+        self.collect()
+        lines = []
+        for name in sorted(self._values):
+            kind = self._types[name]
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in self._values[name].items():
+                if kind != 'histogram':
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(value.buckets + ('+Inf',), value.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(value.sum)}")
+                lines.append(f"{name}_count{_labels(key)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+# Shared by every component, like the rest of the bot-wide services
+metrics = Metrics()
+
+class LoopLagMonitor:
+    """Records how late a periodic wake-up runs, i.e. how long something blocked the event loop.
+
+    Lags go to `metrics` when one is given; with `keep_samples` each one is also kept in `samples`,
+    which is what the benchmarks report from.
+    """
+    def __init__(self, metrics=None, interval=0.5, keep_samples=False):
+        self.metrics = metrics
+        self.interval = interval
+        self.samples = [] if keep_samples else None
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            if self.samples is not None:
+                self.samples.append(lag)
+            if self.metrics is not None:
+                self.metrics.observe('event_loop_lag_seconds', lag,
+                                     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+                self.metrics.set('event_loop_lag_last_seconds', lag)
+
+    def report(self):
+        """(p99, max, mean) of the kept samples, in seconds."""
+        samples = sorted(self.samples or [0.0])
+        return samples[min(len(samples) - 1, int(len(samples) * 0.99))], samples[-1], sum(samples) / len(samples)
+
+class MetricsServer:
+    """Serves GET /metrics in the Prometheus text format."""
+    def __init__(self, metrics, host='127.0.0.1', port=9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def handle(self, request):
+        return web.Response(body=self.metrics.render().encode(),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
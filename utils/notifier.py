@@ -0,0 +1,146 @@
+import asyncio
+import time
+from collections import OrderedDict
+import discord
+from utils.metrics import metrics
+from utils.alert_index import describe_condition
+
+MAX_MESSAGE_CHARS = 2000
+USER_CACHE_SIZE = 4096
+# How long alerts for a user whose DMs are closed, or who no longer exists, wait before another try
+UNREACHABLE_SECONDS = 60 * 60
+
+class AlertNotifier:
+    """Sends triggered price alerts as DMs in the background.
+
+    Alerts for the same user are combined into one message, users are resolved from the gateway
+    cache or a small LRU before falling back to a REST fetch_user, and at most `concurrency` users
+    are messaged at once. Triggered alerts are out of the AlertIndex while in flight, so a later
+    tick can't send them again; the ones that couldn't be delivered are put back afterwards.
+    Users who refuse DMs or no longer exist are not tried again for UNREACHABLE_SECONDS; their
+    alerts stay active meanwhile.
+    """
+    def __init__(self, bot, concurrency=10, cache_size=USER_CACHE_SIZE):
+        self.bot = bot
+        self.cache_size = cache_size
+        self._users = OrderedDict()   # user_id -> User, least recently used first
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self.in_flight = {}           # alert_id -> alert
+        self._unreachable = {}        # user_id -> monotonic time before which they aren't tried again
+        self.stats = {'messages': 0, 'alerts': 0, 'failed': 0, 'skipped': 0, 'fetched_users': 0,
+                      'send_seconds_max': 0.0}
+
+    def submit(self, triggered):
+        """Queues [(alert, price), ...] for delivery and returns immediately."""
+        by_user = {}
+        now = time.monotonic()
+        for alert, price in triggered:
+            if alert['user_id'] in self._unreachable:
+                if self._unreachable[alert['user_id']] > now:
+                    # Their DMs failed for good recently; keep the alert without trying again yet
+                    self.bot.active_alerts.add(alert)
+                    self.stats['skipped'] += 1
+                    continue
+                del self._unreachable[alert['user_id']]
+            self.in_flight[alert['id']] = alert
+            by_user.setdefault(alert['user_id'], []).append((alert, price))
+        for user_id, user_alerts in by_user.items():
+            task = asyncio.create_task(self._notify(user_id, user_alerts))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Anything still in flight stays active so it triggers again after a restart
+        for alert in self.in_flight.values():
+            self.bot.active_alerts.add(alert)
+        self.in_flight.clear()
+
+    async def _get_user(self, user_id):
+        user = self._users.get(user_id)
+        if user is not None:
+            self._users.move_to_end(user_id)
+            return user
+        user = self.bot.get_user(user_id)
+        if user is None:
+            user = await self.bot.fetch_user(user_id)
+            self.stats['fetched_users'] += 1
+        self._users[user_id] = user
+        if len(self._users) > self.cache_size:
+            self._users.popitem(last=False)
+        return user
+
+    async def _notify(self, user_id, user_alerts):
+        async with self._semaphore:
+            start = time.monotonic()
+            remaining = {alert['id'] for alert, _ in user_alerts}
+            try:
+                user = await self._get_user(user_id)
+                for message, covered in build_messages(user_alerts, self.bot.coins.name):
+                    await user.send(message)
+                    self.stats['messages'] += 1
+                    # Settle each message's alerts as soon as it is out, so a later failure can't resend them
+                    self._delivered(covered)
+                    remaining.difference_update(alert['id'] for alert, _ in covered)
+                return
+            except discord.NotFound:
+                print(f"User {user_id} not found.")
+                self._unreachable[user_id] = time.monotonic() + UNREACHABLE_SECONDS
+            except discord.Forbidden:
+                print(f"Cannot send DM to user {user_id}.")
+                self._unreachable[user_id] = time.monotonic() + UNREACHABLE_SECONDS
+            except discord.HTTPException as e:
+                print(f"Failed to send alerts to user {user_id}: {e}")
+            except Exception as e:
+                print(f"Failed to send alerts to user {user_id}: {e!r}")
+            finally:
+                elapsed = time.monotonic() - start
+                metrics.observe('alert_dm_seconds', elapsed)
+                self.stats['send_seconds_max'] = max(self.stats['send_seconds_max'], elapsed)
+        self._requeue(user_id, [(alert, price) for alert, price in user_alerts if alert['id'] in remaining])
+
+    def _delivered(self, user_alerts):
+        self.stats['alerts'] += len(user_alerts)
+        for alert, _ in user_alerts:
+            self.in_flight.pop(alert['id'], None)
+        self.bot.save_alerts(removed=[alert for alert, _ in user_alerts])
+
+    def _requeue(self, user_id, user_alerts):
+        self._users.pop(user_id, None)
+        self.stats['failed'] += len(user_alerts)
+        for alert, _ in user_alerts:
+            self.in_flight.pop(alert['id'], None)
+            self.bot.active_alerts.add(alert)
+
+    def summary(self):
+        return (f"{self.stats['alerts']} alerts in {self.stats['messages']} DMs, "
+                f"{len(self.in_flight)} in flight, {self.stats['failed']} failed, {self.stats['skipped']} skipped, "
+                f"{self.stats['fetched_users']} users fetched, slowest user {self.stats['send_seconds_max']:.1f} s")
+
+def build_messages(user_alerts, coin_name=str.capitalize):
+    """Formats one user's triggered alerts, split so no message exceeds Discord's 2000 characters.
+
+    Returns [(message, [(alert, price), ...]), ...] with the alerts each message covers.
+    """
+    if len(user_alerts) == 1:
+        header = "🔔 **Price Alert!** 🔔\n\n"
+    else:
+        header = f"🔔 **{len(user_alerts)} Price Alerts!** 🔔\n\n"
+    messages = []
+    message = header
+    covered = []
+    for alert, price in user_alerts:
+        line = (f"Your alert for **{coin_name(alert['crypto'])}** was triggered.\n"
+                f"Target: {describe_condition(alert)}\n"
+                f"Current Price: ${price:,.2f}\n\n")
+        if len(message) + len(line) > MAX_MESSAGE_CHARS and message != header:
+            messages.append((message.rstrip(), covered))
+            message = header
+            covered = []
+        message += line
+        covered.append((alert, price))
+    messages.append((message.rstrip(), covered))
+    return messages
@@ -0,0 +1,48 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+# Feed lists are a few KB; anything much bigger isn't one
+MAX_OPML_BYTES = 512 * 1024
+
+def parse_opml(data):
+    """Returns the URL of every feed outline in an OPML document, in order.
+
+    Outlines nested in categories are included, and a URL listed twice is returned once.
+    Raises ValueError if the document isn't usable OPML.
+    """
+    if len(data) > MAX_OPML_BYTES:
+        raise ValueError(f"the file is larger than {MAX_OPML_BYTES // 1024} KB")
+    # OPML never needs a DTD; refusing one rules out entity-expansion tricks
+    if b'<!DOCTYPE' in data or b'<!ENTITY' in data:
+        raise ValueError("the file contains a DTD, which OPML doesn't use")
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        raise ValueError(f"the file is not valid XML ({e})") from None
+    if root.tag != 'opml' or root.find('body') is None:
+        raise ValueError("the file is not an OPML document")
+
+    feeds = []
+    seen = set()
+    for outline in root.find('body').iter('outline'):
+        url = (outline.get('xmlUrl') or '').strip()
+        if not url or url in seen:
+            continue
+        seen.add(url)
+        feeds.append(url)
+    return feeds
+
+def build_opml(title, groups):
+    """Serialises [(group name, [url, ...]), ...] as an OPML 2.0 document with one outline per group."""
+    root = ET.Element('opml', version='2.0')
+    head = ET.SubElement(root, 'head')
+    ET.SubElement(head, 'title').text = title
+    ET.SubElement(head, 'dateCreated').text = format_datetime(datetime.now(timezone.utc))
+    body = ET.SubElement(root, 'body')
+    for name, urls in groups:
+        group = ET.SubElement(body, 'outline', text=name, title=name)
+        for url in urls:
+            ET.SubElement(group, 'outline', type='rss', text=url, title=url, xmlUrl=url)
+    ET.indent(root)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
@@ -0,0 +1,197 @@
+import asyncio
+import calendar
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_tz, mktime_tz
+from xml.etree.ElementTree import XMLPullParser, ParseError
+import feedparser
+from utils.metrics import metrics
+
+metrics.describe('rss_parse_seconds', 'histogram', 'Time to parse one feed, including any wait for a free parser worker.')
+
+# Image sources in order of preference; within one source the widest image wins
+MEDIA_CONTENT, ENCLOSURE, THUMBNAIL = 3, 2, 1
+
+def _width(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _is_image(medium, mime_type):
+    if medium:
+        return medium == 'image'
+    return not mime_type or mime_type.startswith('image/')
+
+def pick_image(candidates):
+    """Returns the URL of the best (source, width, url) candidate, or None."""
+    candidates = [candidate for candidate in candidates if candidate[2]]
+    return max(candidates)[2] if candidates else None
+
+def best_image(entry):
+    """Picks an image from media:content, image enclosures or media:thumbnail."""
+    candidates = []
+    for media in entry.get('media_content') or ():
+        if _is_image(media.get('medium'), media.get('type')):
+            candidates.append((MEDIA_CONTENT, _width(media.get('width')), media.get('url')))
+    for enclosure in entry.get('enclosures') or ():
+        if enclosure.get('type', '').startswith('image/'):
+            candidates.append((ENCLOSURE, 0, enclosure.get('href')))
+    for thumbnail in entry.get('media_thumbnail') or ():
+        candidates.append((THUMBNAIL, _width(thumbnail.get('width')), thumbnail.get('url')))
+    return pick_image(candidates)
+
+def parse_feed(body):
+    """Parses raw feed bytes into the compact fields the RSS cog uses.
+
+    Only plain dicts and strings are returned so results are cheap to send back from a
+    worker process, instead of pickling whole FeedParserDict trees.
+    """
+    feed = feedparser.parse(body)
+    entries = []
+    for entry in feed.entries:
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        entries.append({
+            'id': entry.get('id', ''),
+            'title': entry.get('title', ''),
+            'link': entry.get('link', ''),
+            'summary': entry.get('summary', ''),
+            'image': best_image(entry),
+            'published': calendar.timegm(published) if published else None
+        })
+    return {
+        'title': feed.feed.get('title', ''),
+        'ttl': feed.feed.get('ttl'),
+        'update_period': feed.feed.get('sy_updateperiod'),
+        'update_frequency': feed.feed.get('sy_updatefrequency'),
+        'entries': entries
+    }
+
+# Documents larger than this are read with the streaming parser, which stops early
+STREAM_THRESHOLD = 512 * 1024
+STREAM_CHUNK = 64 * 1024
+MEDIA_NS = '{http://search.yahoo.com/mrss/}'
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def _timestamp(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    # A date the platform can't represent (e.g. year 30000) is treated like one that can't be parsed
+    try:
+        parsed = parsedate_tz(value)
+        if parsed:
+            return mktime_tz(parsed)
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp())
+    except (ValueError, OverflowError):
+        return None
+
+def _stream_entry(element):
+    fields = {}
+    link = ''
+    images = []
+    for child in element:
+        name = _local(child.tag)
+        if name == 'link':
+            href = child.get('href')
+            if href is None:
+                link = link or (child.text or '').strip()
+            elif child.get('rel', 'alternate') == 'alternate' and not link:
+                link = href
+            elif child.get('rel') == 'enclosure' and child.get('type', '').startswith('image/'):
+                images.append((ENCLOSURE, 0, href))
+        elif child.tag == MEDIA_NS + 'content':
+            if _is_image(child.get('medium'), child.get('type')):
+                images.append((MEDIA_CONTENT, _width(child.get('width')), child.get('url')))
+        elif child.tag == MEDIA_NS + 'thumbnail':
+            images.append((THUMBNAIL, _width(child.get('width')), child.get('url')))
+        elif name == 'enclosure':
+            if child.get('type', '').startswith('image/'):
+                images.append((ENCLOSURE, 0, child.get('url')))
+        elif name not in fields:
+            fields[name] = (child.text or '').strip()
+    published = fields.get('pubDate') or fields.get('published') or fields.get('updated') or fields.get('date')
+    return {
+        'id': fields.get('guid') or fields.get('id', ''),
+        'title': fields.get('title', ''),
+        'link': link,
+        'summary': fields.get('description') or fields.get('summary') or fields.get('content', ''),
+        'image': pick_image(images),
+        'published': _timestamp(published)
+    }
+
+def stream_parse_feed(body, max_items, stop_key=None):
+    """Reads only the head of a large RSS or Atom document with an incremental XML parser.
+
+    Stops after `max_items` entries or at the entry whose id/link is `stop_key` (the feed's
+    cursor), so the rest of the document is never turned into objects. Returns the same shape
+    as parse_feed, or None if the document isn't well-formed XML and needs feedparser instead.
+    """
+    parser = XMLPullParser(events=('start', 'end'))
+    feed = {'title': '', 'ttl': None, 'update_period': None, 'update_frequency': None, 'entries': []}
+    in_entry = False
+    for offset in range(0, len(body), STREAM_CHUNK):
+        try:
+            parser.feed(body[offset:offset + STREAM_CHUNK])
+            events = list(parser.read_events())
+        except ParseError:
+            return feed if feed['entries'] else None
+        for event, element in events:
+            name = _local(element.tag)
+            if event == 'start':
+                in_entry = in_entry or name in ('item', 'entry')
+                continue
+            if name in ('item', 'entry'):
+                in_entry = False
+                entry = _stream_entry(element)
+                element.clear()
+                feed['entries'].append(entry)
+                if len(feed['entries']) >= max_items or (stop_key and stop_key in (entry['id'], entry['link'])):
+                    return feed
+            elif not in_entry:
+                text = (element.text or '').strip()
+                if name == 'title' and not feed['title']:
+                    feed['title'] = text
+                elif name == 'ttl':
+                    feed['ttl'] = text
+                elif name == 'updatePeriod':
+                    feed['update_period'] = text
+                elif name == 'updateFrequency':
+                    feed['update_frequency'] = text
+    return feed
+
+def parse_any(body, max_items=None, stop_key=None, truncated=False):
+    """Uses the streaming parser for large or truncated documents and feedparser otherwise."""
+    if truncated or len(body) > STREAM_THRESHOLD:
+        feed = stream_parse_feed(body, max_items or float('inf'), stop_key)
+        if feed is not None:
+            return feed
+    return parse_feed(body)
+
+class FeedParser:
+    """Runs parse_feed in the default thread pool, or in a process pool when `workers` > 0."""
+    def __init__(self, workers=0):
+        self.workers = workers
+        self._pool = None
+        if workers > 0:
+            # spawn avoids forking a process that already has an event loop and threads running
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+    async def parse(self, body, max_items=None, stop_key=None, truncated=False):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._pool, parse_any, body, max_items, stop_key, truncated)
+        finally:
+            metrics.observe('rss_parse_seconds', time.perf_counter() - start)
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import metrics
+
+def atomic_write(path, data):
+    """Writes bytes to a temp file and swaps it in, so readers never see a half-written file."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return len(data)
+
+def json_snapshot(path, data):
+    """Returns a job that atomically writes a JSON snapshot of `data` taken right now."""
+    payload = json.dumps(data, separators=(',', ':')).encode()
+    return lambda: atomic_write(path, payload)
+
+class WriteBehind:
+    """Coalesces save requests and writes each dirty store at most once per `window` seconds.
+
+    Stores are registered with a snapshot function. It is called on the event loop with the set
+    of keys marked since the last write and returns a job that does the actual I/O on a single
+    writer thread, so writes stay ordered and never block the loop. A snapshot that consumes
+    state (e.g. queued records) can give the job a `restore` callable; it runs on the loop if the
+    write fails, so the retry still has that state to write.
+    """
+    def __init__(self, window=2.0):
+        self.window = window
+        self._stores = {}
+        self._dirty = {}
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistence")
+        self._task = None
+        self._flushing = None
+        self.stats = {}
+
+    def register(self, name, snapshot):
+        self._stores[name] = snapshot
+        self.stats[name] = {'marks': 0, 'writes': 0, 'bytes': 0, 'write_seconds': 0.0, 'snapshot_seconds': 0.0}
+
+    def mark(self, name, key=None):
+        """Flags a store (optionally one key within it, e.g. a guild id) as needing a write."""
+        self._dirty.setdefault(name, set()).add(key)
+        self.stats[name]['marks'] += 1
+        self._wakeup.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Give further marks a chance to pile up so a burst of commands becomes one write
+            await asyncio.sleep(self.window)
+            # Shielded so close() can stop this loop without cutting a flush short
+            self._flushing = asyncio.ensure_future(self.flush())
+            await asyncio.shield(self._flushing)
+
+    async def flush(self):
+        """Writes every dirty store now."""
+        self._wakeup.clear()
+        loop = asyncio.get_running_loop()
+        failed = {}
+        try:
+            while self._dirty:
+                # Stores are taken one at a time, so any not reached yet stay marked dirty
+                name = next(iter(self._dirty))
+                keys = self._dirty.pop(name)
+                stats = self.stats[name]
+                start = time.perf_counter()
+                job = self._stores[name](keys)
+                stats['snapshot_seconds'] += time.perf_counter() - start
+                try:
+                    start = time.perf_counter()
+                    written = await loop.run_in_executor(self._executor, job)
+                except BaseException as e:
+                    if not isinstance(e, asyncio.CancelledError):
+                        print(f"Failed to save {name}: {e!r}")
+                        metrics.inc('persistence_failures_total', store=name)
+                    # Try again on the next window rather than losing the change
+                    if hasattr(job, 'restore'):
+                        job.restore()
+                    failed.setdefault(name, set()).update(keys)
+                    if not isinstance(e, Exception):
+                        raise
+                    continue
+                elapsed = time.perf_counter() - start
+                metrics.observe('persistence_write_seconds', elapsed, store=name)
+                stats['write_seconds'] += elapsed
+                stats['writes'] += 1
+                stats['bytes'] += written or 0
+        finally:
+            for name, keys in failed.items():
+                self._dirty.setdefault(name, set()).update(keys)
+            if failed:
+                self._wakeup.set()
+
+    async def close(self):
+        """Stops the background task, lets a running flush finish and writes anything still pending."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._flushing and not self._flushing.done():
+            await self._flushing
+        await self.flush()
+        self._executor.shutdown(wait=True)
+        print(f"Persistence: {self.summary()}")
+
+    def summary(self):
+        parts = []
+        for name, stats in self.stats.items():
+            parts.append(f"{name} {stats['writes']} writes/{stats['marks']} saves, {stats['bytes'] / 1024:,.1f} KB, "
+                         f"{stats['write_seconds'] * 1000:,.0f} ms writing, {stats['snapshot_seconds'] * 1000:,.0f} ms on loop")
+        return "; ".join(parts)
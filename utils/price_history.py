@@ -0,0 +1,133 @@
+import base64
+import time
+from array import array
+
+# Longest run of minutes without ticks that is filled with the last close; after a longer gap (a
+# restart, an outage) the prices in between are unknown, so the history starts over
+MAX_GAP_MINUTES = 10
+
+class PriceRing:
+    """One coin's closing price for each of the last `size` minutes, in fixed-size arrays.
+
+    `sums` holds a running total of the closes, so the sum over any window is the difference of two
+    slots instead of a walk over the window. A minute without ticks repeats the previous close, for
+    up to MAX_GAP_MINUTES; windows never reach back across a longer gap.
+    """
+    __slots__ = ('slots', 'closes', 'sums', 'minute', 'count')
+
+    def __init__(self, size):
+        # One slot more than the longest window, to hold the total just before it
+        self.slots = size + 1
+        self.closes = array('d', bytes(8 * self.slots))
+        self.sums = array('d', bytes(8 * self.slots))
+        self.minute = None   # minute number of the newest slot
+        self.count = 0       # slots holding data
+
+    def record(self, price, now):
+        """Stores a price. Returns True if it started a new minute."""
+        minute = int(now // 60)
+        if self.minute is None or minute - self.minute > MAX_GAP_MINUTES:
+            slot = minute % self.slots
+            self.closes[slot] = price
+            self.sums[slot] = price
+            self.minute = minute
+            self.count = 1
+            return True
+        if minute <= self.minute:
+            slot = self.minute % self.slots
+            self.sums[slot] += price - self.closes[slot]
+            self.closes[slot] = price
+            return False
+
+        gap = minute - self.minute
+        last = self.closes[self.minute % self.slots]
+        total = self.sums[self.minute % self.slots]
+        for skipped in range(max(self.minute + 1, minute - self.slots + 1), minute):
+            total += last
+            self.closes[skipped % self.slots] = last
+            self.sums[skipped % self.slots] = total
+        slot = minute % self.slots
+        self.closes[slot] = price
+        self.sums[slot] = total + price
+        self.minute = minute
+        self.count = min(self.slots, self.count + gap)
+        return True
+
+    @property
+    def last(self):
+        return self.closes[self.minute % self.slots]
+
+    def ago(self, minutes):
+        """The close `minutes` minutes before the newest one, or None if the history is shorter."""
+        if minutes >= self.count:
+            return None
+        return self.closes[(self.minute - minutes) % self.slots]
+
+    def average(self, minutes):
+        """Average close over the last `minutes` minutes, including the current one."""
+        if minutes >= self.count:
+            return None
+        total = self.sums[self.minute % self.slots] - self.sums[(self.minute - minutes) % self.slots]
+        return total / minutes
+
+class PriceHistory:
+    """Per-minute price history for the coins that have alerts, with fixed memory per coin."""
+    def __init__(self, minutes=1440):
+        self.minutes = minutes
+        self.rings = {}   # coin id -> PriceRing
+
+    def record(self, coin_id, price, now=None):
+        """Adds a tick. Returns True if it started a new minute for that coin."""
+        now = time.time() if now is None else now
+        ring = self.rings.get(coin_id)
+        if ring is None:
+            ring = self.rings[coin_id] = PriceRing(self.minutes)
+        return ring.record(price, now)
+
+    def last(self, coin_id):
+        ring = self.rings.get(coin_id)
+        return ring.last if ring else None
+
+    def change(self, coin_id, minutes):
+        """Percent change from `minutes` minutes ago to the latest price, or None without enough history."""
+        ring = self.rings.get(coin_id)
+        before = ring.ago(minutes) if ring else None
+        if not before:
+            return None
+        return (ring.last - before) / before * 100
+
+    def average(self, coin_id, minutes):
+        ring = self.rings.get(coin_id)
+        return ring.average(minutes) if ring else None
+
+    def retain(self, coin_ids):
+        """Drops the history of coins that no longer have alerts."""
+        for coin_id in [coin_id for coin_id in self.rings if coin_id not in coin_ids]:
+            del self.rings[coin_id]
+
+    def snapshot(self):
+        """JSON-ready copy of every coin's closes, for a warm restart."""
+        return {
+            'minutes': self.minutes,
+            'coins': {coin_id: {'minute': ring.minute, 'count': ring.count,
+                                'closes': base64.b64encode(ring.closes.tobytes()).decode()}
+                      for coin_id, ring in self.rings.items()}
+        }
+
+    def restore(self, data):
+        """Loads a snapshot taken with the same history length; running totals are rebuilt."""
+        if data.get('minutes') != self.minutes:
+            return
+        for coin_id, saved in data.get('coins', {}).items():
+            ring = PriceRing(self.minutes)
+            closes = array('d', base64.b64decode(saved['closes']))
+            if len(closes) != ring.slots:
+                continue
+            ring.closes = closes
+            ring.minute = saved['minute']
+            ring.count = saved['count']
+            total = 0.0
+            for minute in range(ring.minute - ring.count + 1, ring.minute + 1):
+                total += closes[minute % ring.slots]
+                ring.sums[minute % ring.slots] = total
+            self.rings[coin_id] = ring
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+import aiohttp
+
+class PriceSource:
+    """Delivers price ticks to the alert engine.
+
+    `start(on_tick)` begins calling `on_tick(coin_id, price)` for every new price; `close()` stops
+    it. Implementations decide where the prices come from and how often.
+    """
+    def __init__(self):
+        self._task = None
+        self.stats = {'ticks': 0, 'errors': 0, 'last_tick': None}
+
+    def start(self, on_tick):
+        self._task = asyncio.create_task(self._run(on_tick))
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _tick(self, on_tick, coin_id, price):
+        self.stats['ticks'] += 1
+        self.stats['last_tick'] = time.time()
+        on_tick(coin_id, price)
+
+    async def _run(self, on_tick):
+        raise NotImplementedError
+
+class PollingSource(PriceSource):
+    """Asks the shared PriceService for every watched coin once per `interval` seconds."""
+    def __init__(self, prices, coins, interval=60):
+        super().__init__()
+        self.prices = prices
+        self.coins = coins      # callable returning the coin ids that have alerts
+        self.interval = interval
+
+    async def _run(self, on_tick):
+        while True:
+            coin_ids = self.coins()
+            if coin_ids:
+                try:
+                    prices = await self.prices.get_prices(coin_ids)
+                    print(f"Fetched prices for {len(prices)} coins ({self.prices.summary()})")
+                    for coin_id, data in prices.items():
+                        if 'usd' in data:
+                            self._tick(on_tick, coin_id, data['usd'])
+                except aiohttp.ClientError as e:
+                    self.stats['errors'] += 1
+                    print(f"Error fetching prices: {e}")
+            await asyncio.sleep(self.interval)
+
+    def describe(self):
+        return f"polling CoinGecko every {self.interval:g} s"
+
+class StreamSource(PriceSource):
+    """Consumes pushed ticks from a WebSocket (ws:// or wss://) or an HTTP JSON-lines stream.
+
+    Each message is a JSON object such as `{"id": "bitcoin", "usd": 64000.5}`, or a list of them.
+    The connection is re-opened with exponential backoff whenever it drops.
+    """
+    def __init__(self, url, max_backoff=60):
+        super().__init__()
+        self.url = url
+        self.max_backoff = max_backoff
+        self.connected = False
+
+    async def _run(self, on_tick):
+        backoff = 1
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_connect=15)) as session:
+            while True:
+                try:
+                    if self.url.startswith(('ws://', 'wss://')):
+                        await self._consume_websocket(session, on_tick)
+                    else:
+                        await self._consume_lines(session, on_tick)
+                    backoff = 1
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.stats['errors'] += 1
+                    print(f"Price stream error: {e}")
+                self.connected = False
+                print(f"Price stream disconnected, reconnecting in {backoff} s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def _consume_websocket(self, session, on_tick):
+        async with session.ws_connect(self.url, heartbeat=30) as ws:
+            self.connected = True
+            async for message in ws:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    self._handle(message.data, on_tick)
+                elif message.type == aiohttp.WSMsgType.ERROR:
+                    break
+
+    async def _consume_lines(self, session, on_tick):
+        async with session.get(self.url) as response:
+            response.raise_for_status()
+            self.connected = True
+            async for line in response.content:
+                if line.strip():
+                    self._handle(line, on_tick)
+
+    def _handle(self, raw, on_tick):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            self.stats['errors'] += 1
+            return
+        for tick in data if isinstance(data, list) else [data]:
+            if isinstance(tick, dict) and 'id' in tick and isinstance(tick.get('usd'), (int, float)):
+                self._tick(on_tick, tick['id'], tick['usd'])
+
+    def describe(self):
+        state = "connected" if self.connected else "reconnecting"
+        return f"streaming from {self.url} ({state})"
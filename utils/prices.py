@@ -0,0 +1,141 @@
+import asyncio
+import time
+import aiohttp
+
+COINGECKO_API = "https://api.coingecko.com/api/v3"
+DETAIL_PARAMS = {'include_market_cap': 'true', 'include_24hr_vol': 'true', 'include_24hr_change': 'true'}
+
+class PriceService:
+    """Shared CoinGecko client with one pooled session, a TTL cache and request coalescing.
+
+    Lookups are keyed by (coin id, detailed). Concurrent requests for the same key wait on the
+    same future, and ids requested within `batch_delay` seconds of each other are fetched with a
+    single simple/price call.
+    """
+    def __init__(self, ttl=30, batch_delay=0.05, batch_size=100, base_url=COINGECKO_API):
+        self.ttl = ttl
+        self.batch_delay = batch_delay
+        self.batch_size = batch_size
+        self.base_url = base_url
+        self._session = None
+        self._cache = {}      # (coin_id, detailed) -> (expires_at, data or None)
+        self._inflight = {}   # (coin_id, detailed) -> Future
+        self._pending = {False: [], True: []}
+        self._flush_scheduled = {False: False, True: False}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'requests': 0, 'errors': 0}
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=10),
+            timeout=aiohttp.ClientTimeout(total=15)
+        )
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def get_prices(self, coin_ids, detailed=False):
+        """Returns {coin_id: price data} for the ids CoinGecko knows. Raises aiohttp.ClientError on failure."""
+        now = time.monotonic()
+        results = {}
+        waiting = {}
+        for coin_id in dict.fromkeys(coin_ids):
+            cached = self._lookup(coin_id, detailed, now)
+            if cached is not None:
+                self.stats['hits'] += 1
+                if cached[1] is not None:
+                    results[coin_id] = cached[1]
+            else:
+                waiting[coin_id] = self._request(coin_id, detailed)
+
+        if waiting:
+            # shield() so one caller being cancelled doesn't cancel the lookup for everyone else
+            values = await asyncio.gather(*(asyncio.shield(future) for future in waiting.values()))
+            for coin_id, data in zip(waiting, values):
+                if data is not None:
+                    results[coin_id] = data
+        return results
+
+    async def get_price(self, coin_id, detailed=False):
+        return (await self.get_prices([coin_id], detailed)).get(coin_id)
+
+    def _lookup(self, coin_id, detailed, now):
+        cached = self._cache.get((coin_id, detailed))
+        if cached is None and not detailed:
+            # A detailed entry also answers a plain price lookup
+            cached = self._cache.get((coin_id, True))
+        if cached is not None and cached[0] > now:
+            return cached
+        return None
+
+    def _request(self, coin_id, detailed):
+        key = (coin_id, detailed)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return future
+        self.stats['misses'] += 1
+        loop = asyncio.get_running_loop()
+        future = self._inflight[key] = loop.create_future()
+        self._pending[detailed].append(coin_id)
+        if not self._flush_scheduled[detailed]:
+            self._flush_scheduled[detailed] = True
+            loop.call_later(self.batch_delay, self._flush, detailed)
+        return future
+
+    def _flush(self, detailed):
+        self._flush_scheduled[detailed] = False
+        pending, self._pending[detailed] = self._pending[detailed], []
+        for i in range(0, len(pending), self.batch_size):
+            asyncio.create_task(self._fetch(pending[i:i + self.batch_size], detailed))
+
+    async def _fetch(self, coin_ids, detailed):
+        params = {'ids': ",".join(coin_ids), 'vs_currencies': 'usd'}
+        if detailed:
+            params.update(DETAIL_PARAMS)
+        self.stats['requests'] += 1
+        try:
+            try:
+                async with self._session.get(f"{self.base_url}/simple/price", params=params) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                if not isinstance(data, dict):
+                    raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                self.stats['errors'] += 1
+                if isinstance(e, aiohttp.ClientError):
+                    error = e
+                elif isinstance(e, asyncio.TimeoutError):
+                    error = aiohttp.ServerTimeoutError(str(e))
+                else:
+                    # A truncated or malformed body; callers only expect aiohttp errors
+                    error = aiohttp.ClientPayloadError(f"invalid price response: {e}")
+                self._fail(coin_ids, detailed, error)
+                return
+
+            expires_at = time.monotonic() + self.ttl
+            if len(self._cache) > 10000:
+                now = time.monotonic()
+                self._cache = {key: value for key, value in self._cache.items() if value[0] > now}
+            for coin_id in coin_ids:
+                # Unknown ids are cached as None too, so repeated typos don't reach CoinGecko
+                self._cache[(coin_id, detailed)] = (expires_at, data.get(coin_id))
+                future = self._inflight.pop((coin_id, detailed))
+                if not future.done():
+                    future.set_result(data.get(coin_id))
+        finally:
+            # Never leave a lookup in flight: later callers would join it and wait forever
+            self._fail(coin_ids, detailed, aiohttp.ClientError("price lookup was interrupted"))
+
+    def _fail(self, coin_ids, detailed, error):
+        for coin_id in coin_ids:
+            future = self._inflight.pop((coin_id, detailed), None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+
+    def summary(self):
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+        saved = self.stats['hits'] + self.stats['coalesced']
+        rate = (saved / lookups * 100) if lookups else 0
+        return (f"{saved}/{lookups} lookups served without a new request ({rate:.0f}%), "
+                f"{self.stats['requests']} upstream requests, {self.stats['errors']} errors")
@@ -0,0 +1,125 @@
+import re
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from html import unescape
+from html.parser import HTMLParser
+import discord
+from utils.cursors import entry_key
+from utils.dedup import item_key, title_fingerprint
+
+# Discord rejects embeds over these limits
+TITLE_LIMIT = 256
+FOOTER_LIMIT = 2048
+# Well below the 4096 description limit: up to 10 embeds share a message's 6000 characters
+SUMMARY_LIMIT = 700
+RENDER_CACHE_SIZE = 2048
+
+BLOCK_TAGS = {'p', 'br', 'div', 'li', 'ul', 'ol', 'tr', 'blockquote', 'pre', 'hr',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+SKIPPED_TAGS = {'script', 'style'}
+
+# `key` and `fingerprint` identify the item for dedup; `text` is the full plain-text summary for
+# keyword matching; `embed` is shared by every send, and `data` is its dict form for the post queue.
+# None of them may be modified after rendering.
+Article = namedtuple('Article', ['key', 'fingerprint', 'link', 'title', 'text', 'embed', 'data'])
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.image = None
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag == 'img' and self.image is None:
+            self.image = dict(attrs).get('src')
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+def strip_html(html):
+    """Returns (plain text, first <img> src or None) for an HTML fragment."""
+    if '<' not in html:
+        text, image = unescape(html), None
+    else:
+        extractor = _TextExtractor()
+        extractor.feed(html)
+        extractor.close()
+        text, image = ''.join(extractor.parts), extractor.image
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' *\n[\s]*', '\n', text)
+    return text.strip(), image
+
+def truncate(text, limit):
+    """Shortens text to at most `limit` characters, at a word boundary where there is one nearby."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1]
+    space = cut.rfind(' ')
+    if space > limit * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + '…'
+
+def _web_url(url):
+    return url if url and url.startswith(('http://', 'https://')) else None
+
+def render_entry(entry, feed_title):
+    """Normalises a parsed entry into the Article every subscriber of its feed is sent."""
+    title, _ = strip_html(entry['title'])
+    text, inline_image = strip_html(entry['summary'])
+    link = _web_url(entry['link'])
+    embed = discord.Embed(
+        title=truncate(title, TITLE_LIMIT) or None,
+        url=link,
+        description=truncate(text, SUMMARY_LIMIT) or "A new article has been posted",
+        color=discord.Color.blue()
+    )
+    if feed_title:
+        embed.set_footer(text=truncate(feed_title, FOOTER_LIMIT))
+    image = _web_url(entry['image']) or _web_url(inline_image)
+    if image:
+        embed.set_image(url=image)
+    if entry['published']:
+        embed.timestamp = datetime.fromtimestamp(entry['published'], timezone.utc)
+    return Article(item_key(entry['id'], entry['link']), title_fingerprint(title, feed_title), entry['link'],
+                   title, text, embed, embed.to_dict())
+
+class ArticleRenderer:
+    """Renders each new item once and hands the same Article to every guild that gets it.
+
+    Articles are cached by (item id, feed title) in a small LRU, so an item that shows up in
+    several feeds, or again after a cursor reset, isn't rendered twice. Entries with neither an
+    id nor a link are always rendered afresh.
+    """
+    def __init__(self, cache_size=RENDER_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.stats = {'rendered': 0, 'reused': 0}
+
+    def render(self, entry, feed_title):
+        if not entry_key(entry):
+            # Without an id or a link, nothing tells this entry apart from other such entries
+            self.stats['rendered'] += 1
+            return render_entry(entry, feed_title)
+        key = (entry_key(entry), feed_title)
+        article = self._cache.get(key)
+        if article is not None:
+            self._cache.move_to_end(key)
+            self.stats['reused'] += 1
+            return article
+        article = self._cache[key] = render_entry(entry, feed_title)
+        self.stats['rendered'] += 1
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return article
@@ -0,0 +1,118 @@
+import heapq
+import random
+import statistics
+import time
+
+UPDATE_PERIODS = {
+    'hourly': 60,
+    'daily': 24 * 60,
+    'weekly': 7 * 24 * 60,
+    'monthly': 30 * 24 * 60,
+    'yearly': 365 * 24 * 60
+}
+
+def hinted_interval(ttl=None, update_period=None, update_frequency=None):
+    """Returns the poll interval in minutes suggested by <ttl> or sy:updatePeriod, if any."""
+    hints = []
+    try:
+        if ttl:
+            hints.append(float(ttl))
+    except ValueError:
+        pass
+    period = UPDATE_PERIODS.get(str(update_period or '').strip().lower())
+    if period:
+        try:
+            frequency = max(1, int(update_frequency or 1))
+        except ValueError:
+            frequency = 1
+        hints.append(period / frequency)
+    return max(hints) if hints else None
+
+def cadence_interval(publish_times):
+    """Returns half of the median gap between entries, in minutes, or None if it can't be measured."""
+    times = sorted({t for t in publish_times if t}, reverse=True)
+    if len(times) < 2:
+        return None
+    gaps = [newer - older for newer, older in zip(times, times[1:])]
+    # Polling twice per expected publication keeps the average delay under half a gap
+    return statistics.median(gaps) / 60 / 2
+
+class FeedScheduler:
+    """Priority queue of next-due times, one entry per unique feed URL.
+
+    Each feed keeps its own interval, derived from its publish cadence and any <ttl> or
+    sy:updatePeriod hint, bounded by `min_interval` and `max_interval` (minutes).
+    """
+    def __init__(self, default_interval, min_interval, max_interval, jitter=0.1):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.feeds = {}   # url -> {'interval': minutes, 'due': timestamp}
+        self._heap = []   # (due, url); stale pairs are skipped when popped
+
+    def _clamp(self, minutes):
+        return max(self.min_interval, min(self.max_interval, minutes))
+
+    def _push(self, url, delay_seconds, now):
+        due = now + delay_seconds
+        self.feeds[url]['due'] = due
+        heapq.heappush(self._heap, (due, url))
+
+    def sync(self, urls, now=None):
+        """Starts tracking newly subscribed URLs and forgets unsubscribed ones."""
+        now = time.time() if now is None else now
+        for url in list(self.feeds):
+            if url not in urls:
+                del self.feeds[url]
+        for url in urls:
+            if url not in self.feeds:
+                interval = self._clamp(self.default_interval)
+                self.feeds[url] = {'interval': interval, 'due': None}
+                # Spread first polls a little so newly added feeds don't all land in the same tick
+                self._push(url, random.uniform(0, interval * 60 * self.jitter), now)
+
+    def pop_due(self, now=None):
+        """Removes and returns every URL whose next poll is due."""
+        now = time.time() if now is None else now
+        due_urls = []
+        while self._heap and self._heap[0][0] <= now:
+            due, url = heapq.heappop(self._heap)
+            state = self.feeds.get(url)
+            if state and state['due'] == due:
+                state['due'] = None
+                due_urls.append(url)
+        return due_urls
+
+    def reschedule(self, url, changed, publish_times=(), hint=None, now=None):
+        """Computes the feed's next interval and queues it again with jitter."""
+        state = self.feeds.get(url)
+        if state is None:
+            return
+        now = time.time() if now is None else now
+        interval = state['interval']
+        if changed:
+            interval = cadence_interval(publish_times) or interval
+        else:
+            # Nothing new since the last poll, so ease off gradually
+            interval *= 1.25
+        if hint:
+            # Never poll more often than the publisher asks us to
+            interval = max(interval, hint)
+        state['interval'] = self._clamp(interval)
+        spread = 1 + random.uniform(-self.jitter, self.jitter)
+        self._push(url, state['interval'] * 60 * spread, now)
+
+    def defer(self, url, minutes, now=None):
+        """Queues a failing feed for a retry in `minutes`, leaving its normal interval untouched."""
+        if url not in self.feeds:
+            return
+        now = time.time() if now is None else now
+        spread = 1 + random.uniform(-self.jitter, self.jitter)
+        self._push(url, minutes * 60 * spread, now)
+
+    def set_default_interval(self, minutes):
+        self.default_interval = minutes
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
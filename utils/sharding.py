@@ -0,0 +1,104 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from utils.dedup import BUCKET_SECONDS
+
+def feed_partition(url, count):
+    """Stable poller index for a feed URL, so every process agrees on who polls it."""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), 'little') % count
+
+def guild_shard(guild_id, shard_count):
+    """The Discord shard a guild's events arrive on."""
+    return (int(guild_id) >> 22) % shard_count
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id TEXT NOT NULL,
+    channel_id INTEGER,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS claims (
+    key INTEGER PRIMARY KEY,
+    bucket INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS claims_bucket ON claims (bucket);
+CREATE TABLE IF NOT EXISTS consumers (
+    name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
+
+class PostQueue:
+    """SQLite (WAL) hand-off from poller processes to the gateway processes connected to Discord.
+
+    Pollers publish posts and every gateway reads the ones after its own offset, delivering those
+    for guilds on its shards. Publishing a post claims its dedup key in the same transaction, so
+    two pollers can never post the same item to the same channel.
+    """
+    def __init__(self, path, retention_hours=3, post_retention=3600):
+        self.retention = retention_hours * 3600
+        self.post_retention = post_retention
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def publish(self, posts, now=None):
+        """Queues [(key, guild_id, channel_id, payload), ...] in one transaction.
+
+        `key` is the digest DedupStore.add() returned for the post. A post whose key has already
+        been claimed is dropped; pass key=None for messages that aren't articles. Returns how many
+        posts were queued.
+        """
+        now = time.time() if now is None else now
+        bucket = int(now // BUCKET_SECONDS)
+        queued = 0
+        with self._lock, self.conn:
+            for key, guild_id, channel_id, payload in posts:
+                if key is not None:
+                    cursor = self.conn.execute("INSERT OR IGNORE INTO claims (key, bucket) VALUES (?, ?)",
+                                               (key, bucket))
+                    if not cursor.rowcount:
+                        continue
+                self.conn.execute("INSERT INTO posts (guild_id, channel_id, payload, created) VALUES (?, ?, ?, ?)",
+                                  (str(guild_id), channel_id, json.dumps(payload), now))
+                queued += 1
+        return queued
+
+    def read(self, consumer, limit=500):
+        """Returns up to `limit` (id, guild_id, channel_id, payload) posts after the consumer's offset.
+
+        A consumer reading for the first time starts at the end of the queue.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT last_id FROM consumers WHERE name = ?", (consumer,)).fetchone()
+            if row is None:
+                last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM posts").fetchone()[0]
+                with self.conn:
+                    self.conn.execute("INSERT INTO consumers (name, last_id) VALUES (?, ?)", (consumer, last_id))
+            else:
+                last_id = row[0]
+            rows = self.conn.execute("SELECT id, guild_id, channel_id, payload FROM posts WHERE id > ? ORDER BY id LIMIT ?",
+                                     (last_id, limit)).fetchall()
+        return [(post_id, guild_id, channel_id, json.loads(payload)) for post_id, guild_id, channel_id, payload in rows]
+
+    def ack(self, consumer, last_id):
+        """Moves the consumer's offset past every post up to `last_id`."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO consumers (name, last_id) VALUES (?, ?)", (consumer, last_id))
+
+    def prune(self, now=None):
+        """Drops posts older than `post_retention` seconds and claims older than the dedup retention."""
+        now = time.time() if now is None else now
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM posts WHERE created < ?", (now - self.post_retention,))
+            self.conn.execute("DELETE FROM claims WHERE bucket < ?", (int((now - self.retention) // BUCKET_SECONDS),))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,211 @@
+import json
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feeds (
+    guild_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    channel_id INTEGER,
+    options TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (guild_id, position)
+);
+CREATE INDEX IF NOT EXISTS feeds_url ON feeds (url);
+CREATE TABLE IF NOT EXISTS keywords (
+    guild_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    ord INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    PRIMARY KEY (guild_id, position, ord)
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    crypto TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    price REAL NOT NULL,
+    minutes INTEGER
+);
+CREATE INDEX IF NOT EXISTS alerts_crypto ON alerts (crypto);
+CREATE TABLE IF NOT EXISTS history (
+    key INTEGER PRIMARY KEY,
+    bucket INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_bucket ON history (bucket);
+CREATE TABLE IF NOT EXISTS title_fingerprints (
+    scope INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    PRIMARY KEY (scope, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS title_fingerprints_bucket ON title_fingerprints (bucket);
+"""
+
+# Feed keys that have their own columns or table; anything else goes into `options`
+FEED_COLUMNS = ('url', 'channel_id', 'keywords')
+ALERT_COLUMNS = ('id', 'user_id', 'crypto', 'condition', 'price', 'minutes')
+
+class Storage:
+    """SQLite (WAL) persistence for guild config, feeds, keywords, alerts and history.
+
+    The *_statements methods snapshot in-memory state into SQL on the caller's thread; execute()
+    applies them in one transaction and is meant to run on a writer thread. Reads made while the
+    bot is running hold the same lock, so they never see half of a write on the shared connection.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if 'minutes' not in {row[1] for row in self.conn.execute("PRAGMA table_info(alerts)")}:
+            # Databases created before window alerts existed
+            self.conn.execute("ALTER TABLE alerts ADD COLUMN minutes INTEGER")
+        self.conn.commit()
+        self._next_alert_id = (self.conn.execute("SELECT MAX(id) FROM alerts").fetchone()[0] or 0) + 1
+
+    # --- Writing ---
+
+    def execute(self, statements):
+        """Runs statements in a single transaction. Returns the approximate payload size in bytes."""
+        size = 0
+        with self.lock, self.conn:
+            for sql, params in statements:
+                if isinstance(params, list):
+                    if params:
+                        self.conn.executemany(sql, params)
+                    size += sum(len(repr(row)) for row in params)
+                else:
+                    self.conn.execute(sql, params)
+                    size += len(repr(params))
+        return size
+
+    def settings_statements(self, bot_config):
+        """Global (non-guild) settings such as rss_interval_minutes."""
+        rows = [(key, json.dumps(value)) for key, value in bot_config.items() if not isinstance(value, dict)]
+        return [("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", rows)]
+
+    def guild_statements(self, guild_id, guild_config):
+        """Rewrites one guild's rows: its config, feeds and keywords."""
+        guild_id = str(guild_id)
+        if guild_config is None:
+            return [
+                ("DELETE FROM guild_config WHERE guild_id = ?", (guild_id,)),
+                ("DELETE FROM feeds WHERE guild_id = ?", (guild_id,)),
+                ("DELETE FROM keywords WHERE guild_id = ?", (guild_id,))
+            ]
+        data = {key: value for key, value in guild_config.items() if key != 'rss_feeds'}
+        feed_rows = []
+        keyword_rows = []
+        for position, feed_obj in enumerate(guild_config.get('rss_feeds', [])):
+            options = {key: value for key, value in feed_obj.items() if key not in FEED_COLUMNS}
+            feed_rows.append((guild_id, position, feed_obj['url'], feed_obj.get('channel_id'), json.dumps(options)))
+            for ord_, keyword in enumerate(feed_obj.get('keywords', [])):
+                keyword_rows.append((guild_id, position, ord_, keyword))
+        return [
+            ("INSERT OR REPLACE INTO guild_config (guild_id, data) VALUES (?, ?)", (guild_id, json.dumps(data))),
+            ("DELETE FROM feeds WHERE guild_id = ?", (guild_id,)),
+            ("DELETE FROM keywords WHERE guild_id = ?", (guild_id,)),
+            ("INSERT INTO feeds (guild_id, position, url, channel_id, options) VALUES (?, ?, ?, ?, ?)", feed_rows),
+            ("INSERT INTO keywords (guild_id, position, ord, keyword) VALUES (?, ?, ?, ?)", keyword_rows)
+        ]
+
+    def version_statements(self):
+        """Bumps the config version, so other processes sharing the database notice the change."""
+        return [("INSERT INTO settings (key, value) VALUES ('_config_version', 1) "
+                 "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1", ())]
+
+    def new_alert_id(self):
+        alert_id = self._next_alert_id
+        self._next_alert_id += 1
+        return alert_id
+
+    def alert_statements(self, upserted=(), deleted_ids=()):
+        """Inserts or updates individual alert rows and deletes others by id."""
+        upserted_rows = [tuple(alert.get(column) for column in ALERT_COLUMNS) for alert in upserted]
+        return [
+            ("INSERT OR REPLACE INTO alerts (id, user_id, crypto, condition, price, minutes) VALUES (?, ?, ?, ?, ?, ?)", upserted_rows),
+            ("DELETE FROM alerts WHERE id = ?", [(alert_id,) for alert_id in deleted_ids])
+        ]
+
+    def history_statements(self, records, oldest_bucket, fingerprints=()):
+        """Appends new (bucket, key) and (bucket, scope, fingerprint) records and deletes expired buckets."""
+        return [
+            ("INSERT OR IGNORE INTO history (bucket, key) VALUES (?, ?)", list(records)),
+            ("DELETE FROM history WHERE bucket < ?", (oldest_bucket,)),
+            ("INSERT OR IGNORE INTO title_fingerprints (bucket, scope, fingerprint) VALUES (?, ?, ?)", list(fingerprints)),
+            ("DELETE FROM title_fingerprints WHERE bucket < ?", (oldest_bucket,))
+        ]
+
+    def close(self):
+        self.conn.close()
+
+    # --- Loading (called once at start-up) ---
+
+    def load_config(self):
+        rows = self.conn.execute("SELECT key, value FROM settings")
+        # Keys starting with an underscore are internal markers, not bot settings
+        bot_config = {key: json.loads(value) for key, value in rows if not key.startswith('_')}
+        for guild_id, data in self.conn.execute("SELECT guild_id, data FROM guild_config"):
+            bot_config[guild_id] = json.loads(data)
+            bot_config[guild_id]['rss_feeds'] = []
+
+        keywords = {}
+        for guild_id, position, keyword in self.conn.execute(
+                "SELECT guild_id, position, keyword FROM keywords ORDER BY guild_id, position, ord"):
+            keywords.setdefault((guild_id, position), []).append(keyword)
+
+        for guild_id, position, url, channel_id, options in self.conn.execute(
+                "SELECT guild_id, position, url, channel_id, options FROM feeds ORDER BY guild_id, position"):
+            feed_obj = {'url': url, 'keywords': keywords.get((guild_id, position), []), 'channel_id': channel_id}
+            feed_obj.update(json.loads(options))
+            bot_config.setdefault(guild_id, {'rss_feeds': []})['rss_feeds'].append(feed_obj)
+        return bot_config
+
+    def changed_config(self, known_version):
+        """Returns (version, config), with config None when the version is still `known_version`."""
+        with self.lock:
+            version = self.config_version()
+            return version, (self.load_config() if version != known_version else None)
+
+    def config_version(self):
+        row = self.conn.execute("SELECT value FROM settings WHERE key = '_config_version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def load_alerts(self):
+        rows = self.conn.execute("SELECT id, user_id, crypto, condition, price, minutes FROM alerts ORDER BY id")
+        return [dict(zip(ALERT_COLUMNS, row)) for row in rows]
+
+    def load_history(self):
+        return self.conn.execute("SELECT bucket, key FROM history").fetchall()
+
+    def load_title_fingerprints(self):
+        return self.conn.execute("SELECT bucket, scope, fingerprint FROM title_fingerprints").fetchall()
+
+    # --- One-shot migration from the JSON files ---
+
+    def is_migrated(self):
+        return self.conn.execute("SELECT 1 FROM settings WHERE key = '_migrated'").fetchone() is not None
+
+    def migrate(self, bot_config, alerts, history_records):
+        """Imports configs.json, alerts.json and history.json contents in one transaction."""
+        statements = self.settings_statements(bot_config)
+        for guild_id, guild_config in bot_config.items():
+            if isinstance(guild_config, dict):
+                statements += self.guild_statements(guild_id, guild_config)
+        for alert in alerts:
+            alert.setdefault('id', self.new_alert_id())
+        statements += self.alert_statements(upserted=alerts)
+        statements += self.history_statements(history_records, 0)
+        statements.append(("INSERT OR REPLACE INTO settings (key, value) VALUES ('_migrated', 'true')", ()))
+        self.execute(statements)
@@ -0,0 +1,66 @@
+from collections import namedtuple
+from utils.keywords import compile_keywords, shared_matcher
+
+# keywords is the subscriber's compiled KeywordSet
+Subscription = namedtuple('Subscription', ['guild_id', 'channel_id', 'keywords'])
+
+def feed_keywords(feed_obj):
+    return compile_keywords(tuple(feed_obj.get('keywords', [])), feed_obj.get('whole_word', False))
+
+class SubscriptionIndex:
+    """Inverted index from feed URL to the guild channels subscribed to it.
+
+    Updated one guild at a time whenever that guild's feeds, keywords or default channel change,
+    so a poll cycle only touches the subscribers of feeds that actually have new items.
+    """
+    def __init__(self):
+        self.by_url = {}        # url -> [Subscription, ...]
+        self._guild_urls = {}   # guild_id -> {url, ...}
+        self._matchers = {}     # url -> FeedMatcher over all its subscribers' keywords
+        self.version = 0        # bumped on every change so pollers know to resync their URL set
+
+    def build(self, bot_config):
+        for guild_id, guild_config in bot_config.items():
+            if isinstance(guild_config, dict):
+                self.update_guild(guild_id, guild_config)
+
+    def update_guild(self, guild_id, guild_config):
+        """Replaces every subscription belonging to one guild."""
+        guild_id = str(guild_id)
+        old_urls = self._guild_urls.pop(guild_id, set())
+        for url in old_urls:
+            remaining = [sub for sub in self.by_url[url] if sub.guild_id != guild_id]
+            if remaining:
+                self.by_url[url] = remaining
+            else:
+                del self.by_url[url]
+
+        new_urls = set()
+        default_channel_id = (guild_config or {}).get('channel_id')
+        for feed_obj in (guild_config or {}).get('rss_feeds', []):
+            channel_id = feed_obj.get('channel_id') or default_channel_id
+            if not channel_id:
+                continue
+            url = feed_obj['url']
+            self.by_url.setdefault(url, []).append(Subscription(guild_id, channel_id, feed_keywords(feed_obj)))
+            new_urls.add(url)
+        if new_urls:
+            self._guild_urls[guild_id] = new_urls
+
+        for url in old_urls | new_urls:
+            self._matchers.pop(url, None)
+        self.version += 1
+
+    def urls(self):
+        return self.by_url.keys()
+
+    def subscribers(self, url):
+        return self.by_url.get(url, [])
+
+    def matcher(self, url):
+        """Returns the keyword matcher shared by every subscriber of this URL."""
+        matcher = self._matchers.get(url)
+        if matcher is None:
+            tokens = frozenset().union(*(sub.keywords.tokens for sub in self.subscribers(url)))
+            matcher = self._matchers[url] = shared_matcher(tokens)
+        return matcher